@@ -0,0 +1,7 @@
+__app_name__ = "LinkChecker"
+__version__ = "0.0.post1+g3feacd20e"
+__release_date__ = "2026-10-17"
+__copyright_year__ = "2026"
+__author__ = "LinkChecker Authors"
+__url__ = "https://linkchecker.github.io/linkchecker/"
+__support_url__ = "https://github.com/linkchecker/linkchecker/issues"
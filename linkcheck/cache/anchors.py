@@ -0,0 +1,85 @@
+# Copyright (C) 2024 LinkChecker Authors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Cache check results and anchors of documents linked with anchors.
+"""
+import contextlib
+
+from ..containers import LFUCache
+from ..decorators import synchronized
+from ..lock import get_lock
+
+# lock objects
+anchor_lock = get_lock("anchor_index_lock")
+document_lock = get_lock("anchor_index_document_lock")
+
+
+class AnchorIndex:
+    """
+    Thread-safe index of checked documents, so that URLs only differing
+    in the anchor are checked with one download. The stored anchor check
+    holds the anchors found in the document, or is None if the anchor
+    was not checked.
+    format: {document URL (string) -> (result, anchor check)}
+
+    Locks of the documents are only kept while they are held or waited
+    for.
+    format: {document URL (string) -> [lock, number of users]}
+    """
+
+    def __init__(self, size=10000):
+        """Initialize the index and the per-document locks."""
+        self.documents = LFUCache(size=size)
+        self.document_locks = {}
+        self.hits = self.misses = 0
+
+    @contextlib.contextmanager
+    def lock_document(self, url):
+        """Hold the lock of the document URL. Holding it while the
+        document is checked makes URLs with other anchors wait for
+        the result."""
+        with document_lock:
+            entry = self.document_locks.get(url)
+            if entry is None:
+                entry = self.document_locks[url] = [get_lock(url), 0]
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with document_lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self.document_locks[url]
+
+    @synchronized(anchor_lock)
+    def get(self, url):
+        """Return tuple (result, anchor check) of the document URL, or
+        None if it has not been checked."""
+        if url in self.documents:
+            self.hits += 1
+            return self.documents[url]
+        self.misses += 1
+        return None
+
+    @synchronized(anchor_lock)
+    def add(self, url, result, anchor_check):
+        """Store the result and anchor check of the document URL."""
+        self.documents[url] = (result, anchor_check)
+
+    def get_stats(self):
+        """Return dictionary with hit statistics."""
+        return dict(hits=self.hits, misses=self.misses)
@@ -0,0 +1,224 @@
+# Copyright (C) 2024 LinkChecker Authors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Per-host politeness scheduling and request strategy.
+"""
+import random
+import threading
+import time
+
+from ..lock import get_lock
+from .. import log, LOG_CACHE
+
+
+class HostScheduler:
+    """
+    Thread-safe schedule of the next time each host may be contacted.
+    The lock only protects the bookkeeping; callers wait for their
+    reserved slot without holding it, so a throttled host does not
+    stall threads checking other hosts.
+    format: {host (string) -> next allowed request time (float)}
+
+    The time between two requests to a host is chosen randomly between
+    the minimum wait time and the current delay of the host. The delay
+    is adapted like TCP congestion control: fast responses increase the
+    request rate additively, rate limiting responses double the delay.
+    format: {host (string) -> delay (float)}
+    """
+
+    wait_time_min_default = 0.1
+    wait_time_max_default = 0.6
+    # responses faster than this many seconds increase the request rate
+    low_latency = 0.5
+    # number of requests per second added after a fast response
+    rate_increase = 0.5
+    # factor and limit of the delay after rate limiting responses
+    backoff_factor = 2.0
+    backoff_max = 60.0
+
+    def __init__(self, requests_per_second):
+        """Initialize per-host request times."""
+        self.times = {}
+        self.delays = {}
+        self.crawl_delays = {}
+        self.maxrated = set()
+        self.wait_time_min = 1.0 / requests_per_second
+        self.wait_time_max = 6 * self.wait_time_min
+        self.lock = get_lock("host_scheduler_lock")
+
+    def get_wait_times(self, host):
+        """Return tuple (minimum, maximum) of seconds between two requests
+        to the given host, without adaptation."""
+        if host in self.maxrated:
+            wait_time_min, wait_time_max = self.wait_time_min, self.wait_time_max
+        else:
+            wait_time_min = max(self.wait_time_min, self.wait_time_min_default)
+            wait_time_max = max(self.wait_time_max, self.wait_time_max_default)
+        crawl_delay = self.crawl_delays.get(host, 0)
+        return max(wait_time_min, crawl_delay), max(wait_time_max, crawl_delay)
+
+    def get_delay(self, host):
+        """Return the current maximum number of seconds between two
+        requests to the given host."""
+        wait_time_min, wait_time_max = self.get_wait_times(host)
+        return max(wait_time_min, self.delays.get(host, wait_time_max))
+
+    def reserve(self, host):
+        """Reserve the next request slot for the given host.
+
+        @return: number of seconds to wait before the slot is due
+        @rtype: float
+        """
+        with self.lock:
+            t = time.time()
+            due_time = max(t, self.times.get(host, t))
+            wait_time_min = self.get_wait_times(host)[0]
+            wait_time_max = self.get_delay(host)
+            self.times[host] = due_time + random.uniform(wait_time_min, wait_time_max)
+        log.debug(LOG_CACHE,
+                  "Min wait time: %s Max wait time: %s for host: %s",
+                  wait_time_min, wait_time_max, host)
+        return due_time - t
+
+    def add_latency(self, host, latency):
+        """Increase the request rate of the host if it answered within
+        the given number of seconds."""
+        if latency > self.low_latency:
+            return
+        with self.lock:
+            rate = 1.0 / self.get_delay(host) + self.rate_increase
+            self.delays[host] = max(self.get_wait_times(host)[0], 1.0 / rate)
+
+    def back_off(self, host, retry_after=None):
+        """Decrease the request rate of a host that limited the rate.
+        If the host told when to retry, no request is sent before.
+
+        @param retry_after: number of seconds to wait, or None
+        """
+        with self.lock:
+            delay = min(self.get_delay(host) * self.backoff_factor, self.backoff_max)
+            self.delays[host] = delay
+            if retry_after is not None:
+                t = time.time()
+                self.times[host] = max(self.times.get(host, t), t + retry_after)
+        log.debug(LOG_CACHE, "Delay %s seconds between requests to host %s",
+                  delay, host)
+
+    def set_crawl_delay(self, host, crawl_delay):
+        """Wait at least the crawl delay from robots.txt between two
+        requests to the host."""
+        with self.lock:
+            self.crawl_delays[host] = crawl_delay
+
+    def get_due_time(self, host):
+        """Return the time when the given host may be contacted next.
+        This is not thread-safe and only a hint, since another thread
+        can reserve a slot before the returned value is used."""
+        return self.times.get(host, 0.0)
+
+    def set_maxrated(self, host):
+        """Remove the limit on the maximum request rate for a host."""
+        with self.lock:
+            self.maxrated.add(host)
+
+
+class HostSet:
+    """
+    Thread-safe set of hosts, for example hosts that do not answer
+    HEAD requests correctly.
+    """
+
+    def __init__(self):
+        """Initialize the empty set."""
+        self.hosts = set()
+        self.lock = get_lock("host_set_lock")
+
+    def add(self, host):
+        """Add the host."""
+        with self.lock:
+            self.hosts.add(host)
+
+    def __contains__(self, host):
+        """Check if the host has been added."""
+        return host in self.hosts
+
+
+class CircuitBreaker:
+    """
+    Thread-safe health record of hosts, fed by connection errors and
+    timeouts. After the given number of consecutive failures the
+    circuit of a host opens and its URLs fail fast instead of waiting
+    for the timeout. When the retry time has passed, a single URL is
+    let through as probe: on success the circuit closes again, on
+    failure it stays open for another retry time. A probe that ends
+    without success or failure, e.g. because no request was sent, lets
+    the next URL probe the host.
+    format: {host (string) -> [consecutive failures, open time,
+    identifier of the probing thread or None]}
+    """
+
+    def __init__(self, max_failures, retry_seconds):
+        """Initialize the host records. With zero max_failures circuits
+        never open."""
+        self.max_failures = max_failures
+        self.retry_seconds = retry_seconds
+        self.hosts = {}
+        self.lock = get_lock("circuit_breaker_lock")
+
+    def allow(self, host):
+        """Check if a request to the host may be sent."""
+        with self.lock:
+            record = self.hosts.get(host)
+            if record is None or record[1] is None:
+                return True
+            if record[2] is not None or time.time() < record[1] + self.retry_seconds:
+                return False
+            # half-open: this request probes the host
+            record[2] = threading.get_ident()
+            log.debug(LOG_CACHE, "Probing unreachable host %s", host)
+            return True
+
+    def end_probe(self, host):
+        """End the probe of the host by the calling thread, if any. If
+        the probe has no result, another URL may probe the host."""
+        with self.lock:
+            record = self.hosts.get(host)
+            if record is not None and record[2] == threading.get_ident():
+                record[2] = None
+
+    def add_success(self, host):
+        """Close the circuit of the host."""
+        with self.lock:
+            self.hosts.pop(host, None)
+
+    def add_failure(self, host):
+        """Count a connection failure of the host and open its circuit
+        if the limit of consecutive failures is reached."""
+        if not self.max_failures:
+            return
+        with self.lock:
+            record = self.hosts.setdefault(host, [0, None, None])
+            record[0] += 1
+            if record[2] is not None or record[0] >= self.max_failures:
+                if record[1] is None:
+                    log.debug(LOG_CACHE, "Host %s is unreachable", host)
+                record[1] = time.time()
+                record[2] = None
+
+    def get_failures(self, host):
+        """Return number of consecutive failures of the host."""
+        record = self.hosts.get(host)
+        return record[0] if record is not None else 0
@@ -0,0 +1,208 @@
+# Copyright (C) 2024 LinkChecker Authors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Cache check results across program runs.
+"""
+import os
+import pickle
+import sqlite3
+import time
+
+from ..decorators import synchronized
+from ..lock import get_lock
+from .. import log, LOG_CACHE
+
+# lock object
+persistent_lock = get_lock("persistent_cache_lock")
+
+# number of results written at once
+WRITE_BATCH_SIZE = 100
+
+# seconds to keep page data of pages that are not checked anymore
+PAGE_TTL = 30 * 24 * 60 * 60
+
+
+def get_scheme(key):
+    """Return the lowercase scheme of a cache key."""
+    return key.split(":", 1)[0].lower()
+
+
+class PersistentCache:
+    """
+    Thread-safe cache of valid results of extern URLs in an SQLite
+    database. Results are served until their age exceeds the time to
+    live configured for the URL scheme.
+    format: {cache key (string) -> (check time, pickled result)}
+
+    For incremental checks the cache also stores the validators and
+    links of parsed pages. Pages that have not been checked for
+    PAGE_TTL seconds are removed.
+    format: {cache key (string) -> (last check time, pickled page dictionary)}
+    """
+
+    def __init__(self, filename, ttls):
+        """Open or create the database.
+
+        @param filename: database filename
+        @param ttls: mapping {scheme -> time to live in seconds}; the
+          entry "*" applies to all other schemes, schemes with a time to
+          live of zero are not cached
+        """
+        self.filename = os.path.expanduser(filename)
+        self.ttls = ttls
+        dirname = os.path.dirname(self.filename)
+        if dirname and not os.path.isdir(dirname):
+            os.makedirs(dirname, 0o700)
+        self.conn = sqlite3.connect(self.filename, check_same_thread=False)
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS results"
+                " (url TEXT PRIMARY KEY, checked REAL NOT NULL, data BLOB NOT NULL)"
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages"
+                " (url TEXT PRIMARY KEY, seen REAL NOT NULL, data BLOB NOT NULL)"
+            )
+            columns = [row[1] for row in self.conn.execute("PRAGMA table_info(pages)")]
+            if "seen" not in columns:
+                # database of an older version
+                self.conn.execute(
+                    "ALTER TABLE pages ADD COLUMN seen REAL NOT NULL DEFAULT 0"
+                )
+                self.conn.execute("UPDATE pages SET seen = ?", (time.time(),))
+        self.buffer = {}
+        self.page_buffer = {}
+        # keys of stored pages that have been checked again
+        self.seen_pages = set()
+        self.hits = self.misses = 0
+        self.expire()
+
+    def get_ttl(self, key):
+        """Return time to live of results for the given cache key."""
+        ttls = self.ttls
+        return ttls.get(get_scheme(key), ttls.get("*", 0))
+
+    def expire(self):
+        """Remove results that exceeded the longest time to live and pages
+        that have not been checked for PAGE_TTL seconds."""
+        max_ttl = max(self.ttls.values(), default=0)
+        now = time.time()
+        with self.conn:
+            self.conn.execute("DELETE FROM results WHERE checked < ?", (now - max_ttl,))
+            self.conn.execute("DELETE FROM pages WHERE seen < ?", (now - PAGE_TTL,))
+
+    @synchronized(persistent_lock)
+    def get_result(self, key):
+        """Return tuple (check time, result) of a stored result that has
+        not expired yet, or None if not found."""
+        ttl = self.get_ttl(key)
+        if ttl <= 0:
+            return None
+        entry = self.buffer.get(key)
+        if entry is None:
+            row = self.conn.execute(
+                "SELECT checked, data FROM results WHERE url = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                entry = (row[0], pickle.loads(row[1]))
+        if entry is None or entry[0] < time.time() - ttl:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    @synchronized(persistent_lock)
+    def add_result(self, key, result):
+        """Store a valid result of an extern URL, other results are
+        always checked again."""
+        if not (result.valid and result.extern) or self.get_ttl(key) <= 0:
+            return
+        self.buffer[key] = (time.time(), result)
+        if len(self.buffer) >= WRITE_BATCH_SIZE:
+            self.flush()
+
+    @synchronized(persistent_lock)
+    def get_page(self, key):
+        """Return the stored page dictionary of the given cache key, or
+        None if not found."""
+        page = self.page_buffer.get(key)
+        if page is None:
+            row = self.conn.execute(
+                "SELECT data FROM pages WHERE url = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                page = pickle.loads(row[0])
+        return page
+
+    @synchronized(persistent_lock)
+    def add_page(self, key, page):
+        """Store a page dictionary with the cache key."""
+        self.page_buffer[key] = page
+        if len(self.page_buffer) >= WRITE_BATCH_SIZE:
+            self.flush()
+
+    @synchronized(persistent_lock)
+    def touch_page(self, key):
+        """Mark the stored page of the cache key as checked now, so that
+        it does not expire."""
+        self.seen_pages.add(key)
+        if len(self.seen_pages) >= WRITE_BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        """Write buffered results and pages to the database.
+        Not thread-safe!"""
+        now = time.time()
+        results = [
+            (key, checked, pickle.dumps(result, pickle.HIGHEST_PROTOCOL))
+            for key, (checked, result) in self.buffer.items()
+        ]
+        pages = [
+            (key, now, pickle.dumps(page, pickle.HIGHEST_PROTOCOL))
+            for key, page in self.page_buffer.items()
+        ]
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO results (url, checked, data) VALUES (?, ?, ?)",
+                results,
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO pages (url, seen, data) VALUES (?, ?, ?)",
+                pages,
+            )
+            self.conn.executemany(
+                "UPDATE pages SET seen = ? WHERE url = ?",
+                [(now, key) for key in self.seen_pages],
+            )
+        self.buffer = {}
+        self.page_buffer = {}
+        self.seen_pages = set()
+
+    @synchronized(persistent_lock)
+    def close(self):
+        """Write buffered results and close the database."""
+        if self.conn is None:
+            return
+        self.flush()
+        self.conn.close()
+        self.conn = None
+        log.debug(
+            LOG_CACHE, "Persistent cache: %d hits, %d misses", self.hits, self.misses
+        )
+
+    def get_stats(self):
+        """Return dictionary with hit statistics."""
+        return dict(hits=self.hits, misses=self.misses)
@@ -16,8 +16,13 @@
 """
 Cache check results.
 """
+import collections
+import copy
+
 from ..decorators import synchronized
 from ..lock import get_lock
+from .seen import SeenSet
+from .. import strformat
 
 
 # lock object
@@ -27,42 +32,157 @@ cache_lock = get_lock("results_cache_lock")
 class ResultCache:
     """
     Thread-safe cache of UrlData.to_wire() results.
-    the cache is limited in size since we rather recheck the same URL
-    multiple times instead of running out of memory.
+    Fingerprints of all seen keys are kept, so that no URL gets queued
+    twice.
+    The results themselves are limited in number since we rather recheck
+    the same URL multiple times instead of running out of memory; the
+    least recently used results are evicted first.
+    An optional persistent cache keeps valid results of extern URLs
+    across program runs.
     format: {cache key (string) -> result (UrlData.towire())}
     """
 
-    def __init__(self, result_cache_size):
-        """Initialize result cache."""
-        # mapping {URL -> cached result}
-        self.cache = {}
+    def __init__(self, result_cache_size, persistent=None, seen_bloom_size=0):
+        """Initialize result cache.
+
+        @param persistent: the persistent cache or None
+        @type persistent: PersistentCache
+        @param seen_bloom_size: size of the Bloom filter of seen cache keys
+            in bytes, 0 disables it
+        @type seen_bloom_size: int
+        """
+        # set of seen cache keys, including URLs that are being checked
+        self.seen = SeenSet(bloom_bits=8 * seen_bloom_size)
+        # mapping {URL -> cached result} in least recently used order
+        self.cache = collections.OrderedDict()
         self.max_size = result_cache_size
+        self.evictions = 0
+        self.persistent = persistent
 
     @synchronized(cache_lock)
     def get_result(self, key):
         """Return cached result or None if not found."""
-        return self.cache.get(key)
+        result = self.cache.get(key)
+        if result is not None:
+            self.cache.move_to_end(key)
+        return result
 
     @synchronized(cache_lock)
     def add_result(self, key, result):
         """Add result object to cache with given key.
-        The request is ignored when the cache is already full or the key
-        is None.
+        A None result only marks the key as seen. The request is ignored
+        when the key is None.
         """
-        if len(self.cache) > self.max_size:
+        if key is None:
             return
-        if key is not None:
-            self.cache[key] = result
+        self.seen.add(key)
+        if result is None:
+            return
+        if self.persistent is not None:
+            self.persistent.add_result(key, result)
+        self._add(key, result)
+
+    def _add(self, key, result):
+        """Add result to the in-memory cache. Not thread-safe!"""
+        self.cache[key] = result
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.max_size:
+            self.cache.popitem(last=False)
+            self.evictions += 1
+
+    def get_stored_result(self, key):
+        """Return a result of a previous program run from the persistent
+        cache, or None if not found or expired. Found results are added
+        to the in-memory cache."""
+        if self.persistent is None:
+            return None
+        entry = self.persistent.get_result(key)
+        if entry is None:
+            return None
+        checked, result = entry
+        result = copy.copy(result)
+        result.info = result.info + [
+            _("Result cached from a previous check at %s.")
+            % strformat.strtime(checked)
+        ]
+        self._add_stored(key, result)
+        return result
+
+    @synchronized(cache_lock)
+    def _add_stored(self, key, result):
+        """Add a result of the persistent cache to the in-memory cache."""
+        self._add(key, result)
+
+    def get_page(self, key):
+        """Return the stored page data of a previous program run, or None
+        if not found or if there is no persistent cache."""
+        if self.persistent is None:
+            return None
+        return self.persistent.get_page(key)
+
+    def add_page(self, key, page):
+        """Store page data for the next program run if there is a
+        persistent cache."""
+        if self.persistent is not None:
+            self.persistent.add_page(key, page)
+
+    def touch_page(self, key):
+        """Keep the stored page data for the next program run if there is
+        a persistent cache."""
+        if self.persistent is not None:
+            self.persistent.touch_page(key)
+
+    def close(self):
+        """Close the persistent cache."""
+        if self.persistent is not None:
+            self.persistent.close()
+
+    @synchronized(cache_lock)
+    def add_seen(self, key):
+        """Mark the key as seen.
+
+        @return: True if the key has not been seen before
+        @rtype: bool
+        """
+        return self.seen.add(key)
+
+    @synchronized(cache_lock)
+    def get_state(self):
+        """Return a dictionary with the seen keys and the cached results
+        in least recently used order."""
+        return dict(
+            seen=self.seen.get_state(),
+            results=list(self.cache.items()),
+            evictions=self.evictions,
+        )
+
+    @synchronized(cache_lock)
+    def restore(self, state):
+        """Replace seen keys and cached results with those of a state
+        returned by get_state()."""
+        self.seen.set_state(state["seen"])
+        self.cache = collections.OrderedDict(state["results"])
+        while len(self.cache) > self.max_size:
+            self.cache.popitem(last=False)
+        self.evictions = state["evictions"]
 
     def has_result(self, key):
         """Non-thread-safe function for fast containment checks."""
-        return key in self.cache
+        return key is not None and key in self.seen
 
-    def has_non_empty_result(self, key):
-        """Non-thread-safe function for fast containment checks."""
-        return self.cache.get(key)
+    def get_stats(self):
+        """Return dictionary with memory statistics. This is not
+        thread-safe and only informational."""
+        stats = dict(results=len(self.cache), evictions=self.evictions)
+        if self.persistent is not None:
+            stats.update(
+                ("persistent_%s" % k, v)
+                for k, v in self.persistent.get_stats().items()
+            )
+        stats.update(("seen_%s" % k, v) for k, v in self.seen.get_stats().items())
+        return stats
 
     def __len__(self):
-        """Get number of cached elements. This is not thread-safe and is
+        """Get number of seen elements. This is not thread-safe and is
         likely to change before the returned value is used."""
-        return len(self.cache)
+        return len(self.seen)
@@ -65,6 +65,11 @@ class RobotsTxt:
         rp.read()
         with cache_lock:
             self.cache[roboturl] = rp
+        crawl_delay = rp.get_crawldelay(self.useragent)
+        if crawl_delay:
+            url_data.aggregate.host_scheduler.set_crawl_delay(
+                url_data.urlparts[1], crawl_delay
+            )
         self.add_sitemap_urls(rp, url_data, roboturl)
         return rp.can_fetch(self.useragent, url_data.url)
 
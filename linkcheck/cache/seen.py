@@ -0,0 +1,174 @@
+# Copyright (C) 2024 LinkChecker Authors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Compact set of seen URLs.
+"""
+import array
+import hashlib
+
+# number of bits set per key in the optional Bloom filter
+BLOOM_HASHES = 4
+
+
+def fingerprint(key):
+    """Return a non-zero 64-bit fingerprint of the given string."""
+    data = key.encode("utf-8", "surrogatepass")
+    value = int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+    # zero marks empty table slots
+    return value or 1
+
+
+def new_table(size):
+    """Return zero-filled table with given number of 64-bit slots."""
+    return array.array("Q", bytes(8 * size))
+
+
+class SeenSet:
+    """
+    Set of strings stored as 64-bit fingerprints in an open-addressing
+    hash table with linear probing. An entry needs 11 to 22 bytes instead
+    of a full string object. The probability of a false positive is
+    negligible, two different URLs would need the same fingerprint.
+    An optional Bloom filter in front of the table answers most lookups
+    of unseen keys without probing the table.
+
+    Adding keys must be serialized by the caller; lookups can run
+    concurrently with adding.
+    """
+
+    def __init__(self, capacity=1024, bloom_bits=0):
+        """Initialize the table for the given number of keys.
+
+        @param capacity: expected number of keys, the table grows when
+          needed
+        @param bloom_bits: size of the Bloom filter, 0 disables it
+        """
+        size = 16
+        while 3 * size < 4 * capacity:
+            size *= 2
+        # table and mask are replaced together when the table grows
+        self.table = (new_table(size), size - 1)
+        self.count = 0
+        if bloom_bits:
+            self.bloom_bits = bloom_bits
+            self.bloom = bytearray((bloom_bits + 7) // 8)
+        else:
+            self.bloom_bits = 0
+            self.bloom = None
+
+    def _bloom_positions(self, value):
+        """Return the Bloom filter bit positions of a fingerprint."""
+        h1 = value & 0xFFFFFFFF
+        h2 = (value >> 32) | 1
+        return [(h1 + i * h2) % self.bloom_bits for i in range(BLOOM_HASHES)]
+
+    def _in_bloom(self, value):
+        """Check if all Bloom filter bits of the fingerprint are set."""
+        for pos in self._bloom_positions(value):
+            if not self.bloom[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def __contains__(self, key):
+        """Check if the key has been added."""
+        value = fingerprint(key)
+        if self.bloom is not None and not self._in_bloom(value):
+            return False
+        table, mask = self.table
+        i = value & mask
+        while True:
+            slot = table[i]
+            if slot == value:
+                return True
+            if not slot:
+                return False
+            i = (i + 1) & mask
+
+    def add(self, key):
+        """Add the key.
+
+        @return: True if the key has not been seen before
+        @rtype: bool
+        """
+        value = fingerprint(key)
+        table, mask = self.table
+        i = value & mask
+        while True:
+            slot = table[i]
+            if slot == value:
+                return False
+            if not slot:
+                break
+            i = (i + 1) & mask
+        table[i] = value
+        self.count += 1
+        if self.bloom is not None:
+            for pos in self._bloom_positions(value):
+                self.bloom[pos >> 3] |= 1 << (pos & 7)
+        if 4 * self.count > 3 * mask:
+            self._grow()
+        return True
+
+    def _grow(self):
+        """Double the table size and reinsert all fingerprints."""
+        old_table = self.table[0]
+        size = 2 * len(old_table)
+        table = new_table(size)
+        mask = size - 1
+        for value in old_table:
+            if value:
+                i = value & mask
+                while table[i]:
+                    i = (i + 1) & mask
+                table[i] = value
+        self.table = (table, mask)
+
+    def get_state(self):
+        """Return a copy of the table and the Bloom filter."""
+        return dict(
+            table=self.table[0].tobytes(),
+            count=self.count,
+            bloom=bytes(self.bloom) if self.bloom is not None else None,
+            bloom_bits=self.bloom_bits,
+        )
+
+    def set_state(self, state):
+        """Replace all keys with the keys of a state returned by
+        get_state()."""
+        table = array.array("Q")
+        table.frombytes(state["table"])
+        self.table = (table, len(table) - 1)
+        self.count = state["count"]
+        self.bloom_bits = state["bloom_bits"]
+        if state["bloom"] is None:
+            self.bloom = None
+        else:
+            self.bloom = bytearray(state["bloom"])
+
+    def __len__(self):
+        """Return number of keys."""
+        return self.count
+
+    def get_stats(self):
+        """Return dictionary with the number of keys and the memory used
+        by the table and the Bloom filter in bytes."""
+        table = self.table[0]
+        return dict(
+            keys=self.count,
+            slots=len(table),
+            table_bytes=len(table) * table.itemsize,
+            bloom_bytes=len(self.bloom) if self.bloom is not None else 0,
+        )
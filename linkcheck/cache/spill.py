@@ -0,0 +1,188 @@
+# Copyright (C) 2024 LinkChecker Authors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+On-disk store for queued URL records.
+"""
+import json
+import os
+import sqlite3
+import tempfile
+
+from ..checker.urlrecord import UrlRecord
+
+
+class SpillStore:
+    """First-in first-out store of URL records in a temporary SQLite
+    database. Records are written in batches. Not thread-safe, the
+    owning UrlQueue serializes access.
+
+    While snapshots are open, removed records are only marked as
+    removed, so that the snapshots can still read them."""
+
+    def __init__(self, batch_size=1000, directory=None):
+        """Create the temporary database.
+
+        @param batch_size: number of records written or read at once
+        @param directory: directory of the database file, the default
+          temporary directory if None
+        """
+        fd, self.filename = tempfile.mkstemp(
+            prefix="linkchecker-", suffix=".sqlite", dir=directory
+        )
+        os.close(fd)
+        self.conn = sqlite3.connect(self.filename, check_same_thread=False)
+        # the database is thrown away when the program ends
+        self.conn.execute("PRAGMA journal_mode=OFF")
+        self.conn.execute("PRAGMA synchronous=OFF")
+        self.conn.execute(
+            "CREATE TABLE records"
+            " (id INTEGER PRIMARY KEY AUTOINCREMENT, state TEXT NOT NULL)"
+        )
+        self.batch_size = batch_size
+        # serialized records not yet written
+        self.buffer = []
+        # number of records in the database not marked as removed
+        self.stored = 0
+        # id of the last removed record, ids are never reused
+        self.head = 0
+        # number of open snapshots
+        self.snapshots = 0
+        # records do not store the aggregate, it is the same for all
+        self.aggregate = None
+
+    def __len__(self):
+        """Return number of stored records."""
+        return self.stored + len(self.buffer)
+
+    def append(self, record):
+        """Store the record after all others."""
+        self.aggregate = record.aggregate
+        self.buffer.append((json.dumps(record.get_state()),))
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write buffered records to the database."""
+        if not self.buffer:
+            return
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO records (state) VALUES (?)", self.buffer
+            )
+        self.stored += len(self.buffer)
+        self.buffer = []
+
+    def snapshot(self, lock):
+        """Return a snapshot of the stored records, which can be read
+        while the store is changed.
+
+        @param lock: the lock serializing access to this store, acquired
+          when the snapshot is closed
+        @rtype: SpillSnapshot
+        """
+        self.flush()
+        last = self.conn.execute("SELECT MAX(id) FROM records").fetchone()[0]
+        self.snapshots += 1
+        return SpillSnapshot(self, lock, self.head, last or self.head)
+
+    def release(self):
+        """Close a snapshot, and delete the records removed while it was
+        open if it was the last one."""
+        self.snapshots -= 1
+        self._delete()
+
+    def _delete(self):
+        """Delete the removed records unless a snapshot is open."""
+        if not self.snapshots and self.conn is not None:
+            with self.conn:
+                self.conn.execute("DELETE FROM records WHERE id <= ?", (self.head,))
+
+    def popmany(self, num):
+        """Remove and return up to num of the oldest records."""
+        if self.stored:
+            rows = self.conn.execute(
+                "SELECT id, state FROM records WHERE id > ? ORDER BY id LIMIT ?",
+                (self.head, num),
+            ).fetchall()
+            self.head = rows[-1][0]
+            self._delete()
+            self.stored -= len(rows)
+            states = [row[1] for row in rows]
+        else:
+            states = [row[0] for row in self.buffer[:num]]
+            del self.buffer[:num]
+        return [
+            UrlRecord.from_state(json.loads(state), self.aggregate)
+            for state in states
+        ]
+
+    def clear(self):
+        """Remove all records."""
+        if self.stored:
+            self.head = self.conn.execute("SELECT MAX(id) FROM records").fetchone()[0]
+            self._delete()
+            self.stored = 0
+        self.buffer = []
+
+    def close(self):
+        """Close and remove the database."""
+        self.conn.close()
+        self.conn = None
+        try:
+            os.remove(self.filename)
+        except OSError:
+            pass
+
+
+class SpillSnapshot:
+    """The records of a SpillStore at one point in time. They are read
+    in batches with a separate database connection, without the lock of
+    the store, so that the store can be used meanwhile."""
+
+    def __init__(self, store, lock, head, last):
+        """Store the range of record ids of the snapshot."""
+        self.store = store
+        self.lock = lock
+        self.head = head
+        self.last = last
+        self.closed = False
+
+    def __iter__(self):
+        """Yield the stored data of the records in lists of up to the
+        batch size of the store, see UrlRecord.get_state()."""
+        conn = sqlite3.connect(self.store.filename)
+        try:
+            head = self.head
+            while True:
+                rows = conn.execute(
+                    "SELECT id, state FROM records WHERE id > ? AND id <= ?"
+                    " ORDER BY id LIMIT ?",
+                    (head, self.last, self.store.batch_size),
+                ).fetchall()
+                if not rows:
+                    break
+                head = rows[-1][0]
+                yield [json.loads(row[1]) for row in rows]
+        finally:
+            conn.close()
+
+    def close(self):
+        """Release the snapshot, so that the store deletes the records
+        removed meanwhile."""
+        if not self.closed:
+            self.closed = True
+            with self.lock:
+                self.store.release()
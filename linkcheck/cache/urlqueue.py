@@ -18,8 +18,12 @@ Handle a queue of URLs to check.
 """
 import threading
 import collections
+import heapq
+import itertools
 from time import time as _time
 from .. import log, LOG_CACHE
+from ..checker.urlrecord import UrlRecord
+from .spill import SpillStore
 
 
 class Timeout(Exception):
@@ -34,18 +38,127 @@ class Empty(Exception):
     pass
 
 
-NUM_PUTS_CLEANUP = 10000
+def get_host(url_data):
+    """Return the host contacted when checking the given URL, or None
+    if checking it needs no per-host politeness delay."""
+    if getattr(url_data, "scheme", None) not in ("http", "https"):
+        return None
+    return url_data.urlparts[1]
+
+
+class HostFrontier:
+    """Per-host sub-queues of URLs together with an index of the time
+    each host may be contacted next, so that URLs of hosts that are
+    ready are handed out first. Not thread-safe, the owning UrlQueue
+    serializes access."""
+
+    def __init__(self, host_scheduler):
+        """Initialize the sub-queues and the ready-time index."""
+        self.host_scheduler = host_scheduler
+        # mapping {host -> deque of URLs}
+        self.queues = {}
+        # heap of (ready time, sequence number, host) with one entry
+        # per host in self.queues; ready times are only lower bounds
+        # and corrected lazily
+        self.ready = []
+        self.counter = itertools.count()
+        self.size = 0
+
+    def __len__(self):
+        """Return number of queued URLs."""
+        return self.size
+
+    def __iter__(self):
+        """Iterate over all queued URLs."""
+        for queue in self.queues.values():
+            yield from queue
+
+    def _push_host(self, host, ready_time):
+        """Add host to the ready-time index."""
+        heapq.heappush(self.ready, (ready_time, next(self.counter), host))
+
+    def append(self, url_data):
+        """Add URL at the end of its host sub-queue."""
+        host = get_host(url_data)
+        queue = self.queues.get(host)
+        if queue is None:
+            queue = self.queues[host] = collections.deque()
+            self._push_host(host, self.host_scheduler.get_due_time(host))
+        queue.append(url_data)
+        self.size += 1
+
+    def clear(self):
+        """Remove all URLs."""
+        self.queues.clear()
+        self.ready = []
+        self.size = 0
+
+    def get_delay(self, now):
+        """Return number of seconds until a queued URL can be handed out.
+        The queue must not be empty."""
+        while True:
+            ready_time, dummy, host = self.ready[0]
+            if host is None:
+                return 0.0
+            due_time = self.host_scheduler.get_due_time(host)
+            if due_time <= ready_time:
+                return max(0.0, ready_time - now)
+            # another thread reserved a slot since the host was indexed
+            heapq.heapreplace(self.ready, (due_time, next(self.counter), host))
+
+    def popleft(self):
+        """Remove and return the URL of the host that is ready first."""
+        ready_time, dummy, host = heapq.heappop(self.ready)
+        queue = self.queues[host]
+        url_data = queue.popleft()
+        self.size -= 1
+        if queue:
+            if host is not None:
+                # the consumer reserves the next slot of this host
+                wait_time_min = self.host_scheduler.get_wait_times(host)[0]
+                ready_time = max(_time(), ready_time) + wait_time_min
+            self._push_host(host, ready_time)
+        else:
+            del self.queues[host]
+        return url_data
 
 
 class UrlQueue:
     """A queue supporting several consumer tasks. The task_done() idea is
-    from the Python 2.5 implementation of Queue.Queue()."""
+    from the Python 2.5 implementation of Queue.Queue().
+
+    URLs are kept in two tiers: a fast lane of URLs that need no network
+    access (URLs with a result, or URLs whose result got cached while
+    they were queued) which is always served first, and the frontier of
+    URLs still to be checked. An index of the frontier by cache key
+    allows moving a URL to the fast lane in constant time.
 
-    def __init__(self, max_allowed_urls=None):
-        """Initialize the queue state and task counters."""
+    With a memory limit, URL records exceeding the limit are spilled to
+    an on-disk store and moved back to the frontier when it runs empty.
+    put() never blocks either way."""
+
+    def __init__(self, max_allowed_urls=None, host_scheduler=None, max_memory=0):
+        """Initialize the queue state and task counters.
+        If a host scheduler is given, get() prefers URLs whose host
+        can be contacted immediately. If max_memory is positive, at
+        most this many URL records are kept in the frontier, the others
+        are stored on disk."""
         # Note: don't put a maximum size on the queue since it would
         # lead to deadlocks when all worker threads called put().
-        self.queue = collections.deque()
+        self.fast = collections.deque()
+        if host_scheduler is None:
+            self.queue = collections.deque()
+        else:
+            self.queue = HostFrontier(host_scheduler)
+        # mapping {cache key -> URL} of URLs waiting in self.queue;
+        # URLs moved to the fast lane are left in self.queue and
+        # skipped when they come up
+        self.pending = {}
+        self.max_memory = max_memory
+        # on-disk store of URL records, created when first needed
+        self.spill = None
+        # mapping {id -> URL} of URLs handed out by get() and not done yet
+        self.active = {}
         # mutex must be held whenever the queue is mutating.  All methods
         # that acquire mutex must release it before returning.  mutex
         # is shared between the two conditions, so acquiring and
@@ -54,6 +167,9 @@ class UrlQueue:
         # Notify not_empty whenever an item is added to the queue; a
         # thread waiting to get is notified then.
         self.not_empty = threading.Condition(self.mutex)
+        # Notify not_full whenever an item is removed from the queue; a
+        # producer waiting for free space is notified then.
+        self.not_full = threading.Condition(self.mutex)
         self.all_tasks_done = threading.Condition(self.mutex)
         self.unfinished_tasks = 0
         self.finished_tasks = 0
@@ -66,12 +182,19 @@ class UrlQueue:
                 "Non-positive number of allowed URLs: %d" % max_allowed_urls
             )
         self.max_allowed_urls = max_allowed_urls
-        self.num_puts = 0
 
     def qsize(self):
         """Return the approximate size of the queue (not reliable!)."""
         with self.mutex:
-            return len(self.queue)
+            return self._qsize()
+
+    def _qsize(self):
+        """Return the number of queued URLs. Not thread-safe!"""
+        return len(self.fast) + len(self.pending) + self._spilled()
+
+    def _spilled(self):
+        """Return the number of URLs stored on disk. Not thread-safe!"""
+        return len(self.spill) if self.spill is not None else 0
 
     def empty(self):
         """Return True if the queue is empty, False otherwise.
@@ -83,32 +206,155 @@ class UrlQueue:
     def _empty(self):
         """Return True if the queue is empty, False otherwise.
         Not thread-safe!"""
-        return not self.queue
+        return not (self.fast or self.pending or self._spilled())
 
     def get(self, timeout=None):
         """Get first not-in-progress url from the queue and
         return it. If no such url is available return None.
+        Queued records are turned into URL data here, outside of
+        the queue lock. If the queue is shut down meanwhile, the task
+        is done and None is returned.
         """
         with self.not_empty:
-            return self._get(timeout)
+            url_data = self._get(timeout)
+            self.not_full.notify()
+        if isinstance(url_data, UrlRecord):
+            record = url_data
+            url_data = self._materialize(record)
+            if url_data is not None:
+                with self.mutex:
+                    # do_shutdown() may have removed the record already
+                    self.active.pop(id(record), None)
+                    if not self.shutdown:
+                        self.active[id(url_data)] = url_data
+                        return url_data
+                self.task_done(record)
+                return None
+        return url_data
+
+    def _materialize(self, record):
+        """Create the URL data of a record taken from the queue.
+        The record was de-duplicated by its cheap key; if the normed
+        URL has already been seen, the task is done and None is
+        returned. The normed URL is checked and marked as seen in one
+        step, so that of several spellings of one URL that are taken
+        from the queue at the same time only one is checked."""
+        try:
+            url_data = record.to_url_data()
+        except Exception:
+            self.task_done(record)
+            raise
+        key = url_data.cache_url
+        if key is not None and key != record.cache_url:
+            cache = url_data.aggregate.result_cache
+            if not cache.add_seen(key):
+                log.debug(
+                    LOG_CACHE, "skipping %s, %s already cached", url_data.url, key)
+                with self.mutex:
+                    if self.max_allowed_urls is not None:
+                        self.max_allowed_urls += 1
+                self.task_done(record)
+                return None
+        return url_data
 
     def _get(self, timeout):
         """Non thread-safe utility function of self.get() doing the real
         work."""
-        if timeout is None:
-            while self._empty():
-                self.not_empty.wait()
-        else:
+        if timeout is not None:
             if timeout < 0:
                 raise ValueError("'timeout' must be a positive number")
             endtime = _time() + timeout
-            while self._empty():
+        while True:
+            if not self.pending and self._spilled():
+                self._refill()
+            if self._empty():
+                delay = None
+            else:
+                delay = self._get_delay()
+                if delay <= 0.0:
+                    url_data = self._popleft()
+                    if url_data is not None:
+                        break
+                    continue
+            if timeout is not None:
                 remaining = endtime - _time()
                 if remaining <= 0.0:
                     raise Empty()
-                self.not_empty.wait(remaining)
+                if delay is None or remaining < delay:
+                    delay = remaining
+            self.not_empty.wait(delay)
         self.in_progress += 1
-        return self.queue.popleft()
+        self.active[id(url_data)] = url_data
+        return url_data
+
+    def _popleft(self):
+        """Remove and return the next URL, the queue must not be empty.
+        Returns None if the removed frontier entry has already been moved
+        to the fast lane. Not thread-safe!"""
+        if self.fast:
+            return self.fast.popleft()
+        url_data = self.queue.popleft()
+        if self.pending.pop(url_data.cache_url, None) is None:
+            return None
+        return url_data
+
+    def _refill(self):
+        """Move URL records from the on-disk store to the frontier.
+        Not thread-safe!"""
+        # only stale entries of promoted URLs are left in the frontier
+        self.queue.clear()
+        for record in self.spill.popmany(max(1, self.max_memory // 2)):
+            self.queue.append(record)
+            self.pending[record.cache_url] = record
+        log.debug(LOG_CACHE, "refilled %d URLs from disk", len(self.pending))
+
+    def _spill_record(self, url_data):
+        """Check if the URL record should be stored on disk. To keep
+        the queue order, all records go to disk while it is not empty.
+        Not thread-safe!"""
+        if not (self.max_memory and isinstance(url_data, UrlRecord)):
+            return False
+        if self._spilled():
+            return True
+        if len(self.pending) < self.max_memory:
+            return False
+        if self.spill is None:
+            self.spill = SpillStore()
+        return True
+
+    def _get_delay(self):
+        """Return number of seconds until the next queued URL can be
+        handed out. Not thread-safe!"""
+        if self.fast:
+            return 0.0
+        if isinstance(self.queue, HostFrontier):
+            return self.queue.get_delay(_time())
+        return 0.0
+
+    def wait_not_full(self, maxsize):
+        """Block until less than maxsize URLs are queued.
+
+        @return: False if the queue has been shut down, else True
+        """
+        with self.not_full:
+            while self._qsize() >= maxsize and not self.shutdown:
+                self.not_full.wait()
+            return not self.shutdown
+
+    def add_producer(self):
+        """Register a task queueing URLs while others are checked.
+        join() waits for the task until producer_done() is called."""
+        with self.mutex:
+            self.unfinished_tasks += 1
+
+    def producer_done(self):
+        """Indicate that a producer task does not queue more URLs."""
+        with self.all_tasks_done:
+            self.unfinished_tasks -= 1
+            if self.unfinished_tasks <= 0:
+                if self.unfinished_tasks < 0:
+                    raise ValueError('producer_done() called too many times')
+                self.all_tasks_done.notify_all()
 
     def put(self, item):
         """Put an item into the queue.
@@ -124,43 +370,63 @@ class UrlQueue:
             return
         key = url_data.cache_url
         cache = url_data.aggregate.result_cache
-        if cache.has_result(key):
+        # check and mark the key in one step, the normed keys of
+        # dequeued records are marked concurrently by _materialize()
+        if key is not None and not cache.add_seen(key):
             log.debug(LOG_CACHE, "skipping %s, %s already cached", url_data.url, key)
             return
         log.debug(LOG_CACHE, "queueing %s", url_data.url)
         if url_data.has_result:
-            self.queue.appendleft(url_data)
+            self.fast.appendleft(url_data)
         else:
             assert key is not None, "no result for None key: %s" % url_data
             if self.max_allowed_urls is not None:
                 self.max_allowed_urls -= 1
-            self.num_puts += 1
-            if self.num_puts >= NUM_PUTS_CLEANUP:
-                self.cleanup()
-            self.queue.append(url_data)
+            if self._spill_record(url_data):
+                self.spill.append(url_data)
+            else:
+                self.queue.append(url_data)
+                self.pending[key] = url_data
         self.unfinished_tasks += 1
-        # add none value to cache to prevent checking this url multiple times
-        cache.add_result(key, None)
-
-    def cleanup(self):
-        """Move cached elements to top."""
-        self.num_puts = 0
-        cached = []
-        for i, url_data in enumerate(self.queue):
-            key = url_data.cache_url
-            cache = url_data.aggregate.result_cache
-            if cache.has_non_empty_result(key):
-                cached.append(i)
-        for pos in cached:
-            self._move_to_top(pos)
-
-    def _move_to_top(self, pos):
-        """Move element at given position to top of queue."""
-        if pos > 0:
-            self.queue.rotate(-pos)
-            item = self.queue.popleft()
-            self.queue.rotate(pos)
-            self.queue.appendleft(item)
+
+    def requeue(self, url_data):
+        """Queue a URL that is being checked again, to check it later.
+        The URL has already been seen, so the duplicate check is skipped.
+        The task of the URL being checked is still done as usual.
+
+        @return: True if the URL has been queued
+        """
+        record = UrlRecord.from_url_data(url_data)
+        record.retries += 1
+        with self.mutex:
+            key = record.cache_url
+            if self.shutdown or key is None or key in self.pending:
+                return False
+            log.debug(LOG_CACHE, "requeueing %s", url_data.url)
+            if self._spill_record(record):
+                self.spill.append(record)
+            else:
+                self.queue.append(record)
+                self.pending[key] = record
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+        return True
+
+    def promote(self, key):
+        """A result for the given cache key is now available. If a URL
+        with this key is waiting in the frontier, move it to the fast
+        lane since checking it only needs a cache lookup. URLs stored on
+        disk are not promoted."""
+        with self.mutex:
+            url_data = self.pending.pop(key, None)
+            if url_data is None:
+                return
+            log.debug(LOG_CACHE, "promoting cached %s", url_data.url)
+            self.fast.append(url_data)
+            if not self.pending:
+                # only promoted URLs are left in the frontier
+                self.queue.clear()
+            self.not_empty.notify()
 
     def task_done(self, url_data):
         """
@@ -179,6 +445,7 @@ class UrlQueue:
         """
         with self.all_tasks_done:
             log.debug(LOG_CACHE, "task_done %s", url_data.url)
+            self.active.pop(id(url_data), None)
             self.finished_tasks += 1
             self.unfinished_tasks -= 1
             self.in_progress -= 1
@@ -213,16 +480,86 @@ class UrlQueue:
     def do_shutdown(self):
         """Shutdown the queue by not accepting any more URLs."""
         with self.mutex:
-            unfinished = self.unfinished_tasks - len(self.queue)
+            unfinished = self.unfinished_tasks - self._qsize()
+            self.fast.clear()
             self.queue.clear()
+            self.pending.clear()
+            if self.spill is not None:
+                self.spill.clear()
+            self.active.clear()
             if unfinished <= 0:
                 if unfinished < 0:
                     raise ValueError('shutdown is in error')
                 self.all_tasks_done.notify_all()
             self.unfinished_tasks = unfinished
             self.shutdown = True
+            self.not_full.notify_all()
+
+    def get_state(self, result_cache):
+        """Return a tuple (state, spilled). The state is a dictionary
+        with the queue counters, the stored data of all URLs in memory
+        and all URLs currently checked, and the state of the given result
+        cache. spilled is None or a SpillSnapshot of the URLs spilled to
+        disk, which must be read and closed by the caller.
+
+        Everything is taken at one point in time, while no URLs can be
+        queued or taken from the queue, so that every seen URL is either
+        queued or has been checked. Only the copies of the in-memory
+        state are made under the queue lock, the snapshot is read
+        without it."""
+        with self.mutex:
+            items = []
+            for url_data in itertools.chain(
+                self.active.values(), self.fast, self.pending.values()
+            ):
+                if not isinstance(url_data, UrlRecord):
+                    url_data = UrlRecord.from_url_data(url_data)
+                items.append(url_data.get_state())
+            state = dict(
+                items=items,
+                finished_tasks=self.finished_tasks,
+                max_allowed_urls=self.max_allowed_urls,
+                results=result_cache.get_state(),
+            )
+            spilled = self.spill.snapshot(self.mutex) if self._spilled() else None
+        return state, spilled
+
+    def restore(self, state, aggregate):
+        """Restore a state returned by get_state() into this queue and
+        the result cache of the aggregate. The URLs are queued even though
+        their cache keys have already been seen."""
+        aggregate.result_cache.restore(state["results"])
+        with self.mutex:
+            self.finished_tasks = state["finished_tasks"]
+            self.max_allowed_urls = state["max_allowed_urls"]
+        self.restore_items(state["items"], aggregate)
+
+    def restore_items(self, items, aggregate):
+        """Queue URLs from their stored data, see UrlRecord.get_state()."""
+        with self.mutex:
+            for item in items:
+                record = UrlRecord.from_state(item, aggregate)
+                key = record.cache_url
+                if key in self.pending:
+                    continue
+                if key is None:
+                    self.fast.append(record)
+                elif self._spill_record(record):
+                    self.spill.append(record)
+                else:
+                    self.queue.append(record)
+                    self.pending[key] = record
+                self.unfinished_tasks += 1
+            self.not_empty.notify_all()
+
+    def close(self):
+        """Remove the on-disk store of URL records."""
+        with self.mutex:
+            if self.spill is not None:
+                self.spill.close()
+                self.spill = None
 
     def status(self):
         """Get tuple (finished tasks, in progress, queue size)."""
         # no need to acquire self.mutex since the numbers are unreliable anyways.
-        return (self.finished_tasks, self.in_progress, len(self.queue))
+        return (self.finished_tasks, self.in_progress, self._qsize())
@@ -135,7 +135,7 @@ def get_url_from(
                 klass == fileurl.FileUrl:
             klass = fileurl.AnchorCheckFileUrl
     log.debug(LOG_CHECK, "%s handles url %s", klass.__name__, base_url)
-    return klass(
+    url_data = klass(
         base_url,
         recursion_level,
         aggregate,
@@ -148,6 +148,9 @@ def get_url_from(
         extern=extern,
         url_encoding=url_encoding,
     )
+    # kept to create the URL data again from a record
+    url_data.parent_content_type = parent_content_type
+    return url_data
 
 
 def get_urlclass_from(scheme, assume_local_file=False):
@@ -175,25 +178,37 @@ def get_urlclass_from(scheme, assume_local_file=False):
     return klass
 
 
-def get_index_html(urls):
+def get_index_urls(entries):
     """
-    Construct artificial index.html from given URLs.
+    Get the URLs of directory entries.
 
-    @param urls: URL strings
-    @type urls: iterator of string
+    @param entries: file names, directory names with a trailing slash
+    @type entries: iterator of string
+    @return: URL and name of the entries
+    @rtype: iterator of tuple (string, string)
     """
-    lines = ["<html>", "<body>"]
-    for entry in urls:
-        name = html.escape(entry)
+    for entry in entries:
         try:
-            url = html.escape(urllib.parse.quote(entry))
+            url = urllib.parse.quote(entry)
         except UnicodeEncodeError:
             log.warn(LOG_CHECK, "Unable to convert entry to Unicode")
             continue
         except KeyError:
             # Some unicode entries raise KeyError.
-            url = name
-        lines.append(f'<a href="{url}">{name}</a>')
+            url = entry
+        yield url, entry
+
+
+def get_index_html(urls):
+    """
+    Construct artificial index.html from given URLs.
+
+    @param urls: URL strings
+    @type urls: iterator of string
+    """
+    lines = ["<html>", "<body>"]
+    for url, name in get_index_urls(urls):
+        lines.append(f'<a href="{html.escape(url)}">{html.escape(name)}</a>')
     lines.extend(["</body>", "</html>"])
     return os.linesep.join(lines).encode()
 
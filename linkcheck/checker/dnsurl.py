@@ -20,6 +20,7 @@ Handler for dns: links.
 import socket
 
 from . import urlbase
+from ..network import dnscache
 
 
 class DnsUrl(urlbase.UrlBase):
@@ -39,7 +40,7 @@ class DnsUrl(urlbase.UrlBase):
     def check_connection(self):
         """Resolve hostname."""
         host = self.urlparts[1]
-        addresses = socket.getaddrinfo(host, 80, 0, 0, socket.SOL_TCP)
+        addresses = dnscache.getaddrinfo(host, 80, 0, 0, socket.SOL_TCP)
         args = {'host': host}
         if addresses:
             args['ips'] = [x[4][0] for x in addresses]
@@ -19,6 +19,7 @@ Handle local file: links.
 
 import re
 import os
+import stat
 import urllib.parse
 import urllib.request
 from datetime import datetime, timezone
@@ -32,15 +33,16 @@ from .const import (WARN_FILE_MISSING_SLASH, WARN_FILE_SYSTEM_PATH,
 
 def get_files(dirname):
     """Get iterator of entries in directory. Only allows regular files
-    and directories, no symlinks."""
-    for entry in os.listdir(dirname):
-        fullentry = os.path.join(dirname, entry)
-        if os.path.islink(fullentry):
-            continue
-        if os.path.isfile(fullentry):
-            yield entry
-        elif os.path.isdir(fullentry):
-            yield entry + "/"
+    and directories, no symlinks. The type of the entries is known from
+    reading the directory on most systems, so no file status is read."""
+    with os.scandir(dirname) as entries:
+        for entry in entries:
+            if entry.is_symlink():
+                continue
+            if entry.is_file(follow_symlinks=False):
+                yield entry.name
+            elif entry.is_dir(follow_symlinks=False):
+                yield entry.name + "/"
 
 
 def prepare_urlpath_for_nt(path):
@@ -123,6 +125,12 @@ class FileUrl(urlbase.UrlBase):
         )
         self.scheme = 'file'
 
+    def reset(self):
+        """Initialize the cached file status."""
+        super().reset()
+        # tuple (filename, file status or None, is symbolic link)
+        self.file_stat = None
+
     def build_base_url(self):
         """The URL is normed according to the platform:
          - the base URL is made an absolute *file://* URL
@@ -183,10 +191,14 @@ class FileUrl(urlbase.UrlBase):
             # Directory size always differs from the customer index.html
             # that is generated. So return without calculating any size.
             return
-        filename = self.get_os_filename()
-        self.size = fileutil.get_size(filename)
-        self.modified = datetime.fromtimestamp(
-            fileutil.get_mtime(filename), tz=timezone.utc)
+        st = self.get_stat()[0]
+        if st is None:
+            self.size = -1
+            mtime = 0
+        else:
+            self.size = st.st_size
+            mtime = st.st_mtime
+        self.modified = datetime.fromtimestamp(mtime, tz=timezone.utc)
 
     def check_connection(self):
         """
@@ -231,11 +243,17 @@ class FileUrl(urlbase.UrlBase):
         """Return file content, or in case of directories a dummy HTML file
         with links to the files."""
         if self.is_directory():
-            data = get_index_html(get_files(self.get_os_filename()))
+            data = get_index_html(self.get_directory_entries())
         else:
             data = super().read_content()
         return data
 
+    def read_content_prefix(self):
+        """Return the first bytes of the file without reading it."""
+        if self.url_connection is None or self.is_directory():
+            return super().read_content_prefix()
+        return self.url_connection.peek(self.ContentPrefixBytes)
+
     def get_os_filename(self):
         """
         Construct os specific file path out of the *file://* URL.
@@ -249,6 +267,24 @@ class FileUrl(urlbase.UrlBase):
         """Get filename for content to parse."""
         return self.get_os_filename()
 
+    def get_stat(self):
+        """Return tuple (file status, is symbolic link), with the status
+        of the link target or None if it does not exist. The status is
+        only read once, checking a file needs it several times."""
+        filename = self.get_os_filename()
+        if self.file_stat is None or self.file_stat[0] != filename:
+            st = None
+            is_link = False
+            try:
+                st = os.lstat(filename)
+                if stat.S_ISLNK(st.st_mode):
+                    is_link = True
+                    st = os.stat(filename)
+            except OSError:
+                st = None
+            self.file_stat = (filename, st, is_link)
+        return self.file_stat[1:]
+
     def is_directory(self):
         """
         Check if file is a directory.
@@ -256,8 +292,13 @@ class FileUrl(urlbase.UrlBase):
         @return: True iff file is a directory
         @rtype: bool
         """
-        filename = self.get_os_filename()
-        return os.path.isdir(filename) and not os.path.islink(filename)
+        st, is_link = self.get_stat()
+        return st is not None and not is_link and stat.S_ISDIR(st.st_mode)
+
+    def get_directory_entries(self):
+        """Return iterator of the files and directories, with a trailing
+        slash, of this directory."""
+        return get_files(self.get_os_filename())
 
     def is_parseable(self):
         """Check if content is parseable for recursion.
@@ -275,7 +316,9 @@ class FileUrl(urlbase.UrlBase):
         """Set URL content type, or an empty string if content
         type could not be found."""
         if self.url:
-            self.content_type = mimeutil.guess_mimetype(self.url, read=self.get_content)
+            self.content_type = mimeutil.guess_mimetype(
+                self.url, read=self.get_content_prefix
+            )
         else:
             self.content_type = ""
         log.debug(LOG_CHECK, "MIME type: %s", self.content_type)
@@ -375,7 +418,7 @@ class AnchorCheckFileUrl(FileUrl):
         type could not be found."""
         if self.url:
             self.content_type = mimeutil.guess_mimetype(
-                self.url_without_anchor, read=self.get_content)
+                self.url_without_anchor, read=self.get_content_prefix)
         else:
             self.content_type = ""
         log.debug(LOG_CHECK, "MIME type: %s", self.content_type)
@@ -40,6 +40,8 @@ class FtpUrl(internpaturl.InternPatternUrl):
         # last part of URL filename
         self.filename = None
         self.filename_encoding = 'iso-8859-1'
+        # data connection of a started file download
+        self.data_connection = None
 
     def check_connection(self):
         """
@@ -54,6 +56,7 @@ class FtpUrl(internpaturl.InternPatternUrl):
 
     def login(self):
         """Log into ftp server and check the welcome message."""
+        self.acquire_connection_slot()
         self.url_connection = ftplib.FTP(timeout=self.aggregate.config["timeout"])
         if log.is_debug(LOG_CHECK):
             self.url_connection.set_debuglevel(1)
@@ -150,6 +153,13 @@ class FtpUrl(internpaturl.InternPatternUrl):
         self.url_connection.dir(add_entry)
         return files
 
+    def get_directory_entries(self):
+        """Return list of the files and directories, with a trailing
+        slash, of this directory."""
+        self.url_connection.cwd(self.filename)
+        self.files = self.get_files()
+        return self.files
+
     def is_parseable(self):
         """See if URL target is parseable for recursion."""
         if self.is_directory():
@@ -165,39 +175,54 @@ class FtpUrl(internpaturl.InternPatternUrl):
     def set_content_type(self):
         """Set URL content type, or an empty string if content
         type could not be found."""
-        self.content_type = mimeutil.guess_mimetype(self.url, read=self.get_content)
+        self.content_type = mimeutil.guess_mimetype(
+            self.url, read=self.get_content_prefix
+        )
         log.debug(LOG_CHECK, "MIME type: %s", self.content_type)
 
+    def read_content_prefix(self):
+        """Start the file download and return the first chunk, which is
+        kept for read_content()."""
+        if self.is_directory():
+            return super().read_content_prefix()
+        if self.content_prefix is None:
+            # download file in BINARY mode
+            self.url_connection.voidcmd("TYPE I")
+            self.data_connection = self.url_connection.transfercmd(
+                f"RETR {self.filename}"
+            )
+            self.content_prefix = self.data_connection.recv(self.ReadChunkBytes)
+        return self.content_prefix
+
     def read_content(self):
         """Return URL target content, or in case of directories a dummy HTML
         file with links to the files."""
         if self.is_directory():
-            self.url_connection.cwd(self.filename)
-            self.files = self.get_files()
             # XXX limit number of files?
-            data = get_index_html(self.files)
-        else:
-            # download file in BINARY mode
-            ftpcmd = f"RETR {self.filename}"
-            buf = BytesIO()
-
-            def stor_data(s):
-                """Helper method storing given data"""
-                # limit the download size
-                if (buf.tell() + len(s)) > self.aggregate.config["maxfilesizedownload"]:
-                    raise LinkCheckerError(_("FTP file size too large"))
-                buf.write(s)
-
-            self.url_connection.retrbinary(ftpcmd, stor_data)
-            data = buf.getvalue()
-            buf.close()
-        return data
+            return get_index_html(self.get_directory_entries())
+        buf = BytesIO()
+        data = self.read_content_prefix()
+        while data:
+            # limit the download size
+            if buf.tell() + len(data) > self.aggregate.config["maxfilesizedownload"]:
+                raise LinkCheckerError(_("FTP file size too large"))
+            buf.write(data)
+            data = self.data_connection.recv(self.ReadChunkBytes)
+        self.data_connection.close()
+        self.data_connection = None
+        self.url_connection.voidresp()
+        return buf.getvalue()
 
     def close_connection(self):
         """Release the open connection from the connection pool."""
+        if self.data_connection is not None:
+            # the download has not been finished
+            self.data_connection.close()
+            self.data_connection = None
         if self.url_connection is not None:
             try:
                 self.url_connection.quit()
             except Exception:
-                pass
+                self.url_connection.close()
             self.url_connection = None
+        self.release_connection_slot()
@@ -30,8 +30,9 @@ warnings.simplefilter(
     'ignore', requests.packages.urllib3.exceptions.InsecureRequestWarning
 )
 
+import itertools
+import urllib.parse
 from io import BytesIO
-import re
 
 from .. import (
     log,
@@ -41,6 +42,7 @@ from .. import (
     LinkCheckerError,
     httputil,
 )
+from ..htmlutil import linkparse
 from . import internpaturl
 
 # import warnings
@@ -49,8 +51,15 @@ from requests.sessions import REDIRECT_STATI
 
 HTTP_SCHEMAS = ('http://', 'https://')
 
-# match for robots meta element content attribute
-nofollow_re = re.compile(r"\bnofollow\b", re.IGNORECASE)
+# status codes of overloaded or rate limiting servers
+RETRY_STATI = (429, 503)
+
+# maximum number of seconds of a Retry-After header that is honoured
+MAX_RETRY_AFTER = 300
+
+# status codes of HEAD requests that are retried with GET, since servers
+# answer them if they do not support or mishandle HEAD requests
+HEAD_FAILED_STATI = (400, 403, 405, 501)
 
 
 class HttpUrl(internpaturl.InternPatternUrl):
@@ -69,6 +78,16 @@ class HttpUrl(internpaturl.InternPatternUrl):
         self.auth = None
         self.ssl_cipher = None
         self.ssl_cert = None
+        # page data stored by a previous incremental check
+        self.stored_page = None
+        # links added while checking, recorded for incremental checks
+        self.outlinks = None
+        # the server answered a conditional request with 304
+        self.not_modified = False
+        # send GET even if the content is not needed
+        self.force_get = False
+        # iterator of the content chunks of the response
+        self.content_chunks = None
 
     def allows_robots(self, url):
         """
@@ -94,8 +113,7 @@ class HttpUrl(internpaturl.InternPatternUrl):
         if not self.is_html():
             return True
 
-        soup = self.get_soup()
-        return not soup.find("meta", attrs={"name": "robots", "content": nofollow_re})
+        return self.get_document().allows_robots()
 
     def add_size_info(self):
         """Get size of URL content from HTTP header."""
@@ -139,34 +157,222 @@ class HttpUrl(internpaturl.InternPatternUrl):
             self.set_result(_("syntax OK"))
             self.do_check_content = False
             return
-        # check the http connection
+        host = self.urlparts[1]
+        if not self.aggregate.circuit_breaker.allow(host):
+            self.set_result(
+                _(
+                    "Not checked: host %(host)s is unreachable after"
+                    " %(num)d consecutive connection failures."
+                )
+                % {
+                    "host": host,
+                    "num": self.aggregate.config["maxhostfailures"],
+                },
+                valid=False,
+            )
+            self.do_check_content = False
+            return
+        try:
+            self.check_http_connection()
+        finally:
+            # the request of a probe can fail before it is sent
+            self.aggregate.circuit_breaker.end_probe(host)
+        if self.retry_later():
+            return
+        self.check_response()
+        if self.allows_simple_recursion():
+            self.parse_header_links()
+
+    def check_http_connection(self):
+        """Send the request and follow redirections. If the server does
+        not allow HEAD requests, a GET request is sent."""
         request = self.build_request()
         self.send_request(request)
         self._add_response_info()
         self.follow_redirections(request)
-        self.check_response()
-        if self.allows_simple_recursion():
-            self.parse_header_links()
+        if request.method == "HEAD" and self.head_failed():
+            request = self.build_request()
+            self.send_request(request)
+            self._add_response_info()
+            self.follow_redirections(request)
+
+    def retry_later(self):
+        """Queue the URL again if the server is overloaded or limits the
+        request rate, unless it asks to wait too long or the URL has
+        been retried too often. The host has already been backed off.
+
+        @return: True if the URL has been queued again
+        @rtype: bool
+        """
+        status = self.url_connection.status_code
+        if (
+            status not in RETRY_STATI
+            or self.retries >= self.aggregate.config["maxhttpretries"]
+        ):
+            return False
+        retry_after = httputil.get_retry_after(self.headers)
+        if retry_after is None:
+            if status == 503:
+                # probably not a temporary condition
+                return False
+        elif retry_after > MAX_RETRY_AFTER:
+            return False
+        log.debug(LOG_CHECK, "Retry %s later after status %d", self.url, status)
+        self.requeued = self.aggregate.urlqueue.requeue(self)
+        return self.requeued
 
     def build_request(self):
         """Build a prepared request object."""
         clientheaders = {}
         if self.parent_url and self.parent_url.lower().startswith(HTTP_SCHEMAS):
             clientheaders["Referer"] = self.parent_url
-        kwargs = dict(method='GET', url=self.url, headers=clientheaders)
+        if self.is_incremental():
+            self.add_conditional_headers(clientheaders)
+        method = 'HEAD' if self.use_head() else 'GET'
+        kwargs = dict(method=method, url=self.url, headers=clientheaders)
         if self.auth:
             kwargs['auth'] = self.auth
         log.debug(LOG_CHECK, "Prepare request with %s", kwargs)
         request = requests.Request(**kwargs)
         return self.session.prepare_request(request)
 
+    def use_head(self):
+        """Check if a HEAD request is sufficient, because the content
+        is neither parsed nor checked by content plugins."""
+        if (
+            self.force_get
+            or not self.aggregate.config["headrequests"]
+            or self.aggregate.plugin_manager.content_plugins
+            or self.urlparts[1] in self.aggregate.no_head_hosts
+        ):
+            return False
+        return not self.allows_simple_recursion() or self.is_leaf_path()
+
+    def is_leaf_path(self):
+        """Check if the file extension of the URL path indicates a
+        content type that is never parsed, for example images."""
+        mime = mimeutil.guess_mimetype(self.urlparts[2])
+        return not (
+            mime == "application/octet-stream"
+            or mime in self.ContentMimetypes
+            or mime.startswith("text/")
+            or "xml" in mime
+        )
+
+    def head_failed(self):
+        """Check if a HEAD request got an error status that a GET
+        request might not get, because the server does not support or
+        mishandles HEAD requests. Other errors like 404 are final, so
+        broken links need only one request. Hosts answering that the
+        method is not allowed or not implemented get GET requests from
+        now on."""
+        status = self.url_connection.status_code
+        if status not in HEAD_FAILED_STATI:
+            return False
+        if status in (405, 501):
+            self.aggregate.no_head_hosts.add(self.urlparts[1])
+        log.debug(LOG_CHECK, "HEAD failed with %d, retrying with GET", status)
+        self.close_connection()
+        self.force_get = True
+        return True
+
+    def is_incremental(self):
+        """Check if the links of this page are stored for incremental
+        checks. URLs with an anchor are always fetched so that anchors
+        can be checked."""
+        return (
+            self.aggregate.config["incremental"]
+            and not self.anchor
+            and self.allows_simple_recursion()
+        )
+
+    def add_conditional_headers(self, clientheaders):
+        """Start recording links and add the validators of the stored
+        page data to the request headers."""
+        self.outlinks = []
+        self.stored_page = self.aggregate.result_cache.get_page(self.cache_url)
+        if self.stored_page is None:
+            return
+        if self.stored_page["etag"]:
+            clientheaders["If-None-Match"] = self.stored_page["etag"]
+        if self.stored_page["last_modified"]:
+            clientheaders["If-Modified-Since"] = self.stored_page["last_modified"]
+
+    def save_outlinks(self):
+        """Store validators and links of a parsed page for the next
+        incremental check."""
+        if self.outlinks is None or self.aliases:
+            return
+        etag = self.headers.get("ETag")
+        last_modified = self.headers.get("Last-Modified")
+        if not (etag or last_modified):
+            return
+        page = dict(
+            etag=etag,
+            last_modified=last_modified,
+            content_type=self.content_type,
+            links=self.outlinks,
+        )
+        self.aggregate.result_cache.add_page(self.cache_url, page)
+
+    def add_url(self, url, line=0, column=0, page=0, name="", base=None, parent=None):
+        """Record the link for incremental checks and add it to the queue."""
+        if self.outlinks is not None:
+            self.outlinks.append((url, line, column, page, name, base, parent))
+        super().add_url(
+            url, line=line, column=column, page=page, name=name, base=base,
+            parent=parent,
+        )
+
+    def check_content(self):
+        """Queue the stored links of a page that has not been modified
+        instead of downloading it, and keep the stored page for the next
+        incremental check."""
+        if not self.not_modified:
+            return super().check_content()
+        self.aggregate.result_cache.touch_page(self.cache_url)
+        links = self.stored_page["links"]
+        self.add_info(
+            _("Not modified since the last check, queueing %d stored links.")
+            % len(links)
+        )
+        for url, line, column, page, name, base, parent in links:
+            self.add_url(
+                url, line=line, column=column, page=page, name=name, base=base,
+                parent=parent,
+            )
+        return False
+
     def send_request(self, request):
         """Send request and store response in self.url_connection."""
         # throttle the number of requests to each host
         self.aggregate.wait_for_host(self.urlparts[1])
+        # limit the number of open connections
+        self.acquire_connection_slot()
         kwargs = self.get_request_kwargs()
         kwargs["allow_redirects"] = False
-        self._send_request(request, **kwargs)
+        circuit_breaker = self.aggregate.circuit_breaker
+        # only connection results count for the circuit breaker, other
+        # errors like invalid requests are not counted
+        try:
+            self._send_request(request, **kwargs)
+        except requests.exceptions.SSLError:
+            # the host answered
+            circuit_breaker.add_success(self.urlparts[1])
+            raise
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            circuit_breaker.add_failure(self.urlparts[1])
+            raise
+        circuit_breaker.add_success(self.urlparts[1])
+        # adapt the request rate of the host
+        if self.url_connection.status_code in RETRY_STATI:
+            self.aggregate.back_off_host(
+                self.urlparts[1], httputil.get_retry_after(self.headers)
+            )
+        else:
+            self.aggregate.add_host_latency(
+                self.urlparts[1], self.url_connection.elapsed.total_seconds()
+            )
 
     def _send_request(self, request, **kwargs):
         """Send GET request."""
@@ -263,9 +469,29 @@ class HttpUrl(internpaturl.InternPatternUrl):
         return kwargs
 
     def get_redirects(self, request):
-        """Return iterator of redirects for given request."""
+        """Return iterator of redirects for given request. Before each
+        redirect is requested, the connection slot is changed to the
+        scheme of the redirect location."""
         kwargs = self.get_request_kwargs()
-        return self.session.resolve_redirects(self.url_connection, request, **kwargs)
+        redirects = self.session.resolve_redirects(
+            self.url_connection, request, **kwargs
+        )
+        while True:
+            self.acquire_connection_slot(self.get_redirect_scheme())
+            try:
+                response = next(redirects)
+            except StopIteration:
+                return
+            yield response
+
+    def get_redirect_scheme(self):
+        """Return the scheme of the location the current response
+        redirects to, or the current scheme if it is no redirect."""
+        location = self.session.get_redirect_target(self.url_connection)
+        if location is None:
+            return self.scheme
+        url = urllib.parse.urljoin(self.url_connection.url, location)
+        return urllib.parse.urlsplit(url).scheme.lower() or self.scheme
 
     def follow_redirections(self, request):
         """Follow all redirections of http response."""
@@ -320,6 +546,13 @@ class HttpUrl(internpaturl.InternPatternUrl):
                     self.url_connection.reason, tag=WARN_HTTP_EMPTY_CONTENT
                 )
 
+            if self.url_connection.status_code == 304 and self.stored_page:
+                self.not_modified = True
+                if self.stored_page["content_type"]:
+                    # a 304 response has no content type
+                    self.headers = self.headers.copy()
+                    self.headers["Content-Type"] = self.stored_page["content_type"]
+
             if self.url_connection.status_code == 429:
                 self.add_warning(
                     "Rate limited (Retry-After: %s)"
@@ -338,17 +571,86 @@ class HttpUrl(internpaturl.InternPatternUrl):
     def get_content(self):
         return super().get_content(self.content_encoding)
 
+    def get_content_chunks(self):
+        """Return iterator of the content chunks of the response. If the
+        content has not been requested, a GET request is sent."""
+        if self.content_chunks is None:
+            if self.url_connection.request.method == "HEAD":
+                # the content is needed after all
+                self.close_connection()
+                self.force_get = True
+                self.send_request(self.build_request())
+            self.content_chunks = self.url_connection.iter_content(
+                chunk_size=self.ReadChunkBytes
+            )
+        return self.content_chunks
+
+    def read_content_prefix(self):
+        """Return the first chunk of the content, which is kept for
+        read_content()."""
+        if self.content_prefix is None:
+            self.content_prefix = next(self.get_content_chunks(), b"")
+        return self.content_prefix
+
     def read_content(self):
         """Return data and data size for this URL.
+        HTML content is parsed chunk by chunk as it is read, in this
+        thread. The whole content is still returned, since content
+        plugins need it.
         Can be overridden in subclasses."""
+        chunks = self.get_content_chunks()
+        if self.content_prefix:
+            chunks = itertools.chain((self.content_prefix,), chunks)
         maxbytes = self.aggregate.config["maxfilesizedownload"]
+        maxparse = self.aggregate.config["maxfilesizeparse"]
+        feed = self.get_document_feed()
         buf = BytesIO()
-        for data in self.url_connection.iter_content(chunk_size=self.ReadChunkBytes):
+        for data in chunks:
             if buf.tell() + len(data) > maxbytes:
                 raise LinkCheckerError(_("File size too large"))
             buf.write(data)
+            if feed is not None:
+                if buf.tell() > maxparse:
+                    # compressed content larger than its declared size
+                    feed = None
+                    continue
+                try:
+                    feed.feed(data)
+                except UnicodeDecodeError:
+                    log.debug(LOG_CHECK, "cannot decode content as %s", feed.encoding)
+                    feed = None
+        if feed is not None:
+            try:
+                # Decoding all data with the declared encoding succeeded,
+                # so get_content() detects the same encoding.
+                self.document = feed.close()
+            except UnicodeDecodeError:
+                log.debug(LOG_CHECK, "cannot decode content as %s", feed.encoding)
         return buf.getvalue()
 
+    def get_document_feed(self):
+        """Return a feed parsing the content incrementally while it is
+        read, so that the content is not parsed again after the download.
+        This does not check links earlier: they are queued from the
+        document by the HTML parser, only after the download has
+        succeeded, so no links of a failed or truncated download are
+        checked. This is done for HTML content with declared size and
+        encoding whose links are going to be checked, else None is
+        returned. Without a declared encoding the content cannot be
+        decoded before it has been read completely."""
+        if not (
+            self.content_encoding
+            and self.do_check_content
+            and self.is_html()
+            and 0 <= self.size <= self.aggregate.config["maxfilesizeparse"]
+            and self.allows_simple_recursion()
+        ):
+            return None
+        try:
+            return linkparse.DocumentFeed(self.content_encoding)
+        except LookupError:
+            return None
+
     def parse_header_links(self):
         """Parse URLs in HTTP headers Link:."""
         for linktype, linkinfo in self.url_connection.links.items():
@@ -378,9 +680,13 @@ class HttpUrl(internpaturl.InternPatternUrl):
         """
         if not self.valid:
             return False
-        # some content types must be validated with the page content
-        if self.content_type in ("application/xml", "text/xml"):
-            rtype = mimeutil.guess_mimetype_read(self.get_content)
+        # some content types must be validated with the page content,
+        # which an unmodified page does not have
+        if (
+            self.content_type in ("application/xml", "text/xml")
+            and not self.not_modified
+        ):
+            rtype = mimeutil.guess_mimetype_read(self.get_content_prefix)
             if rtype is not None:
                 # XXX side effect
                 self.content_type = rtype
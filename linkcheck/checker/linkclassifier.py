@@ -0,0 +1,288 @@
+# Copyright (C) 2024 LinkChecker Authors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Classify URLs as intern or extern with the configured link patterns.
+"""
+import re
+
+from ..lock import get_lock
+from .. import log, LOG_CHECK, get_link_pat
+
+# match the intern patterns of start URLs, see get_intern_pattern()
+# in internpaturl.py
+literal_pattern_re = re.compile(
+    r"^\^(?P<scheme>https\?|[a-z][a-z0-9+\\.-]*)://\(www\\\.\|\)(?P<rest>.*)$"
+)
+
+# characters with a special meaning in regular expressions
+special_chars = frozenset("()[]{}?*+-|^$\\.&~# \t\n\r\v\f")
+
+# match backreferences, which break when patterns are combined
+backreference_re = re.compile(r"\\[1-9]|\(\?P=")
+
+
+def unescape(pattern):
+    """Return the literal string matched by a regular expression that
+    only contains escaped special characters, or None if the pattern
+    is not such a literal."""
+    chars = []
+    escaped = False
+    for char in pattern:
+        if escaped:
+            if char.isalnum():
+                # character class like \d or \b
+                return None
+            chars.append(char)
+            escaped = False
+        elif char == '\\':
+            escaped = True
+        elif char in special_chars:
+            return None
+        else:
+            chars.append(char)
+    if escaped:
+        return None
+    return "".join(chars)
+
+
+def parse_literal_pattern(pattern):
+    """Parse an intern pattern of a start URL into the URL schemes and the
+    literal host and path prefix it matches. Optional "www." in front of
+    the prefix is allowed.
+    @return: tuple (schemes, prefix), or None for other patterns
+    """
+    mo = literal_pattern_re.match(pattern)
+    if mo is None:
+        return None
+    prefix = unescape(mo.group("rest"))
+    if prefix is None:
+        return None
+    scheme = mo.group("scheme")
+    if scheme == r"https?":
+        schemes = ("http", "https")
+    else:
+        scheme = unescape(scheme)
+        if scheme is None:
+            return None
+        schemes = (scheme,)
+    return schemes, prefix
+
+
+class PrefixSet:
+    """Set of strings, checked for being a prefix of a given string.
+    The lookup cost only depends on the number of distinct lengths of
+    the prefixes."""
+
+    def __init__(self):
+        """Initialize the empty set."""
+        self.prefixes = set()
+        # sorted distinct prefix lengths, replaced on changes so that
+        # lookups need no lock
+        self.lengths = ()
+
+    def add(self, prefix):
+        """Add a prefix. Not thread-safe!"""
+        self.prefixes.add(prefix)
+        if len(prefix) not in self.lengths:
+            self.lengths = tuple(sorted(self.lengths + (len(prefix),)))
+
+    def match(self, s):
+        """Check if one of the prefixes is a prefix of s."""
+        for length in self.lengths:
+            if length > len(s):
+                break
+            if s[:length] in self.prefixes:
+                return True
+        return False
+
+
+class PrefixIndex:
+    """
+    Index of literal URL prefixes of the form host[/path], matched
+    against URLs without scheme and with or without "www." in front.
+
+    Prefixes with a path are stored by host, so that only the paths of
+    the host of a URL are looked at. Prefixes without path are string
+    prefixes of the whole URL, e.g. "example.com" also matches
+    "example.com.org/", like the regular expression they come from.
+    """
+
+    def __init__(self):
+        """Initialize the empty index."""
+        self.hosts = PrefixSet()
+        self.paths = {}
+
+    def add(self, prefix):
+        """Add a prefix. Not thread-safe!"""
+        host, sep, path = prefix.partition("/")
+        if sep:
+            self.paths.setdefault(host, PrefixSet()).add(sep + path)
+        else:
+            self.hosts.add(host)
+
+    def match(self, rest):
+        """Check if the URL part after the scheme matches a prefix."""
+        if self._match(rest):
+            return True
+        return rest.startswith("www.") and self._match(rest[4:])
+
+    def _match(self, rest):
+        """Check if a prefix is a prefix of rest."""
+        if self.hosts.match(rest):
+            return True
+        host, sep, path = rest.partition("/")
+        paths = self.paths.get(host)
+        if paths is None or not sep:
+            return False
+        return paths.match(sep + path)
+
+
+class PatternSet:
+    """Thread-safe set of link patterns, matched with one combined regular
+    expression where possible. The combined expression is compiled when
+    it is needed, so adding many patterns is cheap."""
+
+    def __init__(self):
+        """Initialize the empty set."""
+        self.lock = get_lock("link_pattern_set_lock")
+        # link patterns matched one by one
+        self.separate = []
+        # sources of the combined patterns
+        self.sources = []
+        self.combined = None
+
+    def add(self, pattern):
+        """Add a compiled pattern."""
+        source = pattern.pattern
+        with self.lock:
+            if (
+                pattern.flags & ~re.UNICODE
+                or pattern.groupindex
+                or backreference_re.search(source)
+            ):
+                # flags, group names and numbers would apply to all patterns
+                self.separate.append(pattern)
+            else:
+                self.sources.append(source)
+                self.combined = None
+
+    def get_combined(self):
+        """Return the combined expression, or None if there is none."""
+        with self.lock:
+            if self.combined is None and self.sources:
+                self.combined = re.compile(
+                    "|".join("(?:%s)" % source for source in self.sources)
+                )
+            return self.combined
+
+    def search(self, url):
+        """Check if one of the patterns matches url."""
+        combined = self.get_combined()
+        if combined is not None and combined.search(url):
+            return True
+        return any(pattern.search(url) for pattern in self.separate)
+
+
+class LinkClassifier:
+    """
+    Thread-safe classification of URLs as intern or extern, with the same
+    result as checking the extern link patterns in order and then the
+    intern link patterns.
+
+    The intern patterns of start URLs are literal prefixes, which are
+    looked up in an index, so the number of start URLs does not matter.
+    Other patterns that are not negated are combined into one regular
+    expression.
+    """
+
+    def __init__(self, externlinks, internlinks):
+        """Compile the configured link patterns.
+
+        @param externlinks: list of extern link pattern dictionaries
+        @param internlinks: list of intern link pattern dictionaries
+        """
+        self.lock = get_lock("link_classifier_lock")
+        self.externlinks = externlinks
+        self.extern_patterns = PatternSet()
+        for entry in externlinks:
+            if not entry['negate']:
+                self.extern_patterns.add(entry['pattern'])
+        self.intern_prefixes = {}
+        self.intern_patterns = PatternSet()
+        self.intern_negated = []
+        for entry in internlinks:
+            self._add_intern(entry['pattern'], entry['negate'])
+
+    def add_intern_pattern(self, pattern):
+        """Add the intern pattern of a start URL. Literal patterns are
+        not compiled.
+        @raises: re.error on invalid regular expressions
+        """
+        literal = parse_literal_pattern(pattern)
+        if literal is None:
+            entry = get_link_pat(pattern)
+            with self.lock:
+                self._add_intern(entry['pattern'], entry['negate'])
+        else:
+            with self.lock:
+                self._add_prefix(*literal)
+
+    def _add_intern(self, pattern, negate):
+        """Add a compiled intern pattern. Not thread-safe!"""
+        if negate:
+            self.intern_negated.append(pattern)
+            return
+        literal = parse_literal_pattern(pattern.pattern)
+        if literal is None or pattern.flags & ~re.UNICODE:
+            self.intern_patterns.add(pattern)
+        else:
+            self._add_prefix(*literal)
+
+    def _add_prefix(self, schemes, prefix):
+        """Add a literal URL prefix. Not thread-safe!"""
+        for scheme in schemes:
+            self.intern_prefixes.setdefault(scheme, PrefixIndex()).add(prefix)
+
+    def get_extern(self, url):
+        """Classify the URL with the link patterns.
+        @return: tuple (is_extern, is_strict), or None if no pattern
+          matches
+        """
+        # the first matching extern pattern decides about strictness
+        matched = self.extern_patterns.search(url)
+        for entry in self.externlinks:
+            if entry['negate']:
+                if entry['pattern'].search(url):
+                    continue
+            elif not (matched and entry['pattern'].search(url)):
+                continue
+            log.debug(LOG_CHECK, "Extern URL %r", url)
+            return (1, entry['strict'])
+        if self.is_intern(url):
+            log.debug(LOG_CHECK, "Intern URL %r", url)
+            return (0, 0)
+        return None
+
+    def is_intern(self, url):
+        """Check if an intern link pattern matches the URL."""
+        scheme, sep, rest = url.partition("://")
+        if sep:
+            index = self.intern_prefixes.get(scheme)
+            if index is not None and index.match(rest):
+                return True
+        if self.intern_patterns.search(url):
+            return True
+        return any(not pattern.search(url) for pattern in self.intern_negated)
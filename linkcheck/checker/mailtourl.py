@@ -23,8 +23,7 @@ from email._parseaddr import AddressList
 
 from . import urlbase
 from .. import log, LOG_CHECK, strformat, url as urlutil
-from dns import resolver
-from ..network import iputil
+from ..network import iputil, dnscache
 from .const import WARN_MAIL_NO_MX_HOST
 
 
@@ -319,7 +318,7 @@ class MailtoUrl(urlbase.UrlBase):
         username, domain = mail.rsplit('@', 1)
         log.debug(LOG_CHECK, "looking up MX mailhost %r", domain)
         try:
-            answers = resolver.resolve(domain, 'MX', search=True)
+            answers = dnscache.resolve(domain, 'MX', search=True)
         except DNSException:
             answers = []
         if len(answers) == 0:
@@ -328,7 +327,7 @@ class MailtoUrl(urlbase.UrlBase):
                 tag=WARN_MAIL_NO_MX_HOST,
             )
             try:
-                answers = resolver.resolve(domain, 'A', search=True)
+                answers = dnscache.resolve(domain, 'A', search=True)
             except DNSException:
                 answers = []
             if len(answers) == 0:
@@ -27,7 +27,8 @@ import errno
 import socket
 from io import BytesIO
 
-from . import absolute_url, get_url_from
+from . import absolute_url
+from .urlrecord import UrlRecord
 from .. import (
     log,
     LOG_CHECK,
@@ -35,9 +36,8 @@ from .. import (
     LinkCheckerError,
     url as urlutil,
     trace,
-    get_link_pat,
 )
-from ..htmlutil import htmlsoup
+from ..htmlutil import htmlsoup, linkparse
 from ..network import iputil
 from .const import (
     WARN_URL_EFFECTIVE_URL,
@@ -53,7 +53,6 @@ from .const import (
     ExcSyntaxList,
     ExcNoCacheList,
 )
-from ..url import url_fix_wayback_query
 
 # schemes that are invalid with an empty hostname
 scheme_requires_host = ("ftp", "http")
@@ -110,6 +109,8 @@ class UrlBase:
 
     # Read in 16kb chunks
     ReadChunkBytes = 1024 * 16
+    # Guess the MIME type from the first 512 bytes of the content
+    ContentPrefixBytes = 512
 
     def __init__(
         self,
@@ -252,14 +253,20 @@ class UrlBase:
         self.checktime = 0
         # connection object
         self.url_connection = None
+        # scheme of the acquired global connection slot
+        self.connection_slot = None
         # data of url content,  (data == None) means no data is available
         self.data = None
+        # first bytes of the content read before the content is downloaded
+        self.content_prefix = None
         # url content data encoding
         self.content_encoding = None
         # url content as a Unicode string
         self.text = None
-        # url content as a Beautiful Soup object
+        # url content as a Beautiful Soup object, built on demand
         self.soup = None
+        # links, anchors and metadata of HTML content
+        self.document = None
         # cache url is set by build_url() calling set_cache_url()
         self.cache_url = None
         # extern flags (is_extern, is_strict)
@@ -272,10 +279,18 @@ class UrlBase:
         self.do_check_content = True
         # MIME content type
         self.content_type = ""
+        # MIME content type of the parent content, set by get_url_from()
+        self.parent_content_type = None
         # URLs seen through redirections
         self.aliases = []
         # error messages (regular expressions) to ignore
         self.ignore_errors = []
+        # number of times the URL has been queued again
+        self.retries = 0
+        # flag if the URL has been queued again instead of getting a result
+        self.requeued = False
+        # anchors of the content, set by the AnchorCheck plugin
+        self.anchor_check = None
 
     def set_result(self, msg, valid=True, overwrite=False):
         """
@@ -375,6 +390,11 @@ class UrlBase:
         """Return True if current URL represents a directory."""
         return False
 
+    def get_directory_entries(self):
+        """Return the names of the entries of a directory URL, with a
+        trailing slash for subdirectories."""
+        return []
+
     def is_local(self):
         """Return True for local (ie. *file://*) URLs."""
         return self.is_file()
@@ -457,23 +477,17 @@ class UrlBase:
             if ":" not in self.base_ref:
                 # some websites have a relative base reference
                 self.base_ref = urljoin(self.parent_url, self.base_ref)
-            self.url = urljoin(self.base_ref, base_url)
+            parent_url = self.base_ref
         elif self.parent_url:
             # strip the parent url anchor
             urlparts = list(urllib.parse.urlsplit(self.parent_url))
             urlparts[4] = ""
             parent_url = urlutil.urlunsplit(urlparts)
-            self.url = urljoin(parent_url, base_url)
         else:
-            self.url = base_url
-        # urljoin can unnorm the url path, so norm it again
-        urlparts = list(urllib.parse.urlsplit(self.url))
-        if urlparts[2]:
-            urlparts[2] = urlutil.collapse_segments(urlparts[2])
-            if not urlparts[0].startswith("feed"):
-                # restore second / in http[s]:// in wayback path
-                urlparts[2] = url_fix_wayback_query(urlparts[2])
-        self.url = urlutil.urlunsplit(urlparts)
+            parent_url = ""
+        # joined URLs are cached by the directory of the parent URL
+        parent_url = urlutil.url_join_parent(parent_url, base_url)
+        self.url = urlutil.url_join_norm(parent_url, base_url)
         self.urlparts = self.build_url_parts(self.url)
         # and unsplit again
         self.url = urlutil.urlunsplit(self.urlparts)
@@ -557,6 +571,9 @@ class UrlBase:
         log.debug(LOG_CHECK, "checking connection")
         try:
             self.check_connection()
+            if self.requeued:
+                # the URL is checked again later
+                return
             self.set_content_type()
             self.add_size_info()
             self.aggregate.plugin_manager.run_connection_plugins(self)
@@ -592,19 +609,37 @@ class UrlBase:
                 )
         return False
 
+    def acquire_connection_slot(self, scheme=None):
+        """Wait until the connection limit of the URL scheme, or of the
+        given scheme, allows another connection. A slot of another scheme
+        is released first, e.g. after a redirect from http to https. The
+        slot is kept until the connection is closed."""
+        if scheme is None:
+            scheme = self.scheme
+        if self.connection_slot == scheme:
+            return
+        self.release_connection_slot()
+        if self.aggregate.connection_pool.acquire(scheme):
+            self.connection_slot = scheme
+
+    def release_connection_slot(self):
+        """Release the acquired connection slot."""
+        if self.connection_slot is not None:
+            self.aggregate.connection_pool.release(self.connection_slot)
+            self.connection_slot = None
+
     def close_connection(self):
         """
         Close an opened url connection.
         """
-        if self.url_connection is None:
-            # no connection is open
-            return
-        try:
-            self.url_connection.close()
-        except Exception:
-            # ignore close errors
-            pass
-        self.url_connection = None
+        if self.url_connection is not None:
+            try:
+                self.url_connection.close()
+            except Exception:
+                # ignore close errors
+                pass
+            self.url_connection = None
+        self.release_connection_slot()
 
     def handle_exception(self):
         """
@@ -690,6 +725,11 @@ class UrlBase:
         """Returns True: only check robots.txt on HTTP links."""
         return True
 
+    def save_outlinks(self):
+        """Store the links found in the content for the next check.
+        Should be overridden in subclasses."""
+        pass
+
     def set_extern(self, url):
         """
         Match URL against extern and intern link patterns. If no pattern
@@ -703,18 +743,9 @@ class UrlBase:
         if not url:
             self.extern = (1, 1)
             return
-        for entry in self.aggregate.config["externlinks"]:
-            match = entry['pattern'].search(url)
-            if (entry['negate'] and not match) or (match and not entry['negate']):
-                log.debug(LOG_CHECK, "Extern URL %r", url)
-                self.extern = (1, entry['strict'])
-                return
-        for entry in self.aggregate.config["internlinks"]:
-            match = entry['pattern'].search(url)
-            if (entry['negate'] and not match) or (match and not entry['negate']):
-                log.debug(LOG_CHECK, "Intern URL %r", url)
-                self.extern = (0, 0)
-                return
+        self.extern = self.aggregate.link_classifier.get_extern(url)
+        if self.extern is not None:
+            return
         if self.aggregate.config['checkextern']:
             self.extern = (1, 0)
         else:
@@ -742,27 +773,63 @@ class UrlBase:
         return content
 
     def get_soup(self):
+        """Return the content as Beautiful Soup object, for plugins that
+        need the document tree. The tree is only built on the first call,
+        since it is expensive; links, anchors and metadata of HTML content
+        are available from get_document()."""
         if self.soup is None:
-            self.get_content()
+            self.soup = htmlsoup.make_soup(self.get_content())
         return self.soup
 
+    def get_document(self):
+        """Return links, anchors and metadata of the HTML content, found
+        with one pass over the content shared by all consumers."""
+        if self.document is None:
+            self.document = self.aggregate.run_parser(
+                linkparse.parse_document, self.get_content()
+            )
+        return self.document
+
     def get_raw_content(self):
         if self.data is None:
             self.data = self.download_content()
         return self.data
 
+    def get_content_prefix(self):
+        """Return the start of the content as Unicode string, to guess the
+        MIME type. Unless the content has been downloaded, only the first
+        bytes are read."""
+        if self.text is not None:
+            return self.text[: self.ContentPrefixBytes]
+        if self.data is None:
+            data = self.read_content_prefix()
+            if not data:
+                self.add_warning(
+                    _("Content size is zero."), tag=WARN_URL_CONTENT_SIZE_ZERO
+                )
+        else:
+            data = self.data
+        data = data[: self.ContentPrefixBytes]
+        encoding = htmlsoup.get_encoding(data, self.content_encoding)
+        # the prefix may end inside of a multi-byte character
+        return data.decode(encoding or 'ISO-8859-1', 'ignore')
+
+    def read_content_prefix(self):
+        """Return the first bytes of the content. Subclasses can read less
+        than the whole content, which must still be returned by
+        read_content()."""
+        return self.get_raw_content()
+
     def get_content(self, encoding=None):
         if self.text is None:
             self.get_raw_content()
-            self.soup = htmlsoup.make_soup(self.data, encoding)
-            # Sometimes soup.original_encoding is None!  Better mangled text
+            encoding = htmlsoup.get_encoding(self.data, encoding)
+            # Sometimes the encoding cannot be detected!  Better mangled text
             # than an internal crash, eh?  ISO-8859-1 is a safe fallback in the
             # sense that any binary blob can be decoded, it'll never cause a
             # UnicodeDecodeError.
-            log.debug(
-                LOG_CHECK, "Beautiful Soup detected %s", self.soup.original_encoding
-            )
-            self.content_encoding = self.soup.original_encoding or 'ISO-8859-1'
+            log.debug(LOG_CHECK, "Detected encoding %s", encoding)
+            self.content_encoding = encoding or 'ISO-8859-1'
             log.debug(LOG_CHECK, "Content encoding %s", self.content_encoding)
             self.text = self.data.decode(self.content_encoding)
         return self.text
@@ -795,12 +862,13 @@ class UrlBase:
         return self.aggregate.config.get_user_password(self.url)
 
     def add_url(self, url, line=0, column=0, page=0, name="", base=None, parent=None):
-        """Add new URL to queue."""
+        """Add new URL to queue. The URL data is created when the URL
+        is taken from the queue."""
         if base:
             base_ref = urlutil.url_norm(base, encoding=self.content_encoding)[0]
         else:
             base_ref = None
-        url_data = get_url_from(
+        record = UrlRecord(
             url,
             self.recursion_level + 1,
             self.aggregate,
@@ -813,7 +881,11 @@ class UrlBase:
             parent_content_type=self.content_type,
             url_encoding=self.content_encoding,
         )
-        self.aggregate.urlqueue.put(url_data)
+        if record.cache_url is None:
+            # no cache key for the queue, check the syntax right away
+            self.aggregate.urlqueue.put(record.to_url_data())
+        else:
+            self.aggregate.urlqueue.put(record)
 
     def serialized(self, sep=os.linesep):
         """
@@ -852,7 +924,7 @@ class UrlBase:
             pat = self.get_intern_pattern(url=url)
             if pat:
                 log.debug(LOG_CHECK, "Add intern pattern %r", pat)
-                self.aggregate.config['internlinks'].append(get_link_pat(pat))
+                self.aggregate.link_classifier.add_intern_pattern(pat)
         except UnicodeError as msg:
             res = _("URL has unparsable domain name: %(domain)s") % {"domain": msg}
             self.set_result(res, valid=False)
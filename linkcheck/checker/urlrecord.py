@@ -0,0 +1,186 @@
+# Copyright (C) 2024 LinkChecker Authors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Lightweight records of queued URLs.
+"""
+import urllib.parse
+
+from . import get_url_from
+from .. import url as urlutil
+
+
+def get_record_key(base_url, parent_url, base_ref, anchors):
+    """Return a cheap pre-normalised cache key for a link: the link
+    joined with its base and, unless anchors are checked, without
+    fragment. Returns None if the link cannot be joined.
+    """
+    url = base_url.strip() if base_url else ""
+    try:
+        if base_ref:
+            if ":" not in base_ref and parent_url:
+                base_ref = urllib.parse.urljoin(parent_url, base_ref)
+            url = urllib.parse.urljoin(base_ref, url)
+        elif parent_url:
+            url = urllib.parse.urljoin(parent_url, url)
+        if not anchors:
+            url = urllib.parse.urldefrag(url)[0]
+    except ValueError:
+        return None
+    return url or None
+
+
+class UrlRecord:
+    """Store the data needed to create the URL data of a queued link.
+    The URL data itself is only created when the link is taken from the
+    queue, so duplicate links are dropped without running the syntax
+    check and the frontier holds small objects only."""
+
+    __slots__ = (
+        "base_url",
+        "recursion_level",
+        "aggregate",
+        "parent_url",
+        "base_ref",
+        "line",
+        "column",
+        "page",
+        "name",
+        "parent_content_type",
+        "url_encoding",
+        "extern",
+        "cache_url",
+        "retries",
+    )
+
+    # records never have a result
+    has_result = False
+
+    def __init__(
+        self,
+        base_url,
+        recursion_level,
+        aggregate,
+        parent_url=None,
+        base_ref=None,
+        line=0,
+        column=0,
+        page=0,
+        name="",
+        parent_content_type=None,
+        url_encoding=None,
+        extern=None,
+    ):
+        """Store the given link data and compute the cache key."""
+        self.base_url = base_url
+        self.recursion_level = recursion_level
+        self.aggregate = aggregate
+        self.parent_url = parent_url
+        self.base_ref = base_ref
+        self.line = line
+        self.column = column
+        self.page = page
+        self.name = name
+        self.parent_content_type = parent_content_type
+        self.url_encoding = url_encoding
+        self.extern = extern
+        self.retries = 0
+        anchors = "AnchorCheck" in aggregate.config["enabledplugins"]
+        self.cache_url = get_record_key(base_url, parent_url, base_ref, anchors)
+
+    @property
+    def url(self):
+        """The joined URL, used for logging and host lookup."""
+        return self.cache_url
+
+    @property
+    def scheme(self):
+        """The URL scheme in lowercase."""
+        return self.cache_url.split(":", 1)[0].lower()
+
+    @property
+    def urlparts(self):
+        """The split URL with the network location in lowercase, without
+        default port and trailing dot of the host name, like the one of
+        the URL data, so that both are queued for the same host."""
+        urlparts = list(urllib.parse.urlsplit(self.cache_url))
+        userinfo, hostport = urlutil.split_netloc(urlparts[1])
+        hostport = urlutil.norm_hostport(self.scheme, hostport.lower())
+        urlparts[1] = f"{userinfo}@{hostport}" if userinfo else hostport
+        return urlparts
+
+    def to_url_data(self):
+        """Create the URL data for this link."""
+        url_data = get_url_from(
+            self.base_url,
+            self.recursion_level,
+            self.aggregate,
+            parent_url=self.parent_url,
+            base_ref=self.base_ref,
+            line=self.line,
+            column=self.column,
+            page=self.page,
+            name=self.name,
+            parent_content_type=self.parent_content_type,
+            url_encoding=self.url_encoding,
+            extern=self.extern,
+        )
+        url_data.retries = self.retries
+        return url_data
+
+    @classmethod
+    def from_url_data(cls, url_data):
+        """Create a record from which the given URL data can be created
+        again, keeping its cache key and extern status."""
+        record = cls(
+            url_data.base_url,
+            url_data.recursion_level,
+            url_data.aggregate,
+            parent_url=url_data.parent_url,
+            base_ref=url_data.base_ref,
+            line=url_data.line,
+            column=url_data.column,
+            page=url_data.page,
+            name=url_data.name,
+            parent_content_type=url_data.parent_content_type,
+            url_encoding=url_data.encoding,
+            extern=url_data.extern,
+        )
+        if url_data.cache_url is not None:
+            record.cache_url = url_data.cache_url
+        record.retries = url_data.retries
+        return record
+
+    def get_state(self):
+        """Return list of the stored link data without the aggregate,
+        suitable for JSON serialization."""
+        return [
+            getattr(self, name) for name in self.__slots__ if name != "aggregate"
+        ]
+
+    @classmethod
+    def from_state(cls, state, aggregate):
+        """Create a record from data returned by get_state()."""
+        record = cls.__new__(cls)
+        record.aggregate = aggregate
+        record.retries = 0
+        names = [name for name in cls.__slots__ if name != "aggregate"]
+        for name, value in zip(names, state):
+            setattr(record, name, value)
+        return record
+
+    def __repr__(self):
+        """Return record info."""
+        return f"<UrlRecord {self.cache_url!r} from {self.parent_url!r}>"
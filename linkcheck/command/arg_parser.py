@@ -245,6 +245,14 @@ class ArgParser(LCArgumentParser):
             action="store_true",
             help=_("Read list of white-space separated URLs to check from stdin."),
         )
+        group.add_argument(
+            "--resume",
+            action="store_true",
+            help=_(
+                "Continue an interrupted check from the checkpoint in the\n"
+                "state directory given by the statedir option."
+            ),
+        )
 
         # ================== output options =====================
         group = self.add_argument_group(_("Output options"))
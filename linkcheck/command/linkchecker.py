@@ -165,14 +165,19 @@ def linkchecker():
 
         trace.trace_filter([r"^linkcheck"])
         trace.trace_on()
+    if options.resume:
+        try:
+            aggregate.load_checkpoint()
+        except LinkCheckerError as msg:
+            print_usage(str(msg))
     # add urls to queue
     if options.stdin:
-        for url in read_stdin_urls():
-            aggregate_url(aggregate, url)
+        # URLs are checked while stdin is read
+        aggregate.add_urls(read_stdin_urls(), aggregate_url)
     elif options.url:
         for url in options.url:
             aggregate_url(aggregate, stripurl(url))
-    else:
+    elif not options.resume:
         log.warn(LOG_CMDLINE, _("no files or URLs given"))
     # set up profiling
     do_profile = False
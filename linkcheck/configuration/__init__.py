@@ -149,13 +149,33 @@ class Configuration(dict):
         self["maxrunseconds"] = None
         self["maxrequestspersecond"] = 10
         self["maxhttpredirects"] = 10
+        self["maxhttpretries"] = 3
+        self["maxconnectionsperhost"] = 0
+        self["maxconnectionshttp"] = 0
+        self["maxconnectionshttps"] = 0
+        self["maxconnectionsftp"] = 0
+        self["dnscachettl"] = 300
+        self["dnscachenegativettl"] = 60
+        self["maxhostfailures"] = 5
+        self["hostretryseconds"] = 300
         self["sslverify"] = True
         self["threads"] = 10
+        self["parseprocesses"] = 0
         self["timeout"] = 60
         self["aborttimeout"] = 300
         self["recursionlevel"] = -1
         self["useragent"] = UserAgent
         self["resultcachesize"] = 100000
+        self["seenbloomsize"] = 0
+        self["hostfrontier"] = False
+        self["queuememorysize"] = 0
+        self["stdinqueuesize"] = 10000
+        self["statedir"] = None
+        self["checkpointinterval"] = 300
+        self["persistentcache"] = None
+        self["persistentcachettl"] = {"*": 86400}
+        self["incremental"] = False
+        self["headrequests"] = False
         # authentication
         self["authentication"] = []
         self["loginurl"] = None
@@ -264,6 +284,12 @@ class Configuration(dict):
             self.sanitize_loginurl()
         self.sanitize_plugins()
         self.sanitize_ssl()
+        if self["incremental"] and not self["persistentcache"]:
+            log.warn(
+                LOG_CHECK,
+                _("incremental checking needs a persistentcache; disabling it."),
+            )
+            self["incremental"] = False
         # set default socket timeout
         socket.setdefaulttimeout(self['timeout'])
 
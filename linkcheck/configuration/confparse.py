@@ -194,11 +194,20 @@ class LCConfigParser(RawConfigParser):
         section = "checking"
         self.read_int_option(section, "threads", min=-1)
         self.config['threads'] = max(0, self.config['threads'])
+        self.read_int_option(section, "parseprocesses", min=0)
         self.read_int_option(section, "timeout", min=1)
         self.read_int_option(section, "aborttimeout", min=1)
         self.read_int_option(section, "recursionlevel", min=-1)
         self.read_string_option(section, "useragent")
         self.read_float_option(section, "maxrequestspersecond", min=0.001)
+        self.read_int_option(section, "maxconnectionsperhost", min=0)
+        for scheme in ("http", "https", "ftp"):
+            self.read_int_option(section, "maxconnections%s" % scheme, min=0)
+        self.read_int_option(section, "dnscachettl", min=0)
+        self.read_int_option(section, "dnscachenegativettl", min=0)
+        self.read_int_option(section, "maxhostfailures", min=0)
+        self.read_int_option(section, "hostretryseconds", min=0)
+        self.read_int_option(section, "maxhttpretries", min=0)
         self.read_int_option(section, "maxnumurls", min=0)
         self.read_int_option(section, "maxfilesizeparse", min=1)
         self.read_int_option(section, "maxfilesizedownload", min=1)
@@ -217,6 +226,26 @@ class LCConfigParser(RawConfigParser):
             self.read_string_option(section, "sslverify")
         self.read_int_option(section, "maxrunseconds", min=0)
         self.read_int_option(section, "resultcachesize", min=0)
+        self.read_int_option(section, "seenbloomsize", min=0)
+        self.read_boolean_option(section, "hostfrontier")
+        self.read_int_option(section, "queuememorysize", min=0)
+        self.read_int_option(section, "stdinqueuesize", min=1)
+        self.read_string_option(section, "statedir")
+        self.read_int_option(section, "checkpointinterval", min=0)
+        self.read_string_option(section, "persistentcache")
+        if self.has_option(section, "persistentcachettl"):
+            ttls = {}
+            for val in read_multiline(self.get(section, "persistentcachettl")):
+                try:
+                    scheme, seconds = val.split()
+                    ttls[scheme.lower()] = int(seconds)
+                except ValueError:
+                    raise LinkCheckerError(
+                        _("invalid value for %s: %s\n") % ("persistentcachettl", val)
+                    )
+            self.config["persistentcachettl"] = ttls
+        self.read_boolean_option(section, "incremental")
+        self.read_boolean_option(section, "headrequests")
 
     def read_authentication_config(self):
         """Read configuration options in section "authentication"."""
@@ -20,16 +20,28 @@ import os
 import time
 
 from .. import log, LOG_CHECK, LinkCheckerError, LinkCheckerInterrupt, plugins
-from ..cache import urlqueue, robots_txt, results
+from ..cache import urlqueue, robots_txt, results, hosts, persistent, anchors
+from ..network import dnscache, pool
+from ..parser import workers
 from . import aggregator, console
 
 
 def check_urls(aggregate):
     """Main check function; checks all configured URLs until interrupted
-    with Ctrl-C.
+    with Ctrl-C. DNS lookups are cached while checking.
 
     @return: None
     """
+    config = aggregate.config
+    dnscache.install(config["dnscachettl"], config["dnscachenegativettl"])
+    try:
+        _check_urls(aggregate)
+    finally:
+        dnscache.uninstall()
+
+
+def _check_urls(aggregate):
+    """Check all configured URLs until interrupted with Ctrl-C."""
     try:
         aggregate.visit_loginurl()
     except LinkCheckerError as msg:
@@ -44,11 +56,12 @@ def check_urls(aggregate):
         log.error(LOG_CHECK, _("Error starting log output: %(msg)s.") % dict(msg=msg))
         raise
     try:
-        if not aggregate.urlqueue.empty():
+        if not aggregate.urlqueue.empty() or aggregate.url_producer is not None:
             aggregate.start_threads()
         check_url(aggregate)
         aggregate.finish()
         aggregate.end_log_output()
+        aggregate.remove_checkpoint()
     except LinkCheckerInterrupt:
         raise
     except KeyboardInterrupt:
@@ -131,10 +144,33 @@ def abort_now():
 
 def get_aggregate(config):
     """Get an aggregator instance with given configuration."""
-    _urlqueue = urlqueue.UrlQueue(max_allowed_urls=config["maxnumurls"])
+    host_scheduler = hosts.HostScheduler(config["maxrequestspersecond"])
+    _urlqueue = urlqueue.UrlQueue(
+        max_allowed_urls=config["maxnumurls"],
+        host_scheduler=host_scheduler if config["hostfrontier"] else None,
+        max_memory=config["queuememorysize"],
+    )
     _robots_txt = robots_txt.RobotsTxt(config["useragent"])
     plugin_manager = plugins.PluginManager(config)
-    result_cache = results.ResultCache(config["resultcachesize"])
+    if config["persistentcache"]:
+        persistent_cache = persistent.PersistentCache(
+            config["persistentcache"], config["persistentcachettl"]
+        )
+    else:
+        persistent_cache = None
+    result_cache = results.ResultCache(
+        config["resultcachesize"], persistent_cache, config["seenbloomsize"]
+    )
+    connection_pool = pool.ConnectionPool(config)
+    if "AnchorCheck" in config["enabledplugins"]:
+        anchor_index = anchors.AnchorIndex()
+    else:
+        anchor_index = None
+    if config["parseprocesses"]:
+        parser_pool = workers.ParserPool(config["parseprocesses"])
+    else:
+        parser_pool = None
     return aggregator.Aggregate(
-        config, _urlqueue, _robots_txt, plugin_manager, result_cache
+        config, _urlqueue, _robots_txt, plugin_manager, result_cache,
+        host_scheduler, connection_pool, anchor_index, parser_pool,
     )
@@ -16,28 +16,33 @@
 """
 Aggregate needed object instances for checker threads.
 """
+import os
 import threading
 
 import requests
 import time
 import urllib.parse
-import random
-from .. import log, LOG_CHECK, strformat, LinkCheckerError
+from .. import log, LOG_CACHE, LOG_CHECK, strformat, LinkCheckerError
+from .. import url as urlutil
 from ..decorators import synchronized
-from ..cache import urlqueue
+from ..cache import urlqueue, hosts
+from ..checker import linkclassifier
 from ..htmlutil import loginformsearch
 from ..cookies import from_file
-from . import logger, status, checker, interrupter
+from . import logger, status, checker, interrupter, checkpoint, producer
 
 
 _threads_lock = threading.RLock()
-_hosts_lock = threading.RLock()
 _downloadedbytes_lock = threading.RLock()
+_checkpoint_lock = threading.Lock()
 
 
-def new_request_session(config, cookies):
-    """Create a new request session."""
+def new_request_session(config, cookies, connection_pool=None):
+    """Create a new request session. If a connection pool is given, the
+    session uses its shared connections."""
     session = requests.Session()
+    if connection_pool is not None:
+        connection_pool.mount(session)
     if cookies:
         session.cookies = cookies
     session.max_redirects = config["maxhttpredirects"]
@@ -58,25 +63,42 @@ def new_request_session(config, cookies):
 
 class Aggregate:
     """Store thread-safe data collections for checker threads."""
-    wait_time_min_default = 0.1
-    wait_time_max_default = 0.6
 
-    def __init__(self, config, urlqueue, robots_txt, plugin_manager, result_cache):
+    def __init__(
+        self, config, urlqueue, robots_txt, plugin_manager, result_cache,
+        host_scheduler, connection_pool, anchor_index=None, parser_pool=None,
+    ):
         """Store given link checking objects."""
         self.config = config
         self.urlqueue = urlqueue
         self.logger = logger.Logger(config)
         self.threads = []
-        self.request_sessions = {}
+        # per-thread request sessions sharing the pooled connections
+        self.request_sessions = threading.local()
+        self.connection_pool = connection_pool
         self.robots_txt = robots_txt
         self.plugin_manager = plugin_manager
         self.result_cache = result_cache
-        self.times = {}
-        self.maxrated = {}
+        # results and anchors of documents linked with anchors, or None
+        # if anchors are not checked
+        self.anchor_index = anchor_index
+        # worker processes extracting links, or None to parse in the
+        # checker threads
+        self.parser_pool = parser_pool
+        self.host_scheduler = host_scheduler
+        # hosts that need GET instead of HEAD requests
+        self.no_head_hosts = hosts.HostSet()
+        # hosts failing with connection errors and timeouts
+        self.circuit_breaker = hosts.CircuitBreaker(
+            config["maxhostfailures"], config["hostretryseconds"]
+        )
+        # intern/extern classification of URLs
+        self.link_classifier = linkclassifier.LinkClassifier(
+            config["externlinks"], config["internlinks"]
+        )
+        # task queueing URLs while they are checked
+        self.url_producer = None
         self.cookies = None
-        requests_per_second = config["maxrequestspersecond"]
-        self.wait_time_min = 1.0 / requests_per_second
-        self.wait_time_max = 6 * self.wait_time_min
         self.downloaded_bytes = 0
 
     def visit_loginurl(self):
@@ -126,8 +148,16 @@ class Aggregate:
             t = interrupter.Interrupt(self.config["maxrunseconds"])
             t.start()
             self.threads.append(t)
+        if self.config["statedir"] and self.config["checkpointinterval"]:
+            t = checkpoint.Checkpoint(self, self.config["checkpointinterval"])
+            t.start()
+            self.threads.append(t)
         num = self.config["threads"]
         if num > 0:
+            if self.url_producer is not None:
+                self.urlqueue.add_producer()
+                self.url_producer.start()
+                self.threads.append(self.url_producer)
             for dummy in range(num):
                 t = checker.Checker(
                     self.urlqueue, self.logger, self.add_request_session
@@ -135,47 +165,50 @@ class Aggregate:
                 self.threads.append(t)
                 t.start()
         else:
-            self.request_sessions[threading.get_ident()] = new_request_session(
-                self.config, self.cookies
-            )
+            self.add_request_session()
             checker.check_urls(self.urlqueue, self.logger)
 
-    @synchronized(_threads_lock)
+    def add_urls(self, urls, add_url):
+        """Queue the URLs of an iterable with add_url(aggregate, url).
+        With checker threads, the URLs are queued by a producer thread
+        while they are checked."""
+        if self.config["threads"] > 0:
+            self.url_producer = producer.UrlProducer(
+                self, urls, add_url, self.config["stdinqueuesize"]
+            )
+        else:
+            for url in urls:
+                add_url(self, url)
+
     def add_request_session(self):
         """Add a request session for current thread."""
-        session = new_request_session(self.config, self.cookies)
-        self.request_sessions[threading.get_ident()] = session
+        self.request_sessions.session = new_request_session(
+            self.config, self.cookies, self.connection_pool
+        )
 
-    @synchronized(_threads_lock)
     def get_request_session(self):
-        """Get the request session for current thread."""
-        return self.request_sessions[threading.get_ident()]
+        """Get the request session for current thread. The session is
+        stored in thread-local data, so no lock is needed."""
+        return self.request_sessions.session
 
-    @synchronized(_hosts_lock)
     def wait_for_host(self, host):
-        """Throttle requests to one host."""
-        t = time.time()
-        if host in self.times:
-            due_time = self.times[host]
-            if due_time > t:
-                wait = due_time - t
-                time.sleep(wait)
-                t = time.time()
-        if host in self.maxrated:
-            wait_time_min, wait_time_max = self.wait_time_min, self.wait_time_max
-        else:
-            wait_time_min = max(self.wait_time_min, self.wait_time_min_default)
-            wait_time_max = max(self.wait_time_max, self.wait_time_max_default)
-        log.debug(LOG_CHECK,
-                  "Min wait time: %s Max wait time: %s for host: %s",
-                  wait_time_min, wait_time_max, host)
-        wait_time = random.uniform(wait_time_min, wait_time_max)
-        self.times[host] = t + wait_time
+        """Throttle requests to one host. Only the calling thread waits
+        for the reserved slot, other hosts are not affected."""
+        wait = self.host_scheduler.reserve(host)
+        if wait > 0:
+            time.sleep(wait)
+
+    def add_host_latency(self, host, latency):
+        """Increase the request rate of a host that answers fast."""
+        self.host_scheduler.add_latency(host, latency)
+
+    def back_off_host(self, host, retry_after=None):
+        """Decrease the request rate of a host that limits the rate."""
+        self.host_scheduler.back_off(host, retry_after)
 
-    @synchronized(_hosts_lock)
     def set_maxrated_for_host(self, host):
         """Remove the limit on the maximum request rate for a host."""
-        self.maxrated[host] = True
+        self.host_scheduler.set_maxrated(host)
 
     @synchronized(_threads_lock)
     def print_active_threads(self):
@@ -215,8 +248,10 @@ class Aggregate:
         self.urlqueue.do_shutdown()
 
     def abort(self):
-        """Print still-active URLs and empty the URL queue."""
+        """Print still-active URLs, save a checkpoint and empty the URL
+        queue."""
         self.print_active_threads()
+        self.save_checkpoint()
         self.cancel()
         timeout = self.config["aborttimeout"]
         try:
@@ -228,6 +263,47 @@ class Aggregate:
             )
             raise KeyboardInterrupt()
 
+    def get_checkpoint_filename(self):
+        """Return the checkpoint filename or None if no state directory
+        is configured."""
+        if not self.config["statedir"]:
+            return None
+        return checkpoint.get_filename(self.config["statedir"])
+
+    @synchronized(_checkpoint_lock)
+    def save_checkpoint(self):
+        """Save the check state if a state directory is configured."""
+        filename = self.get_checkpoint_filename()
+        if filename is None or self.urlqueue.shutdown:
+            # an aborted check has been saved before the queue was emptied
+            return
+        try:
+            checkpoint.save(self, filename)
+            log.debug(LOG_CHECK, "Saved checkpoint %s", filename)
+        except OSError as msg:
+            log.warn(
+                LOG_CHECK,
+                _("Could not write checkpoint %(filename)s: %(msg)s")
+                % dict(filename=filename, msg=msg),
+            )
+
+    def load_checkpoint(self):
+        """Restore the check state saved in the state directory."""
+        filename = self.get_checkpoint_filename()
+        if filename is None:
+            raise LinkCheckerError(
+                _("Resuming needs a state directory, see the statedir option.")
+            )
+        checkpoint.load(self, filename)
+        log.info(LOG_CHECK, _("Resuming check from %s"), filename)
+
+    @synchronized(_checkpoint_lock)
+    def remove_checkpoint(self):
+        """Remove the checkpoint of a completed check."""
+        filename = self.get_checkpoint_filename()
+        if filename is not None and os.path.exists(filename):
+            os.remove(filename)
+
     @synchronized(_threads_lock)
     def remove_stopped_threads(self):
         """Remove the stopped threads from the internal thread list."""
@@ -243,6 +319,19 @@ class Aggregate:
             t.stop()
         for t in self.threads:
             t.join(timeout=1.0)
+        self.urlqueue.close()
+        self.result_cache.close()
+        self.connection_pool.close()
+        if self.parser_pool is not None:
+            self.parser_pool.close()
+
+    def run_parser(self, func, *args):
+        """Return the result of the parse function func(*args), computed
+        by the parser worker processes if configured, else in the
+        calling thread."""
+        if self.parser_pool is None:
+            return func(*args)
+        return self.parser_pool.run(func, *args)
 
     @synchronized(_threads_lock)
     def is_finished(self):
@@ -257,6 +346,8 @@ class Aggregate:
 
     def end_log_output(self, **kwargs):
         """Print ending output to log."""
+        log.debug(LOG_CACHE, "Result cache: %s", self.result_cache.get_stats())
+        log.debug(LOG_CACHE, "URL caches: %s", urlutil.get_cache_stats())
         kwargs.update(
             dict(
                 downloaded_bytes=self.downloaded_bytes, num_urls=len(self.result_cache),
@@ -20,7 +20,8 @@ import copy
 import time
 from . import task
 from ..cache import urlqueue
-from .. import parser
+from ..plugins import anchorcheck
+from .. import parser, url as urlutil
 
 # Interval in which each check thread looks if it's stopped.
 QUEUE_POLL_INTERVALL_SECS = 1.0
@@ -30,6 +31,9 @@ def check_urls(urlqueue, logger):
     """Check URLs without threading."""
     while not urlqueue.empty():
         url_data = urlqueue.get()
+        if url_data is None:
+            # a duplicate URL that has already been handled by the queue
+            continue
         try:
             check_url(url_data, logger)
         finally:
@@ -44,38 +48,91 @@ def check_url(url_data, logger):
         cache = url_data.aggregate.result_cache
         key = url_data.cache_url
         result = cache.get_result(key)
+        if result is None and url_data.extern[0]:
+            # extern URLs may have been checked by a previous run
+            result = cache.get_stored_result(key)
         if result is None:
-            # check
-            check_start = time.time()
-            try:
-                url_data.check()
-                do_parse = url_data.check_content()
-                url_data.checktime = time.time() - check_start
-                # Add result to cache
-                result = url_data.to_wire()
-                cache.add_result(key, result)
-                for alias in url_data.aliases:
-                    # redirect aliases
-                    cache.add_result(alias, result)
-                logger.log_url(result)
-                # parse content recursively
-                # XXX this could add new warnings which should be cached.
-                if do_parse:
-                    parser.parse_url(url_data)
-            finally:
-                # close/release possible open connection
-                url_data.close_connection()
+            anchor_index = url_data.aggregate.anchor_index
+            if anchor_index is not None:
+                check_anchor_url(url_data, logger, anchor_index)
+            else:
+                check_new_url(url_data, logger)
         else:
-            # copy data from cache and adjust it
-            result = copy.copy(result)
-            result.parent_url = url_data.parent_url
-            result.base_ref = url_data.base_ref or ""
-            result.base_url = url_data.base_url or ""
-            result.line = url_data.line
-            result.column = url_data.column
-            result.level = url_data.recursion_level
-            result.name = url_data.name
-            logger.log_url(result)
+            logger.log_url(copy_result(result, url_data))
+
+
+def check_new_url(url_data, logger):
+    """Check a URL that has no cached result, cache and log the result
+    and parse the content.
+
+    @return: the result, or None if the URL is checked again later
+    """
+    cache = url_data.aggregate.result_cache
+    key = url_data.cache_url
+    check_start = time.time()
+    try:
+        url_data.check()
+        if url_data.requeued:
+            # the URL is checked again later
+            return None
+        do_parse = url_data.check_content()
+        url_data.checktime = time.time() - check_start
+        # Add result to cache
+        result = url_data.to_wire()
+        cache.add_result(key, result)
+        for alias in url_data.aliases:
+            # redirect aliases
+            cache.add_result(alias, result)
+            # serve queued URLs of an alias from the cache first
+            url_data.aggregate.urlqueue.promote(alias)
+        logger.log_url(result)
+        # parse content recursively
+        # XXX this could add new warnings which should be cached.
+        if do_parse:
+            parser.parse_url(url_data)
+            url_data.save_outlinks()
+        return result
+    finally:
+        # close/release possible open connection
+        url_data.close_connection()
+
+
+def check_anchor_url(url_data, logger, anchor_index):
+    """Check a URL with or without anchor. The document is only
+    downloaded for the first URL, URLs with other anchors are checked
+    against its stored result and anchors. A URL without anchor only
+    stores its result if the anchors of its content are known."""
+    document_url = urlutil.urlunsplit(url_data.urlparts[:4] + [""])
+    with anchor_index.lock_document(document_url):
+        entry = anchor_index.get(document_url)
+        if entry is None:
+            result = check_new_url(url_data, logger)
+            if result is None:
+                return
+            anchor_check = url_data.anchor_check
+            if anchor_check is None and url_data.document is not None:
+                anchor_check = anchorcheck.UrlAnchorCheck(url_data.document.anchors)
+            if url_data.anchor or anchor_check is not None:
+                anchor_index.add(document_url, result, anchor_check)
+            return
+    result, url_anchor_check = entry
+    result = copy_result(result, url_data)
+    anchorcheck.check_document_anchor(url_data, result, url_anchor_check)
+    url_data.aggregate.result_cache.add_result(url_data.cache_url, result)
+    logger.log_url(result)
+
+
+def copy_result(result, url_data):
+    """Return a copy of a cached result adjusted to the link data."""
+    result = copy.copy(result)
+    result.parent_url = url_data.parent_url
+    result.base_ref = url_data.base_ref or ""
+    result.base_url = url_data.base_url or ""
+    result.line = url_data.line
+    result.column = url_data.column
+    result.level = url_data.recursion_level
+    result.name = url_data.name
+    return result
 
 
 class Checker(task.LoggedCheckedTask):
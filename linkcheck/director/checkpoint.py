@@ -0,0 +1,130 @@
+# Copyright (C) 2024 LinkChecker Authors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""Checkpoints of the check state to resume interrupted checks."""
+import os
+import pickle
+import tempfile
+
+from . import task
+from .. import LinkCheckerError
+
+# name of the checkpoint file in the state directory
+FILENAME = "checkpoint.pickle"
+# incremented when the stored state changes incompatibly
+VERSION = 2
+
+
+def get_filename(statedir):
+    """Return the checkpoint filename in the given state directory."""
+    return os.path.join(os.path.expanduser(statedir), FILENAME)
+
+
+def save(aggregate, filename):
+    """Write queued URLs, seen URLs, cached results and log statistics
+    of the aggregate to the given file. The file is replaced atomically,
+    so it always holds a complete checkpoint.
+
+    The queued URLs, seen URLs and cached results are taken at one point
+    in time, so that every seen URL is either queued or has been checked.
+    The log statistics are taken right after and may already include
+    URLs checked meanwhile. The check goes on while the file is written.
+
+    The file holds the pickled state, followed by the URLs spilled to
+    disk in pickled lists and a final None. The spilled URLs are copied
+    in batches, so that they need not fit into memory."""
+    state, spilled = aggregate.urlqueue.get_state(aggregate.result_cache)
+    try:
+        state = dict(
+            version=VERSION,
+            urlqueue=state,
+            logger=aggregate.logger.get_stats(),
+            downloaded_bytes=aggregate.downloaded_bytes,
+        )
+        write(filename, state, spilled or ())
+    finally:
+        if spilled is not None:
+            spilled.close()
+
+
+def write(filename, state, spilled):
+    """Write the state and the lists of spilled URLs to the given file,
+    see save()."""
+    dirname = os.path.dirname(filename)
+    if dirname and not os.path.isdir(dirname):
+        os.makedirs(dirname, 0o700)
+    fd, tmpname = tempfile.mkstemp(prefix=".checkpoint-", dir=dirname or None)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickler = pickle.Pickler(f, pickle.HIGHEST_PROTOCOL)
+            pickler.dump(state)
+            for items in spilled:
+                pickler.dump(items)
+                # do not keep the items in the memo of the pickler
+                pickler.clear_memo()
+            pickler.dump(None)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmpname, filename)
+    except BaseException:
+        os.remove(tmpname)
+        raise
+
+
+def load(aggregate, filename):
+    """Restore the state of a checkpoint file into the aggregate."""
+    try:
+        with open(filename, "rb") as f:
+            unpickler = pickle.Unpickler(f)
+            state = unpickler.load()
+            if not isinstance(state, dict) or state.get("version") != VERSION:
+                raise LinkCheckerError(
+                    _("Checkpoint %s was written by an incompatible version.")
+                    % filename
+                )
+            aggregate.urlqueue.restore(state["urlqueue"], aggregate)
+            while (items := unpickler.load()) is not None:
+                aggregate.urlqueue.restore_items(items, aggregate)
+    except FileNotFoundError:
+        raise LinkCheckerError(_("No checkpoint found at %s.") % filename)
+    except (OSError, pickle.UnpicklingError, EOFError) as msg:
+        raise LinkCheckerError(
+            _("Could not read checkpoint %(filename)s: %(msg)s")
+            % dict(filename=filename, msg=msg)
+        )
+    aggregate.logger.restore_stats(state["logger"])
+    aggregate.downloaded_bytes = state["downloaded_bytes"]
+
+
+class Checkpoint(task.LoggedCheckedTask):
+    """Thread that writes a checkpoint periodically."""
+
+    def __init__(self, aggregate, wait_seconds):
+        """Initialize the checkpoint task.
+
+        @param aggregate: the aggregate to save
+        @type aggregate: Aggregate
+        @param wait_seconds: interval in seconds between checkpoints
+        @type wait_seconds: int
+        """
+        super().__init__(aggregate.logger)
+        self.aggregate = aggregate
+        self.wait_seconds = wait_seconds
+
+    def run_checked(self):
+        """Write checkpoints until stopped."""
+        self.name = "Checkpoint"
+        while not self.stopped(self.wait_seconds):
+            self.aggregate.save_checkpoint()
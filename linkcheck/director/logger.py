@@ -14,6 +14,7 @@
 # with this program; if not, write to the Free Software Foundation, Inc.,
 # 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
 """Logger for aggregator instances"""
+import copy
 import threading
 import _thread
 
@@ -31,6 +32,8 @@ class Logger:
         self.loggers.extend(config['fileoutput'])
         self.verbose = config["verbose"]
         self.warnings = config["warnings"]
+        # statistics of a resumed check, applied when output starts
+        self.resumed_stats = None
 
     def start_log_output(self):
         """
@@ -38,6 +41,20 @@ class Logger:
         """
         for logger in self.loggers:
             logger.start_output()
+        if self.resumed_stats is not None:
+            for logger, stats in zip(self.loggers, self.resumed_stats):
+                vars(logger.stats).update(stats)
+            self.resumed_stats = None
+
+    @synchronized(_lock)
+    def get_stats(self):
+        """Return list of the statistics of all configured loggers."""
+        return [copy.deepcopy(vars(logger.stats)) for logger in self.loggers]
+
+    def restore_stats(self, stats):
+        """Continue the given statistics returned by get_stats() when
+        the output starts."""
+        self.resumed_stats = stats
 
     def end_log_output(self, **kwargs):
         """
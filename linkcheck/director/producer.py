@@ -0,0 +1,59 @@
+# Copyright (C) 2024 LinkChecker Authors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""Queue URLs while they are checked."""
+from . import task
+from .. import log, LOG_CHECK
+
+
+class UrlProducer(task.LoggedCheckedTask):
+    """Thread that queues URLs of an iterable while the checker threads
+    are running. Queueing waits while the queue is full, so that only a
+    limited number of URLs is kept in memory."""
+
+    def __init__(self, aggregate, urls, add_url, maxsize):
+        """Initialize the producer task.
+
+        @param aggregate: the aggregate with the URL queue
+        @type aggregate: Aggregate
+        @param urls: the URLs to queue
+        @type urls: iterable of strings
+        @param add_url: function queueing a URL, called with the aggregate
+          and the URL
+        @type add_url: function
+        @param maxsize: queue no more URLs while this many are queued
+        @type maxsize: int
+        """
+        super().__init__(aggregate.logger)
+        self.aggregate = aggregate
+        self.urls = urls
+        self.add_url = add_url
+        self.maxsize = maxsize
+        # do not wait for a blocking read of the URLs on exit
+        self.daemon = True
+
+    def run_checked(self):
+        """Queue the URLs until all are queued, the queue is shut down or
+        the task is stopped."""
+        self.name = "UrlProducer"
+        urlqueue = self.aggregate.urlqueue
+        try:
+            for url in self.urls:
+                if self.stopped(0) or not urlqueue.wait_not_full(self.maxsize):
+                    log.debug(LOG_CHECK, "Stopped queueing URLs")
+                    break
+                self.add_url(self.aggregate, url)
+        finally:
+            urlqueue.producer_done()
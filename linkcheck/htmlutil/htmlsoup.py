@@ -17,6 +17,7 @@
 HTML parser implemented using Beautiful Soup and html.parser.
 """
 
+import inspect
 import warnings
 
 warnings.filterwarnings(
@@ -27,6 +28,7 @@ warnings.filterwarnings(
 )
 
 import bs4
+import bs4.dammit
 
 # bs4 4.9.1 introduced MarkupResemblesLocatorWarning
 hasattr(bs4, "MarkupResemblesLocatorWarning") and warnings.simplefilter(
@@ -38,8 +40,23 @@ hasattr(bs4.builder, "XMLParsedAsHTMLWarning") and warnings.simplefilter(
     'ignore', bs4.builder.XMLParsedAsHTMLWarning
 )
 
+# bs4 4.10.0 renamed the override_encodings argument of UnicodeDammit
+if "known_definite_encodings" in inspect.signature(
+    bs4.dammit.UnicodeDammit
+).parameters:
+    encodings_argument = "known_definite_encodings"
+else:
+    encodings_argument = "override_encodings"
+
 
 def make_soup(markup, from_encoding=None):
     return bs4.BeautifulSoup(
         markup, "html.parser", from_encoding=from_encoding, multi_valued_attributes=None
     )
+
+
+def get_encoding(markup, from_encoding=None):
+    """Return the encoding of HTML markup as detected by make_soup(),
+    without building the document tree. Can be None."""
+    encodings = {encodings_argument: [from_encoding] if from_encoding else []}
+    return bs4.dammit.UnicodeDammit(markup, is_html=True, **encodings).original_encoding
@@ -17,6 +17,9 @@
 Find link tags in HTML text.
 """
 
+import codecs
+import collections
+import html.parser
 import re
 
 from .srcsetparse import parse_srcset
@@ -70,6 +73,13 @@ AnchorTags = {
     None: ['id'],
 }
 
+# elements without content, which are closed by their start tag
+EmptyTags = {
+    'area', 'base', 'basefont', 'bgsound', 'br', 'col', 'command', 'embed',
+    'frame', 'hr', 'image', 'img', 'input', 'isindex', 'keygen', 'link',
+    'menuitem', 'meta', 'nextid', 'param', 'source', 'spacer', 'track', 'wbr',
+}
+
 # WML tags
 WmlTags = {
     'a': ['href'],
@@ -78,6 +88,9 @@ WmlTags = {
 }
 
 
+# matcher for nofollow in <meta name=robots> tags
+nofollow_re = re.compile(r"\bnofollow\b", re.IGNORECASE)
+
 # matcher for <meta http-equiv=refresh> tags
 refresh_re = re.compile(r"(?i)^\d+;\s*url=(?P<url>.+)$")
 
@@ -98,6 +111,34 @@ def strip_c_comments(text):
     return c_comment_re.sub('', text)
 
 
+def find_css_links(text):
+    """Find url() patterns in CSS text.
+    @return: list of link tuples (url, line, column, page, name, base)
+    """
+    links = []
+    lineno = 0
+    for line in strip_c_comments(text).splitlines():
+        lineno += 1
+        for mo in css_url_re.finditer(line):
+            column = mo.start("url")
+            url = strformat.unquote(mo.group("url").strip())
+            links.append((url, lineno, column, 0, "", None))
+    return links
+
+
+def find_swf_links(data):
+    """Find URLs in SWF data.
+    @return: list of link tuples (url, line, column, page, name, base)
+    """
+    # We're scraping binary data for anything that looks like an URL using
+    # a regex that matches only ASCII characters.  Any non-ASCII characters
+    # in the URL are expected to be %-encoded.
+    return [
+        (mo.group().decode('ascii'), 0, 0, 0, "", None)
+        for mo in swf_url_re.finditer(data)
+    ]
+
+
 def is_meta_url(attr, attrs):
     """Check if the meta attributes contain a URL."""
     res = False
@@ -214,16 +255,212 @@ class LinkFinder:
         self.callback(url, line=lineno, column=column, name=name, base=base)
 
 
-def find_links(soup, callback, tags):
-    """Parse into content and search for URLs to check.
+def parse_links(text, callback, tags):
+    """Parse the HTML text and search for URLs to check.
     When a URL is found it is passed to the supplied callback.
     """
-    lf = LinkFinder(callback, tags)
-    for element in soup.find_all(True):
-        lf.html_element(
-            element.name,
-            element.attrs,
-            element.text.strip(),
-            element.sourceline,
-            None if element.sourcepos is None else element.sourcepos + 1,
-        )
+    parser = LinkParser(LinkFinder(callback, tags).html_element)
+    parser.feed(text)
+    parser.close()
+
+
+def has_text(tag, attrs):
+    """Check if the text of an element is used, which is only the case
+    for links (as link name) and the title. Getting the text of all
+    elements is expensive, since the text of <html> is the whole
+    document."""
+    return (tag == 'a' and 'href' in attrs) or tag == 'title'
+
+
+class Element:
+    """An element seen by LinkParser that has not been passed to the
+    handler yet."""
+
+    __slots__ = ("tag", "attrs", "texts", "lineno", "column", "done")
+
+    def __init__(self, tag, attrs, lineno, column):
+        """Store the start tag. The text is collected if it is used."""
+        self.tag = tag
+        self.attrs = attrs
+        self.texts = [] if has_text(tag, attrs) else None
+        self.lineno = lineno
+        self.column = column
+        self.done = self.texts is None
+
+    def get_text(self):
+        """Return the stripped text of the element."""
+        return '' if self.texts is None else ''.join(self.texts).strip()
+
+
+class LinkParser(html.parser.HTMLParser):
+    """Streaming HTML parser passing the elements to a handler with the
+    arguments of LinkFinder.html_element(), in document order, without
+    building a document tree.
+
+    Elements are opened and closed as in the html.parser tree builder of
+    Beautiful Soup, so the element text and positions are the same.
+    """
+
+    def __init__(self, handler):
+        """Initialize the parser state."""
+        super().__init__(convert_charrefs=True)
+        self.handler = handler
+        # open elements, as (tag, Element or None)
+        self.stack = []
+        # open elements whose text is collected
+        self.text_elements = []
+        # elements not yet passed to the handler, waiting for the text
+        # of an open element before them
+        self.pending = collections.deque()
+
+    def handle_starttag(self, tag, attrs):
+        """Add element, with the last value of duplicate attributes."""
+        attrs = {key: '' if value is None else value for key, value in attrs}
+        lineno, column = self.getpos()
+        element = Element(tag, attrs, lineno, column + 1)
+        self.pending.append(element)
+        if element.texts is not None:
+            self.text_elements.append(element)
+        if tag not in EmptyTags:
+            self.stack.append((tag, element if element.texts is not None else None))
+        self.flush()
+
+    def handle_endtag(self, tag):
+        """Close the element and all elements opened after it."""
+        for index in range(len(self.stack) - 1, -1, -1):
+            if self.stack[index][0] == tag:
+                break
+        else:
+            # stray end tag
+            return
+        for dummy, element in self.stack[index:]:
+            if element is not None:
+                element.done = True
+                self.text_elements.remove(element)
+        del self.stack[index:]
+        self.flush()
+
+    def handle_data(self, data):
+        """Add text to the open elements whose text is used."""
+        for element in self.text_elements:
+            element.texts.append(data)
+
+    def close(self):
+        """Parse the remaining data and close all open elements."""
+        super().close()
+        for element in self.pending:
+            element.done = True
+        self.flush()
+        self.stack = []
+        self.text_elements = []
+
+    def flush(self):
+        """Pass the pending elements to the handler, up to the first one
+        whose text is still collected."""
+        while self.pending and self.pending[0].done:
+            element = self.pending.popleft()
+            self.handler(
+                element.tag,
+                element.attrs,
+                element.get_text(),
+                element.lineno,
+                element.column,
+            )
+
+
+class Document:
+    """Links, anchors and metadata of an HTML document, collected with
+    one pass over its elements."""
+
+    def __init__(self, tags=LinkTags):
+        """Initialize empty results."""
+        # found links and anchors, as (url, line, column, name, base)
+        self.links = []
+        self.anchors = []
+        # href of the first <base> tag
+        self.base_ref = ''
+        # content of <meta name="robots"> tags
+        self.robots = []
+        # text of the first <title> tag, or None
+        self.title = None
+        self.link_finder = LinkFinder(self.add_link, tags)
+        self.anchor_finder = LinkFinder(self.add_anchor, AnchorTags)
+
+    def __getstate__(self):
+        """Return the results for pickling, without the link finders."""
+        state = self.__dict__.copy()
+        del state["link_finder"]
+        del state["anchor_finder"]
+        return state
+
+    def html_element(self, tag, attrs, element_text, lineno, column):
+        """Search element for links, anchors and metadata."""
+        self.link_finder.html_element(tag, attrs, element_text, lineno, column)
+        self.base_ref = self.link_finder.base_ref
+        self.anchor_finder.html_element(tag, attrs, element_text, lineno, column)
+        if tag == 'meta' and attrs.get('name', '').lower() == 'robots':
+            self.robots.append(attrs.get('content') or '')
+        elif tag == 'title' and self.title is None:
+            self.title = element_text
+
+    def add_link(self, url, line, column, name, base):
+        """Store found link."""
+        self.links.append((url, line, column, name, base))
+
+    def add_anchor(self, url, line, column, name, base):
+        """Store found anchor."""
+        self.anchors.append((url, line, column, name, base))
+
+    def allows_robots(self):
+        """Return False if a meta robots tag forbids robots to follow the
+        links of this document."""
+        return not any(nofollow_re.search(content) for content in self.robots)
+
+    def find_links(self, callback):
+        """Pass the found links to the callback, like parse_links()."""
+        for url, line, column, name, base in self.links:
+            callback(url, line=line, column=column, name=name, base=base)
+
+
+def parse_document(text, tags=LinkTags):
+    """Find links of the given tags, anchors and metadata of the HTML
+    text with one pass over its elements.
+    @return: Document instance
+    """
+    document = Document(tags)
+    parser = LinkParser(document.html_element)
+    parser.feed(text)
+    parser.close()
+    return document
+
+
+class DocumentFeed:
+    """Parse an HTML document incrementally while it is downloaded, so
+    that the content needs no second pass. The found links are kept in
+    the document, the caller queues them once the download has
+    succeeded.
+    """
+
+    def __init__(self, encoding, tags=LinkTags):
+        """Initialize the parser of data in the given encoding.
+        @raises LookupError: if the encoding is unknown
+        """
+        self.encoding = codecs.lookup(encoding).name
+        self.decoder = codecs.getincrementaldecoder(self.encoding)()
+        self.document = Document(tags)
+        self.parser = LinkParser(self.document.html_element)
+
+    def feed(self, data):
+        """Parse the next chunk of data.
+        @raises UnicodeDecodeError: if the data cannot be decoded
+        """
+        self.parser.feed(self.decoder.decode(data))
+
+    def close(self):
+        """Parse the remaining data.
+        @return: Document instance
+        @raises UnicodeDecodeError: if the data cannot be decoded
+        """
+        self.parser.feed(self.decoder.decode(b'', final=True))
+        self.parser.close()
+        return self.document
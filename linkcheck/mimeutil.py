@@ -64,7 +64,8 @@ PARSE_CONTENTS = {
 
 def guess_mimetype(filename, read=None):
     """Return MIME type of file, or 'application/octet-stream' if it could
-    not be determined."""
+    not be determined. If given, read() returns the start of the content
+    as string, which is looked at for some MIME types."""
     mime, encoding = None, None
     if mimedb:
         mime, encoding = mimedb.guess_type(filename, strict=False)
@@ -89,7 +90,7 @@ def guess_mimetype(filename, read=None):
 
 
 def guess_mimetype_read(read):
-    """Try to read some content and do a poor man's file(1)."""
+    """Try to read the start of the content and do a poor man's file(1)."""
     mime = None
     try:
         data = read()[:70]
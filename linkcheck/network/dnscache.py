@@ -0,0 +1,208 @@
+# Copyright (C) 2024 LinkChecker Authors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Process-wide cache of DNS lookups.
+
+While installed, all calls of socket.getaddrinfo(), including the ones of
+the HTTP stack, and the DNS queries of mailto: checks are answered from
+the cache. Failed lookups of unknown hosts are cached as well, and
+concurrent lookups of the same name are done only once.
+"""
+import copy
+import socket
+import threading
+import time
+
+from dns import resolver
+
+from ..lock import get_lock
+from .. import log, LOG_CACHE
+
+# the uncached lookup function
+_getaddrinfo = socket.getaddrinfo
+
+# getaddrinfo() errors meaning the host does not exist
+NEGATIVE_ERRORS = {
+    getattr(socket, name)
+    for name in ("EAI_NONAME", "EAI_NODATA")
+    if hasattr(socket, name)
+}
+
+# number of cached entries before expired entries are removed
+MAX_ENTRIES = 10000
+
+# the installed cache, or None if lookups are not cached
+cache = None
+
+
+def new_error(error):
+    """Return a new exception with the type, arguments and attributes of
+    the given one. Each raise changes the traceback of an exception, so
+    an exception shared by threads is not raised itself."""
+    return copy.copy(error)
+
+
+class Lookup:
+    """A running lookup other threads can wait for."""
+
+    def __init__(self):
+        """Initialize the result."""
+        self.done = threading.Event()
+        self.result = self.error = None
+
+
+class DnsCache:
+    """
+    Thread-safe cache of DNS lookup results and errors.
+    format: {key -> (expiration time, result, error)}
+    """
+
+    def __init__(self, ttl, negative_ttl):
+        """Initialize the cache.
+
+        @param ttl: seconds to keep results without own time to live
+        @param negative_ttl: seconds to keep errors of unknown names
+        """
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.entries = {}
+        self.lookups = {}
+        self.lock = get_lock("dns_cache_lock")
+        self.hits = self.misses = 0
+
+    def get(self, key, resolve, is_negative, get_expiration=None):
+        """Return the cached result for key, or call resolve() to get it.
+        Cached errors are raised again.
+
+        @param resolve: function returning the lookup result
+        @param is_negative: function telling if a raised error is cached
+        @param get_expiration: function returning the expiration time of
+          a result; by default results expire after the configured ttl
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] > time.time():
+                self.hits += 1
+                expiration, result, error = entry
+                if error is not None:
+                    raise new_error(error)
+                return result
+            self.misses += 1
+            lookup = self.lookups.get(key)
+            running = lookup is not None
+            if not running:
+                lookup = self.lookups[key] = Lookup()
+        if running:
+            # another thread is already resolving this name
+            lookup.done.wait()
+            if lookup.error is not None:
+                raise new_error(lookup.error)
+            return lookup.result
+        expiration = None
+        try:
+            lookup.result = resolve()
+            if get_expiration is not None:
+                expiration = get_expiration(lookup.result)
+            elif self.ttl > 0:
+                expiration = time.time() + self.ttl
+            return lookup.result
+        except BaseException as exc:
+            # the raised exception is only used by this thread; waiting
+            # threads also get interrupts like KeyboardInterrupt, which
+            # are never cached
+            lookup.error = new_error(exc)
+            if self.negative_ttl > 0 and is_negative(exc):
+                expiration = time.time() + self.negative_ttl
+            raise
+        finally:
+            with self.lock:
+                del self.lookups[key]
+                if expiration is not None:
+                    self.entries[key] = (expiration, lookup.result, lookup.error)
+                    if len(self.entries) > MAX_ENTRIES:
+                        self.expire()
+            lookup.done.set()
+
+    def expire(self):
+        """Remove expired entries; if there are still too many, remove
+        the ones expiring first. Not thread-safe!"""
+        now = time.time()
+        entries = sorted(
+            (entry[0], key) for key, entry in self.entries.items()
+        )
+        for num, (expiration, key) in enumerate(entries):
+            if expiration > now and len(entries) - num <= MAX_ENTRIES // 2:
+                break
+            del self.entries[key]
+
+    def get_stats(self):
+        """Return dictionary with hit statistics."""
+        return dict(hits=self.hits, misses=self.misses)
+
+
+def install(ttl, negative_ttl):
+    """Cache all DNS lookups with the given times to live in seconds,
+    until uninstall() is called. With zero times to live nothing is
+    cached."""
+    global cache
+    if ttl > 0 or negative_ttl > 0:
+        cache = DnsCache(ttl, negative_ttl)
+        socket.getaddrinfo = getaddrinfo
+    else:
+        uninstall()
+
+
+def uninstall():
+    """Remove the cache and restore the original socket.getaddrinfo()."""
+    global cache
+    if cache is not None:
+        log.debug(LOG_CACHE, "DNS cache statistics %s", cache.get_stats())
+    cache = None
+    socket.getaddrinfo = _getaddrinfo
+
+
+def is_unknown_host(exc):
+    """Check if a getaddrinfo() error means the host does not exist."""
+    return isinstance(exc, socket.gaierror) and exc.errno in NEGATIVE_ERRORS
+
+
+def getaddrinfo(host, port, family=0, type=0, proto=0, flags=0):
+    """Cached version of socket.getaddrinfo()."""
+    args = (host, port, family, type, proto, flags)
+    if cache is None:
+        return _getaddrinfo(*args)
+    result = cache.get(
+        ("getaddrinfo",) + args, lambda: _getaddrinfo(*args), is_unknown_host
+    )
+    return list(result)
+
+
+def is_unknown_name(exc):
+    """Check if a DNS error means the name or record does not exist."""
+    return isinstance(exc, (resolver.NXDOMAIN, resolver.NoAnswer))
+
+
+def resolve(qname, rdtype, search=True):
+    """Cached version of dns.resolver.resolve(). Answers are kept as
+    long as the time to live of the DNS records allows."""
+    if cache is None:
+        return resolver.resolve(qname, rdtype, search=search)
+    return cache.get(
+        ("resolve", qname.lower(), rdtype, search),
+        lambda: resolver.resolve(qname, rdtype, search=search),
+        is_unknown_name,
+        get_expiration=lambda answer: answer.expiration,
+    )
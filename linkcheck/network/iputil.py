@@ -21,6 +21,7 @@ import ipaddress
 import re
 import socket
 from .. import log, LOG_CHECK
+from . import dnscache
 
 
 def is_valid_ip(ip):
@@ -42,7 +43,7 @@ def resolve_host(host):
     """
     ips = []
     try:
-        for res in socket.getaddrinfo(host, None, 0, socket.SOCK_STREAM):
+        for res in dnscache.getaddrinfo(host, None, 0, socket.SOCK_STREAM):
             # res is a tuple (address family, socket type, protocol,
             #  canonical name, socket address)
             # add first ip of socket address
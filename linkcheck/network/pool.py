@@ -0,0 +1,78 @@
+# Copyright (C) 2024 LinkChecker Authors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Connections shared by all checker threads.
+"""
+import requests.adapters
+
+from ..lock import get_semaphore
+
+# minimum number of hosts with pooled connections
+MIN_POOLED_HOSTS = 10
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of HTTP(S) connections shared by the request
+    sessions of all checker threads, so that a connection opened by one
+    thread can be reused by the others.
+
+    The number of connections to one host is limited by the
+    maxconnectionsperhost option, the number of connections of a scheme
+    to all hosts by the maxconnectionshttp, maxconnectionshttps and
+    maxconnectionsftp options. A limit of zero means no limit.
+    """
+
+    def __init__(self, config):
+        """Create the shared transport adapter and the global connection
+        slots."""
+        threads = max(1, config["threads"])
+        perhost = config["maxconnectionsperhost"]
+        self.adapter = requests.adapters.HTTPAdapter(
+            pool_connections=max(MIN_POOLED_HOSTS, 2 * threads),
+            pool_maxsize=perhost or threads,
+            pool_block=bool(perhost),
+        )
+        self.slots = {
+            scheme: get_semaphore("%s_connections" % scheme, value=limit)
+            for scheme, limit in config.get_connectionlimits().items()
+            if limit
+        }
+
+    def mount(self, session):
+        """Use the shared connections for HTTP(S) requests of the given
+        session."""
+        for prefix in ("http://", "https://"):
+            session.mount(prefix, self.adapter)
+
+    def acquire(self, scheme):
+        """Wait for a free connection slot of the given scheme.
+        @return: True if a slot has been acquired, False if the scheme
+          has no connection limit
+        """
+        slot = self.slots.get(scheme)
+        if slot is None:
+            return False
+        slot.acquire()
+        return True
+
+    def release(self, scheme):
+        """Release an acquired connection slot of the given scheme."""
+        self.slots[scheme].release()
+
+    def close(self):
+        """Close all pooled connections."""
+        self.adapter.close()
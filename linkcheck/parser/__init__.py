@@ -16,7 +16,8 @@
 """
 Main functions for link parsing
 """
-from .. import strformat, url as urlutil
+from .. import url as urlutil
+from ..checker import get_index_urls
 from ..htmlutil import linkparse
 from ..bookmarks import firefox
 
@@ -24,8 +25,7 @@ from ..bookmarks import firefox
 def parse_url(url_data):
     """Parse a URL."""
     if url_data.is_directory():
-        # both ftp and file links represent directories as HTML data
-        key = "html"
+        key = "directory"
     elif (
         url_data.is_file()
         and firefox.has_sqlite
@@ -45,11 +45,17 @@ def parse_url(url_data):
         url_data.aggregate.plugin_manager.run_parser_plugins(url_data, pagetype=key)
 
 
+def parse_directory(url_data):
+    """Add the entries of a file or FTP directory to the URL queue."""
+    for url, name in get_index_urls(url_data.get_directory_entries()):
+        url_data.add_url(url, name=name)
+
+
 def parse_html(url_data):
     """Parse into HTML content and search for URLs to check.
     Found URLs are added to the URL queue.
     """
-    linkparse.find_links(url_data.get_soup(), url_data.add_url, linkparse.LinkTags)
+    url_data.get_document().find_links(url_data.add_url)
 
 
 def parse_opera(url_data):
@@ -92,33 +98,32 @@ def parse_css(url_data):
     """
     Parse a CSS file for url() patterns.
     """
-    lineno = 0
-    linkfinder = linkparse.css_url_re.finditer
-    strip_comments = linkparse.strip_c_comments
-    for line in strip_comments(url_data.get_content()).splitlines():
-        lineno += 1
-        for mo in linkfinder(line):
-            column = mo.start("url")
-            url = strformat.unquote(mo.group("url").strip())
-            url_data.add_url(url, line=lineno, column=column)
+    links = url_data.aggregate.run_parser(
+        linkparse.find_css_links, url_data.get_content()
+    )
+    add_links(url_data, links)
 
 
 def parse_swf(url_data):
     """Parse a SWF file for URLs."""
-    linkfinder = linkparse.swf_url_re.finditer
-    for mo in linkfinder(url_data.get_raw_content()):
-        # We're scraping binary data for anything that looks like an URL using
-        # a regex that matches only ASCII characters.  Any non-ASCII characters
-        # in the URL are expected to be %-encoded.
-        url = mo.group().decode('ascii')
-        url_data.add_url(url)
+    links = url_data.aggregate.run_parser(
+        linkparse.find_swf_links, url_data.get_raw_content()
+    )
+    add_links(url_data, links)
+
+
+def add_links(url_data, links):
+    """Add found links, as tuples (url, line, column, page, name, base),
+    to the URL queue."""
+    for url, line, column, page, name, base in links:
+        url_data.add_url(url, line=line, column=column, page=page, name=name, base=base)
 
 
 def parse_wml(url_data):
     """Parse into WML content and search for URLs to check.
     Found URLs are added to the URL queue.
     """
-    linkparse.find_links(url_data.get_soup(), url_data.add_url, linkparse.WmlTags)
+    linkparse.parse_links(url_data.get_content(), url_data.add_url, linkparse.WmlTags)
 
 
 def parse_firefox(url_data):
@@ -0,0 +1,82 @@
+# Copyright (C) 2024 LinkChecker Authors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Worker processes extracting links of downloaded content.
+"""
+import concurrent.futures
+import multiprocessing
+
+from .. import log, LOG_CHECK
+from ..lock import get_lock
+
+
+class ParserPool:
+    """
+    Pool of worker processes running CPU-heavy parse functions, so that
+    parsing is not limited to the one CPU the checker threads share.
+
+    The parse functions must be module-level functions with picklable
+    arguments and results. While a checker thread waits for a result,
+    the other threads keep running.
+    """
+
+    def __init__(self, processes):
+        """Start the given number of worker processes. The processes are
+        spawned, since forking a process with running threads is not
+        safe."""
+        self.executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=processes, mp_context=multiprocessing.get_context("spawn")
+        )
+        self.broken = False
+        self.closed = False
+        self.lock = get_lock("parser_pool_lock")
+        # submitted futures without a result yet
+        self.pending = set()
+
+    def run(self, func, *args):
+        """Return the result of func(*args) computed in a worker process.
+        If the pool is broken, e.g. because a worker process has been
+        killed, or has been closed, e.g. because the check is aborted,
+        the function is run in the calling thread."""
+        if not self.broken:
+            try:
+                with self.lock:
+                    future = None
+                    if not self.closed:
+                        future = self.executor.submit(func, *args)
+                        self.pending.add(future)
+                if future is not None:
+                    try:
+                        return future.result()
+                    finally:
+                        with self.lock:
+                            self.pending.discard(future)
+            except concurrent.futures.process.BrokenProcessPool as msg:
+                log.warn(LOG_CHECK, "Parsing in checker threads: %s", msg)
+                self.broken = True
+            except concurrent.futures.CancelledError:
+                log.debug(LOG_CHECK, "Parsing in checker thread after close")
+        return func(*args)
+
+    def close(self):
+        """Cancel the pending parse functions and stop the worker
+        processes."""
+        # shutdown(cancel_futures=True) needs Python 3.9
+        with self.lock:
+            self.closed = True
+            for future in self.pending:
+                future.cancel()
+        self.executor.shutdown()
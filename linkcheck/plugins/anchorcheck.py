@@ -20,7 +20,6 @@ import urllib.parse
 
 from . import _ContentPlugin
 from .. import log, LOG_PLUGIN
-from ..htmlutil import linkparse
 
 
 class AnchorCheck(_ContentPlugin):
@@ -33,18 +32,49 @@ class AnchorCheck(_ContentPlugin):
     def check(self, url_data):
         """Check content for invalid anchors."""
         log.debug(LOG_PLUGIN, "checking content for invalid anchors")
-        url_anchor_check = UrlAnchorCheck()
-        linkparse.find_links(
-            url_data.get_soup(), url_anchor_check.add_anchor, linkparse.AnchorTags)
+        url_anchor_check = UrlAnchorCheck(url_data.get_document().anchors)
         url_anchor_check.check_anchor(url_data)
+        # URLs with other anchors of this document are checked against
+        # the same anchors
+        url_data.anchor_check = url_anchor_check
+
+
+def check_document_anchor(url_data, result, url_anchor_check):
+    """Turn a copy of the result of a document checked for another anchor
+    into the result of the given URL data, by checking its anchor, if
+    any, against the anchors of the document instead.
+
+    @param result: copy of the document result, modified in place
+    @param url_anchor_check: UrlAnchorCheck instance of the document, or
+      None if the anchor of the document was not checked
+    """
+    result.url = url_data.url
+    result.cache_url = url_data.cache_url
+    result.warnings = result.warnings[:]
+    result.info = result.info[:]
+    if url_anchor_check is not None:
+        if url_anchor_check.message is not None:
+            message = url_anchor_check.message
+            result.warnings = [w for w in result.warnings if w[1] != message]
+            result.info = [i for i in result.info if i != message]
+        if url_data.anchor:
+            UrlAnchorCheck(url_anchor_check.anchors).check_anchor(url_data)
+    for warning in url_data.warnings:
+        if warning not in result.warnings:
+            result.warnings.append(warning)
+    for info in url_data.info:
+        if info not in result.info:
+            result.info.append(info)
 
 
 class UrlAnchorCheck:
     """Class to thread-safely handle collecting anchors for a URL"""
 
-    def __init__(self):
+    def __init__(self, anchors=None):
         # list of parsed anchors
-        self.anchors = []
+        self.anchors = [] if anchors is None else anchors
+        # message added if the anchor was not found
+        self.message = None
 
     def add_anchor(self, url, line, column, name, base):
         """Add anchor URL."""
@@ -70,4 +100,5 @@ class UrlAnchorCheck:
             _("Anchor `%(name)s' (decoded: `%(decoded)s') not found.") % args,
             _("Available anchors: %(anchors)s.") % args,
         )
+        self.message = msg
         url_data.add_warning(msg)
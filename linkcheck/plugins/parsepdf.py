@@ -31,9 +31,10 @@ except ImportError:
 else:
     has_pdflib = True
 from .. import log, LOG_PLUGIN
+from ..parser import add_links
 
 
-def search_url(obj, url_data, pageno, seen_objs):
+def search_url(obj, links, pageno, seen_objs):
     """Recurse through a PDF object, searching for URLs."""
     if isinstance(obj, PDFObjRef):
         if obj.objid in seen_objs:
@@ -44,14 +45,37 @@ def search_url(obj, url_data, pageno, seen_objs):
     if isinstance(obj, dict):
         for key, value in obj.items():
             if key == 'URI':
-                url_data.add_url(value.decode("ascii"), page=pageno)
+                links.append((value.decode("ascii"), 0, 0, pageno, "", None))
             else:
-                search_url(value, url_data, pageno, seen_objs)
+                search_url(value, links, pageno, seen_objs)
     elif isinstance(obj, list):
         for elem in obj:
-            search_url(elem, url_data, pageno, seen_objs)
+            search_url(elem, links, pageno, seen_objs)
     elif isinstance(obj, PDFStream):
-        search_url(obj.attrs, url_data, pageno, seen_objs)
+        search_url(obj.attrs, links, pageno, seen_objs)
+
+
+def find_links(data, password=''):
+    """Find URLs in PDF data.
+    @return: list of link tuples (url, line, column, page, name, base)
+    """
+    links = []
+    # PDFParser needs a seekable file object
+    fp = BytesIO(data)
+    try:
+        parser = PDFParser(fp)
+        doc = PDFDocument(parser, password=password)
+        for (pageno, page) in enumerate(PDFPage.create_pages(doc), start=1):
+            if "Contents" in page.attrs:
+                search_url(page.attrs["Contents"], links, pageno, set())
+            if "Annots" in page.attrs:
+                search_url(page.attrs["Annots"], links, pageno, set())
+    except PSException as msg:
+        if not msg.args:
+            # at least show the class name
+            msg = repr(msg)
+        log.warn(LOG_PLUGIN, "Error parsing PDF file: %s", msg)
+    return links
 
 
 class PdfParser(_ParserPlugin):
@@ -70,20 +94,5 @@ class PdfParser(_ParserPlugin):
     def check(self, url_data):
         """Parse PDF data."""
         # XXX user authentication from url_data
-        password = ''
-        data = url_data.get_raw_content()
-        # PDFParser needs a seekable file object
-        fp = BytesIO(data)
-        try:
-            parser = PDFParser(fp)
-            doc = PDFDocument(parser, password=password)
-            for (pageno, page) in enumerate(PDFPage.create_pages(doc), start=1):
-                if "Contents" in page.attrs:
-                    search_url(page.attrs["Contents"], url_data, pageno, set())
-                if "Annots" in page.attrs:
-                    search_url(page.attrs["Annots"], url_data, pageno, set())
-        except PSException as msg:
-            if not msg.args:
-                # at least show the class name
-                msg = repr(msg)
-            log.warn(LOG_PLUGIN, "Error parsing PDF file: %s", msg)
+        links = url_data.aggregate.run_parser(find_links, url_data.get_raw_content())
+        add_links(url_data, links)
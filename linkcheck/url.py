@@ -20,6 +20,7 @@ Functions for parsing and matching URL strings.
 import os
 import re
 import urllib.parse
+from functools import lru_cache
 
 for scheme in ('ldap', 'irc'):
     if scheme not in urllib.parse.uses_netloc:
@@ -33,6 +34,9 @@ for scheme in ('ldap', 'irc'):
 # http://code.google.com/p/browsersec/wiki/Part1#Unicode_in_URLs
 url_encoding = "utf-8"
 
+# number of memoized results of the URL normalization functions
+CACHE_SIZE = 10000
+
 default_ports = {
     'http': 80,
     'https': 443,
@@ -148,6 +152,7 @@ def parse_qsl(qs, encoding, keep_blank_values=0, strict_parsing=0):
     return r
 
 
+@lru_cache(CACHE_SIZE)
 def idna_encode(host):
     """Encode hostname as internationalized domain name (IDN) according
     to RFC 3490.
@@ -210,16 +215,22 @@ def url_fix_host(urlparts, encoding):
         userpass += "@"
     else:
         userpass = ""
-    if urlparts[0] in default_ports:
-        dport = default_ports[urlparts[0]]
-        host, port = splitport(netloc, port=dport)
+    urlparts[1] = userpass + norm_hostport(urlparts[0], netloc)
+    return is_idn
+
+
+def norm_hostport(scheme, hostport):
+    """Remove the default port of the scheme and a trailing dot of the
+    host name from a host[:port] string."""
+    if scheme in default_ports:
+        dport = default_ports[scheme]
+        host, port = splitport(hostport, port=dport)
         if host.endswith("."):
             host = host[:-1]
         if port != dport:
             host = f"{host}:{port}"
-        netloc = host
-    urlparts[1] = userpass + netloc
-    return is_idn
+        hostport = host
+    return hostport
 
 
 def url_fix_mailto_urlsplit(urlparts):
@@ -274,6 +285,7 @@ def urlunsplit(urlparts):
     return res
 
 
+@lru_cache(CACHE_SIZE)
 def url_norm(url, encoding):
     """Normalize the given URL which must be quoted. Supports unicode
     hostnames (IDNA encoding) according to RFC 3490.
@@ -362,6 +374,66 @@ def collapse_segments(path):
 url_is_absolute = re.compile(r"^[-\.a-z]+:", re.I).match
 
 
+def url_join_parent(parent_url, url):
+    """Return the part of the parent URL needed to join url with it.
+    Links of pages in the same directory share the result, so that
+    url_join_norm() is cached for all of them. URLs with a scheme, which
+    urljoin() still joins with a parent of the same scheme, are joined
+    with the whole parent URL.
+    """
+    if not (parent_url and url) or url[0] in "?#" or url.startswith("//"):
+        return parent_url
+    if urllib.parse.urlsplit(url).scheme:
+        return parent_url
+    urlparts = list(urllib.parse.urlsplit(parent_url))
+    if urlparts[2].startswith("//"):
+        # UNC path, which would be mistaken for a host
+        return parent_url
+    if url[0] == "/":
+        # only scheme and host are used
+        urlparts[2] = "/"
+    else:
+        urlparts[2] = urlparts[2][: urlparts[2].rfind("/") + 1]
+    urlparts[3] = urlparts[4] = ""
+    return urllib.parse.urlunsplit(urlparts)
+
+
+@lru_cache(CACHE_SIZE)
+def url_join_norm(parent_url, url):
+    """Join parent URL and url like urljoin(). Since joining can unnorm
+    the path, the path of the result is normed again.
+
+    @return: joined url
+    """
+    url = urllib.parse.urljoin(parent_url, url)
+    urlparts = list(urllib.parse.urlsplit(url))
+    if urlparts[2]:
+        urlparts[2] = collapse_segments(urlparts[2])
+        if not urlparts[0].startswith("feed"):
+            # restore second / in http[s]:// in wayback path
+            urlparts[2] = url_fix_wayback_query(urlparts[2])
+    return urlunsplit(urlparts)
+
+
+# memoized URL functions
+cached_functions = (idna_encode, url_norm, url_join_norm)
+
+
+def get_cache_stats():
+    """Return dictionary with hit statistics of the URL caches."""
+    stats = {}
+    for func in cached_functions:
+        info = func.cache_info()
+        stats[func.__name__] = dict(hits=info.hits, misses=info.misses)
+    return stats
+
+
+def clear_caches():
+    """Remove all memoized results."""
+    for func in cached_functions:
+        func.cache_clear()
+
+
 def url_quote(url, encoding):
     """Quote given URL."""
     if not url_is_absolute(url):
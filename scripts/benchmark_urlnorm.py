@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# Copyright (C) 2024 LinkChecker Authors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Measure building the URLs of a generated web site with and without the
+URL normalization caches.
+
+Usage: $0 [sections] [pages per section]
+"""
+import sys
+import time
+
+from linkcheck import configuration, director, url as urlutil
+from linkcheck.checker import get_url_from
+
+# links on every page: navigation, footer and external links
+site_links = (
+    ["/", "/index.html", "/search?q=", "#top", "#content"]
+    + ["/section%d/" % num for num in range(10)]
+    + ["https://www.example.net/", "https://example.com/share?u=x"]
+    + ["mailto:info@example.org", "http://b\xfccher.example/"]
+)
+
+# links of pages in the same section
+section_links = ["index.html", "../index.html", "./", "img/logo.png"]
+
+
+def get_links(sections, pages):
+    """Return list of (parent URL, link) of a generated web site."""
+    links = []
+    for section in range(sections):
+        for page in range(pages):
+            parent_url = "http://www.example.org/section%d/page%d.html" % (
+                section,
+                page,
+            )
+            for link in site_links + section_links:
+                links.append((parent_url, link))
+            # links to the neighbour pages and an article
+            for num in (page - 1, page + 1):
+                links.append((parent_url, "page%d.html" % num))
+            links.append((parent_url, "/articles/%d/%d.html" % (section, page)))
+    return links
+
+
+def build_urls(url_datas, cached):
+    """Build the URLs and return the seconds needed."""
+    urlutil.clear_caches()
+    start = time.perf_counter()
+    for url_data in url_datas:
+        if not cached:
+            urlutil.clear_caches()
+        url_data.build_url()
+    return time.perf_counter() - start
+
+
+def main(args):
+    sections = int(args[0]) if args else 20
+    pages = int(args[1]) if len(args) > 1 else 50
+    config = configuration.Configuration()
+    aggregate = director.get_aggregate(config)
+    links = get_links(sections, pages)
+    url_datas = [
+        get_url_from(link, 1, aggregate, parent_url=parent_url)
+        for parent_url, link in links
+    ]
+    uncached = min(build_urls(url_datas, False) for dummy in range(3))
+    cached = min(build_urls(url_datas, True) for dummy in range(3))
+    print("%d links" % len(url_datas))
+    print("uncached: %.3f seconds" % uncached)
+    print("cached:   %.3f seconds" % cached)
+    print("speedup:  %.1fx" % (uncached / cached))
+    for name, stats in urlutil.get_cache_stats().items():
+        total = stats["hits"] + stats["misses"]
+        print(
+            "%s: %d hits, %d misses (%.1f%%)"
+            % (name, stats["hits"], stats["misses"], 100.0 * stats["hits"] / total)
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
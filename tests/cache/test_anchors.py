@@ -0,0 +1,56 @@
+# Copyright (C) 2024 LinkChecker Authors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test the index of documents checked for anchors.
+"""
+import threading
+import unittest
+
+from linkcheck.cache.anchors import AnchorIndex
+
+
+class TestAnchorIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = AnchorIndex(size=10)
+
+    def test_get_add(self):
+        self.assertIsNone(self.index.get("http://example.org/"))
+        self.index.add("http://example.org/", "result", None)
+        self.assertEqual(self.index.get("http://example.org/"), ("result", None))
+        self.assertEqual(self.index.get_stats(), dict(hits=1, misses=1))
+
+    def test_lock_released(self):
+        url = "http://example.org/"
+        with self.index.lock_document(url):
+            self.assertIn(url, self.index.document_locks)
+        self.assertFalse(self.index.document_locks)
+
+    def test_lock_waiting(self):
+        url = "http://example.org/"
+        entered = []
+        with self.index.lock_document(url):
+            thread = threading.Thread(target=self.wait_document, args=(url, entered))
+            thread.start()
+            while self.index.document_locks[url][1] < 2:
+                thread.join(0.01)
+            self.assertFalse(entered)
+        thread.join()
+        self.assertEqual(entered, [url])
+        self.assertFalse(self.index.document_locks)
+
+    def wait_document(self, url, entered):
+        with self.index.lock_document(url):
+            entered.append(url)
@@ -0,0 +1,148 @@
+# Copyright (C) 2024 LinkChecker Authors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+import threading
+import time
+import unittest
+
+from linkcheck.cache.hosts import CircuitBreaker, HostScheduler
+
+
+class TestHostScheduler(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = HostScheduler(10)
+
+    def test_reserve_first(self):
+        self.assertEqual(self.scheduler.reserve("example.org"), 0)
+
+    def test_reserve_same_host(self):
+        self.scheduler.reserve("example.org")
+        wait = self.scheduler.reserve("example.org")
+        self.assertGreaterEqual(wait, HostScheduler.wait_time_min_default - 0.01)
+        self.assertLessEqual(wait, HostScheduler.wait_time_max_default)
+
+    def test_reserve_slots_accumulate(self):
+        self.scheduler.reserve("example.org")
+        wait1 = self.scheduler.reserve("example.org")
+        wait2 = self.scheduler.reserve("example.org")
+        self.assertGreater(wait2, wait1)
+
+    def test_reserve_other_host(self):
+        self.scheduler.reserve("example.org")
+        self.scheduler.reserve("example.org")
+        self.assertEqual(self.scheduler.reserve("example.com"), 0)
+
+    def test_maxrated(self):
+        scheduler = HostScheduler(100)
+        scheduler.set_maxrated("example.org")
+        self.assertEqual(
+            scheduler.get_wait_times("example.org"),
+            (scheduler.wait_time_min, scheduler.wait_time_max),
+        )
+        self.assertEqual(
+            scheduler.get_wait_times("example.com"),
+            (
+                HostScheduler.wait_time_min_default,
+                HostScheduler.wait_time_max_default,
+            ),
+        )
+
+    def test_add_latency(self):
+        wait_time_min, wait_time_max = self.scheduler.get_wait_times("example.org")
+        self.assertEqual(self.scheduler.get_delay("example.org"), wait_time_max)
+        self.scheduler.add_latency("example.org", 5.0)
+        self.assertEqual(self.scheduler.get_delay("example.org"), wait_time_max)
+        self.scheduler.add_latency("example.org", 0.01)
+        self.assertLess(self.scheduler.get_delay("example.org"), wait_time_max)
+        for dummy in range(100):
+            self.scheduler.add_latency("example.org", 0.01)
+        self.assertEqual(self.scheduler.get_delay("example.org"), wait_time_min)
+
+    def test_back_off(self):
+        wait_time_max = self.scheduler.get_wait_times("example.org")[1]
+        self.scheduler.back_off("example.org")
+        self.assertEqual(self.scheduler.get_delay("example.org"), 2 * wait_time_max)
+        for dummy in range(20):
+            self.scheduler.back_off("example.org")
+        self.assertEqual(
+            self.scheduler.get_delay("example.org"), HostScheduler.backoff_max
+        )
+
+    def test_retry_after(self):
+        self.scheduler.back_off("example.org", retry_after=30)
+        self.assertGreater(self.scheduler.reserve("example.org"), 29)
+
+    def test_crawl_delay(self):
+        self.scheduler.set_crawl_delay("example.org", 5)
+        self.assertEqual(self.scheduler.get_wait_times("example.org"), (5, 5))
+        self.scheduler.reserve("example.org")
+        self.assertGreaterEqual(self.scheduler.reserve("example.org"), 4.9)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        self.breaker = CircuitBreaker(2, 300)
+
+    def test_open(self):
+        self.breaker.add_failure("example.org")
+        self.assertTrue(self.breaker.allow("example.org"))
+        self.breaker.add_failure("example.org")
+        self.assertFalse(self.breaker.allow("example.org"))
+        self.assertTrue(self.breaker.allow("example.com"))
+
+    def test_success_resets(self):
+        self.breaker.add_failure("example.org")
+        self.breaker.add_success("example.org")
+        self.breaker.add_failure("example.org")
+        self.assertTrue(self.breaker.allow("example.org"))
+        self.assertEqual(self.breaker.get_failures("example.org"), 1)
+
+    def test_probe(self):
+        for dummy in range(2):
+            self.breaker.add_failure("example.org")
+        # let the retry time pass
+        self.breaker.hosts["example.org"][1] = time.time() - 301
+        self.assertTrue(self.breaker.allow("example.org"))
+        # only one probe at a time
+        self.assertFalse(self.breaker.allow("example.org"))
+        self.breaker.add_failure("example.org")
+        self.assertFalse(self.breaker.allow("example.org"))
+        self.breaker.hosts["example.org"][1] = time.time() - 301
+        self.assertTrue(self.breaker.allow("example.org"))
+        self.breaker.add_success("example.org")
+        self.assertTrue(self.breaker.allow("example.org"))
+        self.assertEqual(self.breaker.get_failures("example.org"), 0)
+
+    def test_end_probe(self):
+        for dummy in range(2):
+            self.breaker.add_failure("example.org")
+        self.breaker.hosts["example.org"][1] = time.time() - 301
+        self.assertTrue(self.breaker.allow("example.org"))
+        # another thread cannot end the probe
+        thread = threading.Thread(target=self.breaker.end_probe, args=("example.org",))
+        thread.start()
+        thread.join()
+        self.assertFalse(self.breaker.allow("example.org"))
+        # the probe ended without result
+        self.breaker.end_probe("example.org")
+        self.assertTrue(self.breaker.allow("example.org"))
+        self.assertEqual(self.breaker.get_failures("example.org"), 2)
+
+    def test_disabled(self):
+        breaker = CircuitBreaker(0, 300)
+        for dummy in range(5):
+            breaker.add_failure("example.org")
+        self.assertTrue(breaker.allow("example.org"))
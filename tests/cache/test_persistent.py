@@ -0,0 +1,137 @@
+# Copyright (C) 2024 LinkChecker Authors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test the persistent result cache.
+"""
+import os
+import pickle
+import sqlite3
+import tempfile
+import time
+import unittest
+
+from linkcheck.cache import persistent
+from linkcheck.cache.persistent import PersistentCache
+from linkcheck.cache.results import ResultCache
+from linkcheck.checker.urlbase import CompactUrlData, urlDataAttr
+
+
+def get_result(url, valid=True, extern=1):
+    data = dict.fromkeys(urlDataAttr)
+    data.update(url=url, cache_url=url, valid=valid, extern=extern, info=[])
+    return CompactUrlData(data)
+
+
+class TestPersistentCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmpdir.name, "results.sqlite")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_store(self):
+        ttls = {"*": 3600, "mailto": 0}
+        cache = PersistentCache(self.filename, ttls)
+        for url in ("http://example.org/", "mailto:a@example.org"):
+            cache.add_result(url, get_result(url))
+        cache.add_result("http://example.org/bad", get_result("x", valid=False))
+        cache.add_result("http://example.org/intern", get_result("x", extern=0))
+        cache.close()
+        cache = PersistentCache(self.filename, ttls)
+        checked, result = cache.get_result("http://example.org/")
+        self.assertLessEqual(checked, time.time())
+        self.assertEqual(result.url, "http://example.org/")
+        self.assertIsNone(cache.get_result("mailto:a@example.org"))
+        self.assertIsNone(cache.get_result("http://example.org/bad"))
+        self.assertIsNone(cache.get_result("http://example.org/intern"))
+        self.assertEqual(cache.get_stats(), dict(hits=1, misses=2))
+        cache.close()
+
+    def test_expire(self):
+        cache = PersistentCache(self.filename, {"*": 3600})
+        cache.add_result("http://example.org/", get_result("http://example.org/"))
+        cache.close()
+        cache = PersistentCache(self.filename, {"*": -1})
+        self.assertIsNone(cache.get_result("http://example.org/"))
+        cache.close()
+        # the expired result has been removed
+        cache = PersistentCache(self.filename, {"*": 3600})
+        self.assertIsNone(cache.get_result("http://example.org/"))
+        cache.close()
+
+    def test_result_cache(self):
+        url = "http://example.org/"
+        result_cache = ResultCache(10, PersistentCache(self.filename, {"*": 3600}))
+        result_cache.add_result(url, get_result(url))
+        result_cache.close()
+        result_cache = ResultCache(10, PersistentCache(self.filename, {"*": 3600}))
+        self.assertIsNone(result_cache.get_result(url))
+        result = result_cache.get_stored_result(url)
+        self.assertEqual(len(result.info), 1)
+        self.assertIs(result_cache.get_result(url), result)
+        self.assertIsNone(result_cache.get_stored_result("http://example.org/a"))
+        result_cache.close()
+        self.assertIsNone(ResultCache(10).get_stored_result(url))
+
+    def set_page_seen(self, key, seen):
+        conn = sqlite3.connect(self.filename)
+        with conn:
+            conn.execute("UPDATE pages SET seen = ? WHERE url = ?", (seen, key))
+        conn.close()
+
+    def test_pages(self):
+        cache = PersistentCache(self.filename, {"*": 3600})
+        for key in ("http://example.org/a", "http://example.org/b"):
+            cache.add_page(key, dict(etag=key))
+        cache.close()
+        expired = time.time() - persistent.PAGE_TTL - 1
+        for key in ("http://example.org/a", "http://example.org/b"):
+            self.set_page_seen(key, expired)
+        cache = PersistentCache(self.filename, {"*": 3600})
+        self.assertIsNone(cache.get_page("http://example.org/a"))
+        self.assertIsNone(cache.get_page("http://example.org/b"))
+        cache.add_page("http://example.org/a", dict(etag="a"))
+        cache.close()
+        # checking the page again keeps it
+        self.set_page_seen("http://example.org/a", expired + 60)
+        cache = PersistentCache(self.filename, {"*": 3600})
+        self.assertEqual(cache.get_page("http://example.org/a"), dict(etag="a"))
+        cache.touch_page("http://example.org/a")
+        cache.close()
+        conn = sqlite3.connect(self.filename)
+        (seen,) = conn.execute("SELECT seen FROM pages").fetchone()
+        conn.close()
+        self.assertGreater(seen, time.time() - 60)
+
+    def test_pages_old_database(self):
+        conn = sqlite3.connect(self.filename)
+        with conn:
+            conn.execute(
+                "CREATE TABLE pages (url TEXT PRIMARY KEY, data BLOB NOT NULL)"
+            )
+            conn.execute(
+                "INSERT INTO pages (url, data) VALUES (?, ?)",
+                ("http://example.org/", pickle.dumps(dict(etag="a"))),
+            )
+        conn.close()
+        cache = PersistentCache(self.filename, {"*": 3600})
+        self.assertEqual(cache.get_page("http://example.org/"), dict(etag="a"))
+        cache.add_page("http://example.org/b", dict(etag="b"))
+        cache.close()
+        cache = PersistentCache(self.filename, {"*": 3600})
+        self.assertEqual(cache.get_page("http://example.org/b"), dict(etag="b"))
+        cache.close()
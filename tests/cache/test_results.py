@@ -0,0 +1,75 @@
+# Copyright (C) 2024 LinkChecker Authors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+import unittest
+
+from linkcheck.cache.results import ResultCache
+
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = ResultCache(2)
+
+    def test_seen(self):
+        self.cache.add_result("a", None)
+        self.assertTrue(self.cache.has_result("a"))
+        self.assertIsNone(self.cache.get_result("a"))
+        self.assertFalse(self.cache.has_result("b"))
+
+    def test_none_key(self):
+        self.cache.add_result(None, "result")
+        self.assertEqual(len(self.cache), 0)
+
+    def test_eviction(self):
+        """
+        Test, that results are evicted in least recently used order
+        while all keys stay seen
+        """
+        self.cache.add_result("a", "A")
+        self.cache.add_result("b", "B")
+        self.assertEqual(self.cache.get_result("a"), "A")
+        self.cache.add_result("c", "C")
+        self.assertEqual(self.cache.get_result("a"), "A")
+        self.assertIsNone(self.cache.get_result("b"))
+        self.assertEqual(self.cache.get_result("c"), "C")
+        self.assertEqual(self.cache.evictions, 1)
+        for key in ("a", "b", "c"):
+            self.assertTrue(self.cache.has_result(key))
+        self.assertEqual(len(self.cache), 3)
+
+    def test_seen_beyond_size(self):
+        for i in range(10):
+            self.cache.add_result("key%d" % i, None)
+        self.assertEqual(len(self.cache), 10)
+        self.assertTrue(self.cache.has_result("key0"))
+
+    def test_has_result_none_key(self):
+        self.assertFalse(self.cache.has_result(None))
+
+    def test_stats(self):
+        self.cache.add_result("a", "A")
+        stats = self.cache.get_stats()
+        self.assertEqual(stats["results"], 1)
+        self.assertEqual(stats["seen_keys"], 1)
+        self.assertIn("seen_table_bytes", stats)
+
+    def test_seen_bloom_size(self):
+        cache = ResultCache(2, seen_bloom_size=128)
+        cache.add_result("a", None)
+        self.assertTrue(cache.has_result("a"))
+        self.assertFalse(cache.has_result("b"))
+        self.assertEqual(cache.get_stats()["seen_bloom_bytes"], 128)
+        self.assertEqual(self.cache.get_stats()["seen_bloom_bytes"], 0)
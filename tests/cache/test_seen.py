@@ -0,0 +1,64 @@
+# Copyright (C) 2024 LinkChecker Authors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+import unittest
+
+from linkcheck.cache.seen import SeenSet, fingerprint
+
+
+class TestSeenSet(unittest.TestCase):
+    def test_fingerprint(self):
+        self.assertEqual(fingerprint("http://example.org/"),
+                         fingerprint("http://example.org/"))
+        self.assertNotEqual(fingerprint("http://example.org/"),
+                            fingerprint("http://example.org/a"))
+        self.assertNotEqual(fingerprint("\udcff"), 0)
+
+    def test_add_contains(self):
+        seen = SeenSet()
+        self.assertNotIn("a", seen)
+        self.assertTrue(seen.add("a"))
+        self.assertIn("a", seen)
+        self.assertFalse(seen.add("a"))
+        self.assertEqual(len(seen), 1)
+
+    def test_grow(self):
+        seen = SeenSet(capacity=1)
+        slots = seen.get_stats()["slots"]
+        keys = ["http://example.org/%d" % i for i in range(1000)]
+        for key in keys:
+            seen.add(key)
+        self.assertEqual(len(seen), 1000)
+        self.assertGreater(seen.get_stats()["slots"], slots)
+        for key in keys:
+            self.assertIn(key, seen)
+        self.assertNotIn("http://example.org/1000", seen)
+
+    def test_bloom(self):
+        seen = SeenSet(bloom_bits=1 << 12)
+        for i in range(100):
+            seen.add("key%d" % i)
+        for i in range(100):
+            self.assertIn("key%d" % i, seen)
+        self.assertNotIn("key100", seen)
+        self.assertEqual(seen.get_stats()["bloom_bytes"], 512)
+
+    def test_stats(self):
+        seen = SeenSet(capacity=100)
+        stats = seen.get_stats()
+        self.assertEqual(stats["keys"], 0)
+        self.assertEqual(stats["table_bytes"], 8 * stats["slots"])
+        self.assertGreaterEqual(3 * stats["slots"], 4 * 100)
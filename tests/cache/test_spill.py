@@ -0,0 +1,118 @@
+# Copyright (C) 2024 LinkChecker Authors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test spilling of queued URL records to disk.
+"""
+import os
+import threading
+import unittest
+
+import linkcheck.configuration
+import linkcheck.director
+from linkcheck.cache.spill import SpillStore
+from linkcheck.cache.urlqueue import UrlQueue
+from linkcheck.checker.urlrecord import UrlRecord
+
+PARENT = "http://example.org/"
+
+
+class TestSpill(unittest.TestCase):
+    def setUp(self):
+        config = linkcheck.configuration.Configuration()
+        self.aggregate = linkcheck.director.get_aggregate(config)
+
+    def get_record(self, num):
+        return UrlRecord(
+            "page%d.html" % num, 1, self.aggregate, parent_url=PARENT, line=num
+        )
+
+    def test_store(self):
+        store = SpillStore(batch_size=3)
+        try:
+            for num in range(5):
+                store.append(self.get_record(num))
+            self.assertEqual(store.stored, 3)
+            self.assertEqual(len(store), 5)
+            records = store.popmany(2) + store.popmany(2) + store.popmany(2)
+            self.assertEqual([r.line for r in records], list(range(5)))
+            self.assertEqual(len(store), 0)
+            record = records[4]
+            self.assertIs(record.aggregate, self.aggregate)
+            self.assertEqual(record.cache_url, "http://example.org/page4.html")
+            self.assertEqual(record.parent_url, PARENT)
+            store.append(self.get_record(5))
+            store.clear()
+            self.assertEqual(len(store), 0)
+        finally:
+            store.close()
+        self.assertFalse(os.path.exists(store.filename))
+
+    def test_snapshot(self):
+        store = SpillStore(batch_size=2)
+        lock = threading.Lock()
+        try:
+            for num in range(5):
+                store.append(self.get_record(num))
+            snapshot = store.snapshot(lock)
+            # the store can be changed while the snapshot is read
+            store.popmany(3)
+            store.append(self.get_record(5))
+            batches = list(snapshot)
+            store.clear()
+            self.assertEqual([len(states) for states in batches], [2, 2, 1])
+            lines = [
+                UrlRecord.from_state(state, self.aggregate).line
+                for states in batches
+                for state in states
+            ]
+            self.assertEqual(lines, list(range(5)))
+            snapshot.close()
+            count = store.conn.execute("SELECT COUNT(*) FROM records").fetchone()
+            self.assertEqual(count[0], 0)
+            # ids of deleted records are not reused
+            store.append(self.get_record(6))
+            store.flush()
+            self.assertEqual([r.line for r in store.popmany(2)], [6])
+        finally:
+            store.close()
+
+    def test_queue(self):
+        urlqueue = UrlQueue(max_memory=4)
+        self.aggregate.urlqueue = urlqueue
+        for num in range(10):
+            urlqueue.put(self.get_record(num))
+        self.assertEqual(len(urlqueue.pending), 4)
+        self.assertEqual(urlqueue.qsize(), 10)
+        # queue order is kept when records come back from disk
+        lines = []
+        while not urlqueue.empty():
+            record = urlqueue._get(0)
+            lines.append(record.line)
+            self.assertLessEqual(len(urlqueue.pending), 4)
+            if record.line == 2:
+                urlqueue.put(self.get_record(10))
+        self.assertEqual(lines, list(range(11)))
+        urlqueue.close()
+        self.assertIsNone(urlqueue.spill)
+
+    def test_shutdown(self):
+        urlqueue = UrlQueue(max_memory=2)
+        for num in range(5):
+            urlqueue.put(self.get_record(num))
+        urlqueue.do_shutdown()
+        self.assertTrue(urlqueue.empty())
+        self.assertEqual(urlqueue.unfinished_tasks, 0)
+        urlqueue.close()
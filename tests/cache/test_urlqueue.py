@@ -14,12 +14,14 @@
 # with this program; if not, write to the Free Software Foundation, Inc.,
 # 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
 
+import threading
 import unittest
 from collections import namedtuple
 
 import linkcheck.configuration
+from linkcheck.cache.hosts import HostScheduler
 from linkcheck.cache.results import ResultCache
-from linkcheck.cache.urlqueue import Empty, NUM_PUTS_CLEANUP, UrlQueue
+from linkcheck.cache.urlqueue import Empty, Timeout, UrlQueue
 
 UrlData = namedtuple("UrlData", "url cache_url aggregate has_result")
 Aggregate = namedtuple("Aggregate", "result_cache")
@@ -131,14 +133,12 @@ class TestUrlQueue(unittest.TestCase):
         with self.assertRaises(Empty):
             self.assertEqual(self.urlqueue.get(0), None)
 
-    def test_cleanup(self):
+    def test_promote(self):
         """
-        Test, that after adding NUM_PUTS_CLEANUP elements
-        the queue is cleaned up.
-        Whether the cleanup is was performed is determined,
-        that element in cache is now on top of the queue.
+        Test, that a queued element whose result got cached
+        is moved to the top of the queue.
         """
-        for i in range(NUM_PUTS_CLEANUP - 1):
+        for i in range(10):
             self.urlqueue.put(
                 UrlData(
                     url="Bar",
@@ -147,14 +147,161 @@ class TestUrlQueue(unittest.TestCase):
                     has_result=False,
                 ),
             )
-        self.assertEqual(self.urlqueue.qsize(), NUM_PUTS_CLEANUP - 1)
+        self.assertEqual(self.urlqueue.qsize(), 10)
+        self.result_cache.add_result("Bar address 2", "asdf")
+        self.urlqueue.promote("Bar address 2")
+        self.assertEqual(self.urlqueue.qsize(), 10)
+        self.assertEqual(self.urlqueue.get().cache_url, "Bar address 2")
+        for i in (0, 1, 3, 4, 5, 6, 7, 8, 9):
+            self.assertEqual(self.urlqueue.get().cache_url, "Bar address %s" % i)
+        with self.assertRaises(Empty):
+            self.urlqueue.get(0)
+
+    def test_promote_unknown(self):
+        """
+        Test, that promoting a key that is not queued changes nothing.
+        """
+        self.urlqueue.put(self.urldata1)
+        self.urlqueue.promote("Bar")
+        self.assertEqual(self.urlqueue.qsize(), 1)
+
+    def test_promote_last(self):
+        """
+        Test, that promoting the last element of the frontier
+        keeps it available.
+        """
         urldata = UrlData(
             url="Bar",
-            cache_url="Bar address",
+            cache_url="Bar",
             aggregate=Aggregate(result_cache=self.result_cache),
             has_result=False,
         )
-        self.result_cache.add_result("Bar address 2", "asdf")
         self.urlqueue.put(urldata)
-        self.assertEqual(self.urlqueue.qsize(), NUM_PUTS_CLEANUP)
-        self.assertEqual(self.urlqueue.get().cache_url, "Bar address 2")
+        self.urlqueue.promote("Bar")
+        self.assertEqual(self.urlqueue.get(0), urldata)
+        self.assertTrue(self.urlqueue.empty())
+
+    def test_wait_not_full(self):
+        """
+        Test, that a producer waits until URLs have been taken from
+        the queue, and stops waiting on shutdown.
+        """
+        for i in range(2):
+            self.urlqueue.put(
+                UrlData(
+                    url="Bar",
+                    cache_url="Bar %d" % i,
+                    aggregate=Aggregate(result_cache=self.result_cache),
+                    has_result=False,
+                ),
+            )
+        self.assertTrue(self.urlqueue.wait_not_full(3))
+        results = []
+        thread = threading.Thread(
+            target=lambda: results.append(self.urlqueue.wait_not_full(2))
+        )
+        thread.start()
+        thread.join(0.1)
+        self.assertTrue(thread.is_alive())
+        self.urlqueue.get(0)
+        thread.join(5)
+        self.assertEqual(results, [True])
+        thread = threading.Thread(
+            target=lambda: results.append(self.urlqueue.wait_not_full(1))
+        )
+        thread.start()
+        self.urlqueue.do_shutdown()
+        thread.join(5)
+        self.assertEqual(results, [True, False])
+
+    def test_producer(self):
+        """
+        Test, that join() waits for a producer.
+        """
+        self.urlqueue.add_producer()
+        with self.assertRaises(Timeout):
+            self.urlqueue.join(timeout=0)
+        self.urlqueue.producer_done()
+        self.urlqueue.join(timeout=0)
+        with self.assertRaises(ValueError):
+            self.urlqueue.producer_done()
+
+
+HttpUrlData = namedtuple(
+    "HttpUrlData", "url cache_url aggregate has_result scheme urlparts"
+)
+
+
+class TestHostFrontier(unittest.TestCase):
+    def setUp(self):
+        config = linkcheck.configuration.Configuration()
+        self.result_cache = ResultCache(config["resultcachesize"])
+        self.host_scheduler = HostScheduler(10)
+        self.urlqueue = UrlQueue(host_scheduler=self.host_scheduler)
+
+    def get_url_data(self, host, path):
+        url = f"http://{host}/{path}"
+        return HttpUrlData(
+            url=url,
+            cache_url=url,
+            aggregate=Aggregate(result_cache=self.result_cache),
+            has_result=False,
+            scheme="http",
+            urlparts=["http", host, "/" + path, "", ""],
+        )
+
+    def test_put_get(self):
+        urldata = self.get_url_data("example.org", "a")
+        self.urlqueue.put(urldata)
+        self.assertEqual(self.urlqueue.qsize(), 1)
+        self.assertEqual(self.urlqueue.get(0), urldata)
+        self.assertTrue(self.urlqueue.empty())
+
+    def test_ready_host_first(self):
+        """
+        Test, that a URL of a host waiting for its politeness delay
+        is handed out after a URL of a host that can be contacted
+        """
+        self.host_scheduler.reserve("example.org")
+        self.host_scheduler.reserve("example.org")
+        busy = self.get_url_data("example.org", "a")
+        ready = self.get_url_data("example.com", "a")
+        self.urlqueue.put(busy)
+        self.urlqueue.put(ready)
+        self.assertEqual(self.urlqueue.get(0), ready)
+        with self.assertRaises(Empty):
+            self.urlqueue.get(0)
+        self.assertEqual(self.urlqueue.get(), busy)
+
+    def test_round_robin(self):
+        """
+        Test, that URLs of different hosts are interleaved
+        """
+        urls = [
+            self.get_url_data("example.org", "a"),
+            self.get_url_data("example.org", "b"),
+            self.get_url_data("example.com", "a"),
+        ]
+        for urldata in urls:
+            self.urlqueue.put(urldata)
+        self.assertEqual(self.urlqueue.get(0), urls[0])
+        self.assertEqual(self.urlqueue.get(0), urls[2])
+        self.assertEqual(self.urlqueue.get(), urls[1])
+
+    def test_has_result_first(self):
+        self.urlqueue.put(self.get_url_data("example.org", "a"))
+        urldata = UrlData(
+            url="Foo",
+            cache_url="Foo",
+            aggregate=Aggregate(result_cache=self.result_cache),
+            has_result=True,
+        )
+        self.urlqueue.put(urldata)
+        self.assertEqual(self.urlqueue.get(0), urldata)
+
+    def test_shutdown(self):
+        self.urlqueue.put(self.get_url_data("example.org", "a"))
+        self.urlqueue.put(self.get_url_data("example.org", "b"))
+        self.urlqueue.do_shutdown()
+        self.assertTrue(self.urlqueue.empty())
+        self.urlqueue.join(timeout=0)
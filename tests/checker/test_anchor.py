@@ -17,7 +17,17 @@
 Test html anchor parsing and checking.
 """
 from . import LinkCheckTest
-from .httpserver import HttpServerTest
+from .httpserver import HttpServerTest, NoQueryHttpRequestHandler
+
+
+class PathRecordingHandler(NoQueryHttpRequestHandler):
+    """Handler recording the paths of GET requests."""
+
+    paths = []
+
+    def do_GET(self):
+        self.paths.append(self.path)
+        super().do_GET()
 
 
 class TestFileAnchor(LinkCheckTest):
@@ -52,6 +62,26 @@ class TestHttpAnchor(HttpServerTest):
         self.file_test("http_anchor.html", confargs=confargs)
 
 
+class TestHttpAnchorDownloads(HttpServerTest):
+    """
+    Test that documents are downloaded once for all anchors.
+    """
+
+    def __init__(self, methodName="runTest"):
+        super().__init__(methodName=methodName)
+        self.handler = PathRecordingHandler
+
+    def test_anchor_downloads(self):
+        del PathRecordingHandler.paths[:]
+        confargs = dict(enabledplugins=["AnchorCheck"], recursionlevel=1)
+        self.file_test("http_anchor.html", confargs=confargs)
+        # the URLs with anchors use the anchors of the start URL
+        self.assertEqual(
+            PathRecordingHandler.paths.count("/tests/checker/data/http_anchor.html"),
+            1,
+        )
+
+
 class TestEncodedAnchors(HttpServerTest):
     """Test HTML pages containing urlencoded links to anchors"""
 
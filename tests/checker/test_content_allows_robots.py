@@ -22,7 +22,6 @@ import unittest
 
 import linkcheck.configuration
 import linkcheck.director
-from linkcheck.htmlutil.htmlsoup import make_soup
 from . import get_url_from
 
 from . import LinkCheckTest
@@ -74,13 +73,14 @@ class TestMetaRobotsVariants(unittest.TestCase):
         url_data = get_url_from(url, 0, aggregate)
         url_data.content_type = "text/html"
 
-        url_data.soup = make_soup('<meta name="robots" content="nofollow">')
+        url_data.text = '<meta name="robots" content="nofollow">'
+        url_data.document = None
         self.assertFalse(url_data.content_allows_robots())
 
-        url_data.soup = make_soup(
-            '<meta name="robots" content="nocache, Nofollow, noimageindex">'
-        )
+        url_data.text = '<meta name="robots" content="nocache, Nofollow, noimageindex">'
+        url_data.document = None
         self.assertFalse(url_data.content_allows_robots())
 
-        url_data.soup = make_soup('<meta name="robots" content="noindex, follow">')
+        url_data.text = '<meta name="robots" content="noindex, follow">'
+        url_data.document = None
         self.assertTrue(url_data.content_allows_robots())
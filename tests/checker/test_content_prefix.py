@@ -0,0 +1,63 @@
+# Copyright (C) 2024 LinkChecker Authors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test guessing the MIME type from the start of the content.
+"""
+import os
+
+from linkcheck.checker import get_url_from
+
+from . import get_file_url, get_test_aggregate
+from .httpserver import HttpServerTest
+
+
+class TestContentPrefix(HttpServerTest):
+    """Test that only content which is parsed is downloaded."""
+
+    dirname = os.path.join(os.path.dirname(__file__), "data")
+
+    def get_url_data(self, url):
+        aggregate = get_test_aggregate({}, {"expected": []})
+        aggregate.add_request_session()
+        url_data = get_url_from(url, 0, aggregate)
+        url_data.check()
+        return url_data
+
+    def get_file_url(self, filename):
+        return "file://%s" % get_file_url(os.path.join(self.dirname, filename))
+
+    def test_file(self):
+        url_data = self.get_url_data(self.get_file_url("file.txt"))
+        self.assertEqual(url_data.content_type, "text/plain")
+        self.assertIsNone(url_data.data)
+        url_data = self.get_url_data(self.get_file_url("urllist.txt"))
+        self.assertEqual(url_data.content_type, "text/plain+linkchecker")
+        self.assertIsNone(url_data.data)
+        # the content is still complete
+        self.assertTrue(url_data.get_content().startswith("# LinkChecker url list"))
+
+    def test_http(self):
+        url_data = self.get_url_data(self.get_url("data.xml"))
+        self.assertFalse(url_data.is_parseable())
+        self.assertIsNone(url_data.data)
+        url_data = self.get_url_data(self.get_url("sitemap.xml"))
+        # the first chunk is only a part of the content
+        url_data.ReadChunkBytes = 100
+        self.assertTrue(url_data.is_parseable())
+        self.assertEqual(url_data.content_type, "application/xml+sitemap")
+        self.assertEqual(len(url_data.content_prefix), 100)
+        with open(os.path.join(self.dirname, "sitemap.xml"), "rb") as f:
+            self.assertEqual(url_data.get_raw_content(), f.read())
@@ -0,0 +1,87 @@
+# Copyright (C) 2024 LinkChecker Authors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test queueing the entries of file directories.
+"""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from linkcheck import parser
+from linkcheck.checker import fileurl, get_url_from
+
+from . import get_file_url, get_test_aggregate
+
+
+class TestDirectory(unittest.TestCase):
+    """Test that directory entries are queued without an index page."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.dirname = self.tmpdir.name
+        with open(os.path.join(self.dirname, "file.txt"), "w") as f:
+            f.write("text")
+        os.mkdir(os.path.join(self.dirname, "sub"))
+        if hasattr(os, "symlink"):
+            os.symlink("file.txt", os.path.join(self.dirname, "link.txt"))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def get_url_data(self, filename):
+        aggregate = get_test_aggregate({}, {"expected": []})
+        aggregate.add_request_session()
+        url = "file://%s" % get_file_url(os.path.join(self.dirname, filename))
+        return get_url_from(url, 0, aggregate)
+
+    def test_get_files(self):
+        self.assertEqual(
+            sorted(fileurl.get_files(self.dirname)), ["file.txt", "sub/"]
+        )
+
+    def test_directory(self):
+        url_data = self.get_url_data("")
+        url_data.check()
+        self.assertTrue(url_data.is_directory())
+        self.assertTrue(url_data.check_content())
+        parser.parse_url(url_data)
+        self.assertIsNone(url_data.data)
+        urlqueue = url_data.aggregate.urlqueue
+        names = []
+        while not urlqueue.empty():
+            child = urlqueue.get()
+            names.append(child.name)
+            self.assertEqual(child.parent_url, url_data.url)
+            self.assertEqual(child.line, 0)
+            urlqueue.task_done(child)
+        self.assertEqual(sorted(names), ["file.txt", "sub/"])
+
+    def test_file_stat(self):
+        with mock.patch("os.lstat", wraps=os.lstat) as lstat:
+            url_data = self.get_url_data("file.txt")
+            url_data.check()
+        self.assertEqual(lstat.call_count, 1)
+        self.assertFalse(url_data.is_directory())
+        self.assertEqual(url_data.size, 4)
+
+    @unittest.skipUnless(hasattr(os, "symlink"), "symbolic links not supported")
+    def test_link_stat(self):
+        url_data = self.get_url_data("link.txt")
+        url_data.check()
+        self.assertFalse(url_data.is_directory())
+        # the size of the link target
+        self.assertEqual(url_data.size, 4)
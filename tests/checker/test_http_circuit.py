@@ -0,0 +1,86 @@
+# Copyright (C) 2024 LinkChecker Authors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test failing fast for unreachable hosts.
+"""
+import socket
+import time
+import unittest
+from unittest import mock
+
+import requests
+
+import linkcheck.director
+from linkcheck import LinkCheckerError
+from linkcheck.checker import get_url_from
+from linkcheck.checker.httpurl import HttpUrl
+
+from . import get_test_aggregate
+
+
+def get_closed_port():
+    """Return a local port number nobody listens on."""
+    sock = socket.socket()
+    sock.bind(("localhost", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+class TestHttpCircuit(unittest.TestCase):
+    """Test the circuit breaker of unreachable hosts."""
+
+    def test_unreachable(self):
+        confargs = dict(maxhostfailures=2, robotstxt=False)
+        aggregate = get_test_aggregate(confargs, {"expected": []})
+        port = get_closed_port()
+        urls = ["http://localhost:%d/%d" % (port, num) for num in range(4)]
+        for url in urls:
+            aggregate.urlqueue.put(get_url_from(url, 0, aggregate, extern=(0, 0)))
+        linkcheck.director.check_urls(aggregate)
+        results = [aggregate.result_cache.get_result(url) for url in urls]
+        self.assertFalse(any(result.valid for result in results))
+        for result in results[:2]:
+            self.assertTrue(result.result.startswith("ConnectionError"))
+        for result in results[2:]:
+            self.assertTrue(result.result.startswith("Not checked: host localhost"))
+
+    def test_probe_not_sent(self):
+        """Test that a probe failing before its request is sent does not
+        block the host."""
+        confargs = dict(maxhostfailures=1, robotstxt=False)
+        aggregate = get_test_aggregate(confargs, {"expected": []})
+        aggregate.add_request_session()
+        host = "localhost:%d" % get_closed_port()
+        url = "http://%s/" % host
+        breaker = aggregate.circuit_breaker
+        breaker.add_failure(host)
+        breaker.hosts[host][1] = time.time() - breaker.retry_seconds - 1
+        url_data = get_url_from(url, 0, aggregate, extern=(0, 0))
+        error = LinkCheckerError("error")
+        with mock.patch.object(HttpUrl, "build_request", side_effect=error):
+            url_data.check()
+        self.assertFalse(url_data.valid)
+        self.assertTrue(breaker.allow(host))
+        # only connection errors are counted
+        breaker.end_probe(host)
+        url_data = get_url_from(url, 0, aggregate, extern=(0, 0))
+        error = requests.exceptions.InvalidHeader("error")
+        with mock.patch.object(HttpUrl, "_send_request", side_effect=error):
+            url_data.check()
+        self.assertFalse(url_data.valid)
+        self.assertTrue(breaker.allow(host))
+        self.assertEqual(breaker.get_failures(host), 1)
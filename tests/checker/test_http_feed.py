@@ -0,0 +1,96 @@
+# Copyright (C) 2024 LinkChecker Authors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test parsing HTML pages while they are downloaded.
+"""
+from unittest import mock
+
+from linkcheck import LinkCheckerError, parser
+from linkcheck.checker import get_url_from
+from linkcheck.htmlutil import linkparse
+
+from . import get_test_aggregate
+from .httpserver import HttpServerTest, NoQueryHttpRequestHandler
+
+
+class CharsetHttpRequestHandler(NoQueryHttpRequestHandler):
+    """Handler declaring the encoding of HTML files."""
+
+    def guess_type(self, path):
+        ctype = super().guess_type(path)
+        if ctype == "text/html":
+            ctype += "; charset=utf-8"
+        return ctype
+
+
+class TestHttpFeed(HttpServerTest):
+    """Test parsing HTML pages during the download."""
+
+    def __init__(self, methodName="runTest"):
+        super().__init__(methodName=methodName)
+        self.handler = CharsetHttpRequestHandler
+
+    def test_html(self):
+        confargs = dict(recursionlevel=1)
+        self.file_test("http_file.html", confargs=confargs)
+        self.file_test("http_utf8.html", confargs=confargs)
+        self.file_test("http_invalid_host.html", confargs=confargs)
+
+    def test_meta_robots(self):
+        url = self.get_url("norobots.html")
+        resultlines = [
+            "url %s" % url,
+            "cache key %s" % url,
+            "real url %s" % url,
+            "valid",
+        ]
+        self.direct(url, resultlines, recursionlevel=1)
+
+    def get_url_data(self, **confargs):
+        confargs.update(recursionlevel=1, robotstxt=False)
+        aggregate = get_test_aggregate(confargs, {"expected": []})
+        aggregate.add_request_session()
+        url_data = get_url_from(self.get_url("http_body.html"), 0, aggregate)
+        url_data.check()
+        return url_data
+
+    def test_download_parses_document(self):
+        url_data = self.get_url_data()
+        url_data.get_content()
+        self.assertEqual(len(url_data.document.links), 3)
+        # the links are queued after the download, by the HTML parser
+        urlqueue = url_data.aggregate.urlqueue
+        self.assertEqual(urlqueue.qsize(), 0)
+        with mock.patch.object(
+            linkparse, "parse_document", side_effect=AssertionError("parsed again")
+        ):
+            parser.parse_url(url_data)
+        self.assertEqual(urlqueue.qsize(), 3)
+
+    def test_download_failed(self):
+        url_data = self.get_url_data(maxfilesizedownload=100)
+        self.assertRaises(LinkCheckerError, url_data.get_content)
+        self.assertIsNone(url_data.document)
+        self.assertEqual(url_data.aggregate.urlqueue.qsize(), 0)
+
+    def test_get_soup(self):
+        url_data = self.get_url_data()
+        parser.parse_url(url_data)
+        # the document tree is only built for consumers that need it
+        self.assertIsNone(url_data.soup)
+        soup = url_data.get_soup()
+        self.assertEqual(soup.title.string, "Links in head and body")
+        self.assertIs(url_data.get_soup(), soup)
@@ -0,0 +1,105 @@
+# Copyright (C) 2024 LinkChecker Authors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test HEAD requests for URLs whose content is not needed.
+"""
+import linkcheck.director
+from linkcheck.checker import get_url_from
+
+from . import get_test_aggregate
+from .httpserver import HttpServerTest, NoQueryHttpRequestHandler
+
+
+class MethodRecordingHandler(NoQueryHttpRequestHandler):
+    """Handler recording request methods and refusing HEAD requests
+    for paths with "nohead" or "headforbidden" in the query."""
+
+    requests = []
+
+    def do_GET(self):
+        self.requests.append(("GET", self.path))
+        super().do_GET()
+
+    def do_HEAD(self):
+        self.requests.append(("HEAD", self.path))
+        if "nohead" in self.path:
+            self.send_response(405)
+            self.end_headers()
+        elif "headforbidden" in self.path:
+            self.send_response(403)
+            self.end_headers()
+        else:
+            super().do_HEAD()
+
+
+class TestHttpHead(HttpServerTest):
+    """Test choosing between HEAD and GET requests."""
+
+    def __init__(self, methodName="runTest"):
+        super().__init__(methodName=methodName)
+        self.handler = MethodRecordingHandler
+
+    def setUp(self):
+        super().setUp()
+        del MethodRecordingHandler.requests[:]
+
+    def get_methods(self):
+        return [
+            method
+            for method, path in MethodRecordingHandler.requests
+            if not path.endswith("/robots.txt")
+        ]
+
+    def check(self, urls, recursionlevel=0, errors=0):
+        confargs = dict(headrequests=True, recursionlevel=recursionlevel)
+        aggregate = get_test_aggregate(confargs, {"expected": []})
+        for url in urls:
+            aggregate.urlqueue.put(get_url_from(url, 0, aggregate, extern=(0, 0)))
+        linkcheck.director.check_urls(aggregate)
+        logger = aggregate.config["logger"]
+        self.assertEqual(logger.stats.errors, errors)
+        self.assertFalse(logger.stats.internal_errors)
+        return aggregate
+
+    def test_head_media(self):
+        self.check([self.get_url("favicon.ico")], recursionlevel=1)
+        self.assertEqual(self.get_methods(), ["HEAD"])
+
+    def test_get_parseable(self):
+        self.check([self.get_url("empty.html")], recursionlevel=1)
+        self.assertEqual(self.get_methods(), ["GET"])
+
+    def test_head_max_level(self):
+        self.check([self.get_url("empty.html")])
+        self.assertEqual(self.get_methods(), ["HEAD"])
+
+    def test_head_not_allowed(self):
+        aggregate = self.check([
+            self.get_url("favicon.ico?nohead"),
+            self.get_url("favicon.ico?other"),
+        ])
+        self.assertEqual(self.get_methods(), ["HEAD", "GET", "GET"])
+        self.assertIn("localhost:%d" % self.port, aggregate.no_head_hosts)
+
+    def test_head_forbidden(self):
+        aggregate = self.check([self.get_url("favicon.ico?headforbidden")])
+        self.assertEqual(self.get_methods(), ["HEAD", "GET"])
+        self.assertNotIn("localhost:%d" % self.port, aggregate.no_head_hosts)
+
+    def test_head_not_found(self):
+        # a broken link is not requested again with GET
+        self.check([self.get_url("missing.ico")], errors=1)
+        self.assertEqual(self.get_methods(), ["HEAD"])
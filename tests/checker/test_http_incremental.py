@@ -0,0 +1,95 @@
+# Copyright (C) 2024 LinkChecker Authors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test incremental checking with conditional HTTP requests.
+"""
+import contextlib
+import os
+import sqlite3
+import tempfile
+import time
+from unittest import mock
+
+from linkcheck.checker import get_url_from
+
+from . import get_test_aggregate
+from .httpserver import HttpServerTest
+
+
+class TestHttpIncremental(HttpServerTest):
+    """Test re-queueing stored links of unmodified pages."""
+
+    def setUp(self):
+        super().setUp()
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+        super().tearDown()
+
+    def get_cache_filename(self):
+        return os.path.join(self.tmpdir.name, "cache.sqlite")
+
+    def check(self, info):
+        url = self.get_url("frames.html")
+        resultlines = [
+            "url %s" % url,
+            "cache key %s" % url,
+            "real url %s" % url,
+        ]
+        resultlines.extend(info)
+        resultlines.append("valid")
+        for filename in ("file.html", "file.txt"):
+            fileurl = self.get_url(filename)
+            resultlines.extend([
+                "url %s" % filename,
+                "cache key %s" % fileurl,
+                "real url %s" % fileurl,
+                "valid",
+            ])
+        confargs = dict(
+            persistentcache=self.get_cache_filename(),
+            incremental=True,
+        )
+        self.direct(url, resultlines, recursionlevel=1, confargs=confargs)
+
+    def test_not_modified(self):
+        self.check([])
+        self.check(["info Not modified since the last check, queueing 2 stored links."])
+
+    def test_not_modified_touches_page(self):
+        self.check([])
+        url = self.get_url("frames.html")
+        seen = time.time() - 3600
+        with contextlib.closing(sqlite3.connect(self.get_cache_filename())) as conn:
+            with conn:
+                conn.execute("UPDATE pages SET seen = ?", (seen,))
+        self.check(["info Not modified since the last check, queueing 2 stored links."])
+        with contextlib.closing(sqlite3.connect(self.get_cache_filename())) as conn:
+            sql = "SELECT seen FROM pages WHERE url = ?"
+            row = conn.execute(sql, (url,)).fetchone()
+        self.assertGreater(row[0], seen)
+
+    def test_not_modified_xml(self):
+        aggregate = get_test_aggregate({}, {"expected": []})
+        url_data = get_url_from(self.get_url("data.xml"), 0, aggregate)
+        url_data.content_type = "application/xml"
+        url_data.not_modified = True
+        # a 304 response has no content to guess the MIME type from
+        with mock.patch.object(
+            url_data, "get_content_prefix", side_effect=AssertionError("read")
+        ):
+            self.assertFalse(url_data.is_parseable())
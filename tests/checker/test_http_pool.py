@@ -0,0 +1,86 @@
+# Copyright (C) 2024 LinkChecker Authors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test the connection pool shared by checker threads.
+"""
+import threading
+
+import linkcheck.director
+from linkcheck.checker import get_url_from
+
+from . import get_test_aggregate
+from .httpserver import HttpServerTest
+
+
+class TestHttpPool(HttpServerTest):
+    """Test sharing and limiting HTTP connections."""
+
+    def test_shared_adapter(self):
+        aggregate = get_test_aggregate({}, {"expected": []})
+        sessions = []
+
+        def add_session():
+            aggregate.add_request_session()
+            sessions.append(aggregate.get_request_session())
+
+        threads = [threading.Thread(target=add_session) for dummy in range(2)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertIsNot(sessions[0], sessions[1])
+        adapter = aggregate.connection_pool.adapter
+        for session in sessions:
+            self.assertIs(session.get_adapter("http://example.org/"), adapter)
+            self.assertIs(session.get_adapter("https://example.org/"), adapter)
+
+    def test_connection_limit(self):
+        confargs = dict(
+            threads=4, maxconnectionsperhost=1, maxconnectionshttp=1, robotstxt=False
+        )
+        aggregate = get_test_aggregate(confargs, {"expected": []})
+        connection_pool = aggregate.connection_pool
+        lock = threading.Lock()
+        held, acquired = [], []
+        acquire, release = connection_pool.acquire, connection_pool.release
+
+        def acquire_slot(scheme):
+            result = acquire(scheme)
+            with lock:
+                held.append(scheme)
+                acquired.append(scheme)
+                self.assertLessEqual(len(held), 1)
+            return result
+
+        def release_slot(scheme):
+            with lock:
+                held.remove(scheme)
+            release(scheme)
+
+        connection_pool.acquire = acquire_slot
+        connection_pool.release = release_slot
+        names = ("frames.html", "file.html", "file.txt", "favicon.ico")
+        for name in names:
+            url = self.get_url(name)
+            aggregate.urlqueue.put(get_url_from(url, 0, aggregate, extern=(0, 0)))
+        linkcheck.director.check_urls(aggregate)
+        logger = aggregate.config["logger"]
+        self.assertFalse(logger.stats.errors)
+        self.assertFalse(logger.stats.internal_errors)
+        self.assertEqual(logger.stats.number, 5)
+        # links of frames.html are served from the result cache
+        self.assertEqual(len(acquired), len(names))
+        self.assertFalse(held)
@@ -0,0 +1,81 @@
+# Copyright (C) 2024 LinkChecker Authors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test retrying rate limited HTTP requests.
+"""
+from .httpserver import HttpServerTest, NoQueryHttpRequestHandler
+
+
+class RetryAfterHandler(NoQueryHttpRequestHandler):
+    """Handler answering the first request of a path with "429 Too Many
+    Requests" and "Retry-After: 0", and "503 Service Unavailable" without
+    Retry-After for paths containing "unavailable"."""
+
+    requests = []
+
+    def do_GET(self):
+        if self.path.endswith("/robots.txt"):
+            self.send_response(404)
+            self.end_headers()
+            return
+        self.requests.append(self.path)
+        if "unavailable" in self.path:
+            self.send_response(503)
+            self.end_headers()
+        elif self.requests.count(self.path) == 1:
+            self.send_response(429)
+            self.send_header("Retry-After", "0")
+            self.end_headers()
+        else:
+            super().do_GET()
+
+
+class TestHttpRetry(HttpServerTest):
+    """Test queueing URLs again after rate limiting responses."""
+
+    def __init__(self, methodName="runTest"):
+        super().__init__(methodName=methodName)
+        self.handler = RetryAfterHandler
+
+    def setUp(self):
+        super().setUp()
+        del RetryAfterHandler.requests[:]
+
+    def get_resultlines(self, url, result):
+        return [
+            "url %s" % url,
+            "cache key %s" % url,
+            "real url %s" % url,
+            result,
+        ]
+
+    def test_retry_after(self):
+        url = self.get_url("file.txt")
+        self.direct(url, self.get_resultlines(url, "valid"), recursionlevel=0)
+        self.assertEqual(len(RetryAfterHandler.requests), 2)
+
+    def test_no_retries(self):
+        url = self.get_url("file.txt")
+        resultlines = self.get_resultlines(url, "valid")
+        resultlines.insert(-1, "warning Rate limited (Retry-After: 0)")
+        confargs = dict(maxhttpretries=0)
+        self.direct(url, resultlines, recursionlevel=0, confargs=confargs)
+        self.assertEqual(len(RetryAfterHandler.requests), 1)
+
+    def test_unavailable(self):
+        url = self.get_url("unavailable.html")
+        self.direct(url, self.get_resultlines(url, "error"), recursionlevel=0)
+        self.assertEqual(len(RetryAfterHandler.requests), 1)
@@ -16,6 +16,9 @@
 """
 Test http checking.
 """
+from linkcheck.checker import get_url_from
+
+from . import get_test_aggregate
 from .httpserver import HttpServerTest, CookieRedirectHttpRequestHandler
 
 
@@ -44,6 +47,34 @@ class TestHttpsRedirect(HttpServerTest):
         ]
         self.direct(url, resultlines, recursionlevel=0)
 
+    def test_redirect_connection_slot(self):
+        confargs = dict(maxconnectionshttp=1, maxconnectionshttps=1, robotstxt=False)
+        aggregate = get_test_aggregate(confargs, {"expected": []})
+        connection_pool = aggregate.connection_pool
+        held, acquired = [], []
+        acquire, release = connection_pool.acquire, connection_pool.release
+
+        def acquire_slot(scheme):
+            held.append(scheme)
+            acquired.append(scheme)
+            self.assertEqual(len(held), 1)
+            return acquire(scheme)
+
+        def release_slot(scheme):
+            held.remove(scheme)
+            release(scheme)
+
+        connection_pool.acquire = acquire_slot
+        connection_pool.release = release_slot
+        aggregate.add_request_session()
+        url = "http://localhost:%d/redirect1" % self.port
+        url_data = get_url_from(url, 0, aggregate, extern=(0, 0))
+        url_data.check()
+        url_data.close_connection()
+        # the redirect to https is requested with a https slot
+        self.assertEqual(acquired, ["http", "https"])
+        self.assertFalse(held)
+
 
 class RedirectHttpsRequestHandler(CookieRedirectHttpRequestHandler):
     def redirect(self):
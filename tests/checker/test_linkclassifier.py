@@ -0,0 +1,141 @@
+# Copyright (C) 2024 LinkChecker Authors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test the classification of intern and extern URLs.
+"""
+import re
+import unittest
+
+from linkcheck import get_link_pat
+from linkcheck.checker import linkclassifier
+from linkcheck.checker.internpaturl import get_intern_pattern
+
+
+def get_extern(externlinks, internlinks, url):
+    """Classify the URL by checking all link patterns in order."""
+    for entry in externlinks:
+        match = entry['pattern'].search(url)
+        if (entry['negate'] and not match) or (match and not entry['negate']):
+            return (1, entry['strict'])
+    for entry in internlinks:
+        match = entry['pattern'].search(url)
+        if (entry['negate'] and not match) or (match and not entry['negate']):
+            return (0, 0)
+    return None
+
+
+start_urls = (
+    "http://example.org/",
+    "https://www.example.com/dir/page.html",
+    "ftp://ftp.example.net/pub/",
+    "http://example.edu",
+    "http://a-b.example.org/x+y/z.html",
+)
+
+urls = (
+    "http://example.org/",
+    "https://example.org/page",
+    "http://www.example.org/",
+    "http://example.org.evil/",
+    "http://www.www.example.org/",
+    "http://example.com/dir/",
+    "https://www.example.com/dir/other.html",
+    "http://example.com/dirx",
+    "http://example.com/",
+    "ftp://ftp.example.net/pub/file",
+    "ftp://ftp.example.net/",
+    "http://ftp.example.net/pub/",
+    "http://example.edu/",
+    "http://example.education/",
+    "http://a-b.example.org/x+y/",
+    "http://ab.example.org/x+y/",
+    "mailto:user@example.org",
+    "file:///tmp/dir/file.html",
+    "file:///tmp/other.html",
+    "http://example.net/private/",
+)
+
+
+class TestLinkClassifier(unittest.TestCase):
+    """Test the compiled link patterns against checking them in order."""
+
+    def check(self, externlinks, internlinks, patterns=()):
+        classifier = linkclassifier.LinkClassifier(externlinks, internlinks)
+        internlinks = list(internlinks)
+        for pattern in patterns:
+            classifier.add_intern_pattern(pattern)
+            internlinks.append(get_link_pat(pattern))
+        for url in urls:
+            self.assertEqual(
+                classifier.get_extern(url),
+                get_extern(externlinks, internlinks, url),
+                url,
+            )
+
+    def test_parse_literal_pattern(self):
+        pattern = get_intern_pattern("http://www.example.com/dir/page.html")
+        self.assertEqual(
+            linkclassifier.parse_literal_pattern(pattern),
+            (("http", "https"), "example.com/dir"),
+        )
+        pattern = get_intern_pattern("ftp://ftp.example.net/")
+        self.assertEqual(
+            linkclassifier.parse_literal_pattern(pattern),
+            (("ftp",), "ftp.example.net/"),
+        )
+        for pattern in (
+            r"^https?://(www\.|)example\.com/.*\.html",
+            r"^https?://(www\.|)example\.com/\d",
+            r"example\.com",
+        ):
+            self.assertIsNone(linkclassifier.parse_literal_pattern(pattern))
+
+    def test_intern_patterns(self):
+        patterns = [get_intern_pattern(url) for url in start_urls]
+        self.check([], [], patterns)
+
+    def test_file_patterns(self):
+        self.check([], [], [re.escape("file:///tmp/dir/")])
+
+    def test_configured_patterns(self):
+        externlinks = [
+            get_link_pat(r"private", strict=True),
+            get_link_pat(r"^mailto:"),
+            get_link_pat(r"(?i)EXAMPLE\.EDU"),
+        ]
+        internlinks = [
+            get_link_pat(r"^https?://(www\.|)example\.net/"),
+            get_link_pat(r"(?P<tld>org)/$"),
+        ]
+        patterns = [get_intern_pattern(url) for url in start_urls]
+        self.check(externlinks, internlinks, patterns)
+
+    def test_negated_patterns(self):
+        externlinks = [
+            get_link_pat(r"example"),
+            get_link_pat(r"!^http", strict=True),
+        ]
+        self.check(externlinks, [])
+        self.check([get_link_pat(r"!^http", strict=True)], [])
+        self.check([], [get_link_pat(r"!\.org")])
+
+    def test_www_prefix(self):
+        classifier = linkclassifier.LinkClassifier([], [])
+        classifier.add_intern_pattern(get_intern_pattern("http://www.example.org/a/"))
+        self.assertEqual(classifier.get_extern("http://example.org/a/b"), (0, 0))
+        self.assertEqual(classifier.get_extern("https://www.example.org/a/"), (0, 0))
+        self.assertIsNone(classifier.get_extern("http://example.org/b/"))
+        self.assertIsNone(classifier.get_extern("http://wwwexample.org/a/"))
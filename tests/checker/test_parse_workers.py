@@ -0,0 +1,91 @@
+# Copyright (C) 2024 LinkChecker Authors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test parsing content in worker processes.
+"""
+import concurrent.futures
+import os
+import unittest
+from unittest import mock
+
+from linkcheck.htmlutil import linkparse
+from linkcheck.parser import workers
+
+from tests import need_pdflib
+from . import LinkCheckTest
+
+
+def exit_in_worker(pid):
+    """Kill the worker process, return the PID when called in the
+    process with the given PID."""
+    if os.getpid() != pid:
+        os._exit(1)
+    return pid
+
+
+class TestParserPool(unittest.TestCase):
+    """Test the parser process pool."""
+
+    def setUp(self):
+        self.pool = workers.ParserPool(1)
+
+    def tearDown(self):
+        self.pool.close()
+
+    def test_run(self):
+        document = self.pool.run(
+            linkparse.parse_document, '<base href="x/"><a href="a" id="b">c</a>'
+        )
+        self.assertEqual(document.links, [("a", 1, 17, "c", "x/")])
+        self.assertEqual([anchor[0] for anchor in document.anchors], ["b"])
+        self.assertEqual(document.base_ref, "x/")
+        self.assertFalse(self.pool.pending)
+
+    def test_run_after_close(self):
+        self.pool.close()
+        document = self.pool.run(linkparse.parse_document, '<a href="a">')
+        self.assertEqual([link[0] for link in document.links], ["a"])
+        self.assertFalse(self.pool.broken)
+
+    def test_cancelled(self):
+        future = concurrent.futures.Future()
+        future.cancel()
+        with mock.patch.object(self.pool.executor, "submit", return_value=future):
+            document = self.pool.run(linkparse.parse_document, '<a href="a">')
+        self.assertEqual([link[0] for link in document.links], ["a"])
+        self.assertFalse(self.pool.pending)
+
+    def test_broken(self):
+        pid = os.getpid()
+        self.assertEqual(self.pool.run(exit_in_worker, pid), pid)
+        self.assertTrue(self.pool.broken)
+
+
+class TestParseWorkers(LinkCheckTest):
+    """Test that checking with parser processes gives the same results."""
+
+    confargs = dict(parseprocesses=2)
+
+    def test_html(self):
+        self.file_test("file.html", confargs=self.confargs)
+
+    def test_css(self):
+        self.file_test("file.css", confargs=self.confargs)
+
+    @need_pdflib
+    def test_pdf(self):
+        confargs = dict(enabledplugins=["PdfParser"], **self.confargs)
+        self.file_test("file.pdf", confargs=confargs)
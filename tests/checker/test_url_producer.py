@@ -0,0 +1,63 @@
+# Copyright (C) 2024 LinkChecker Authors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test queueing URLs while they are checked.
+"""
+import os
+import unittest
+
+import linkcheck.director
+from linkcheck.cmdline import aggregate_url
+
+from . import get_file_url, get_test_aggregate
+
+
+class TestUrlProducer(unittest.TestCase):
+    """Test checking URLs of an iterable while it is read."""
+
+    def get_urls(self, aggregate, num):
+        """Generate file URLs and record the queue sizes and the number
+        of checked URLs when the next URL is read."""
+        dirname = os.path.join(os.path.dirname(__file__), "data")
+        for i in range(num):
+            self.sizes.append(aggregate.urlqueue.qsize())
+            self.checked.append(aggregate.urlqueue.finished_tasks)
+            filename = os.path.join(dirname, "missing%d.txt" % i)
+            yield "file://%s" % get_file_url(filename)
+
+    def check(self, confargs, num):
+        self.sizes = []
+        self.checked = []
+        aggregate = get_test_aggregate(confargs, {"expected": []})
+        aggregate.add_urls(self.get_urls(aggregate, num), aggregate_url)
+        linkcheck.director.check_urls(aggregate)
+        logger = aggregate.config["logger"]
+        self.assertFalse(logger.stats.internal_errors)
+        self.assertEqual(logger.stats.number, num)
+        return aggregate
+
+    def test_producer(self):
+        aggregate = self.check(dict(threads=2, stdinqueuesize=3), 30)
+        self.assertLessEqual(max(self.sizes), 3)
+        # checking started before all URLs were read
+        self.assertGreater(self.checked[-1], 0)
+        self.assertTrue(aggregate.urlqueue.empty())
+
+    def test_no_threads(self):
+        self.check(dict(threads=0, stdinqueuesize=3), 10)
+        # all URLs are queued before checking
+        self.assertEqual(self.checked[-1], 0)
+        self.assertEqual(self.sizes[-1], 9)
@@ -0,0 +1,195 @@
+# Copyright (C) 2024 LinkChecker Authors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test queueing of lightweight URL records.
+"""
+import threading
+
+import linkcheck.configuration
+import linkcheck.director
+from linkcheck.cache.urlqueue import Empty, get_host
+from linkcheck.checker import get_url_from
+from linkcheck.checker.httpurl import HttpUrl
+from linkcheck.checker.urlrecord import UrlRecord, get_record_key
+
+from .. import TestBase
+
+PARENT = "http://example.org/dir/page.html"
+
+
+class TestUrlRecord(TestBase):
+    """Test UrlRecord and its de-duplication in the URL queue."""
+
+    def setUp(self):
+        super().setUp()
+        config = linkcheck.configuration.Configuration()
+        self.aggregate = linkcheck.director.get_aggregate(config)
+
+    def get_record(self, url, parent=PARENT, base_ref=None):
+        return UrlRecord(url, 1, self.aggregate, parent_url=parent, base_ref=base_ref)
+
+    def test_record_key(self):
+        self.assertEqual(
+            get_record_key("other.html#a", PARENT, None, False),
+            "http://example.org/dir/other.html",
+        )
+        self.assertEqual(
+            get_record_key("other.html#a", PARENT, None, True),
+            "http://example.org/dir/other.html#a",
+        )
+        self.assertEqual(
+            get_record_key(" /top.html ", PARENT, None, False),
+            "http://example.org/top.html",
+        )
+        self.assertEqual(
+            get_record_key("a.html", PARENT, "http://example.com/", False),
+            "http://example.com/a.html",
+        )
+        self.assertEqual(get_record_key("", PARENT, None, False), PARENT)
+        self.assertIsNone(get_record_key("", None, None, False))
+        self.assertIsNone(get_record_key("http://[::1", PARENT, None, False))
+
+    def test_record(self):
+        record = self.get_record("../Other.html")
+        self.assertFalse(record.has_result)
+        self.assertEqual(record.url, "http://example.org/Other.html")
+        self.assertEqual(record.scheme, "http")
+        self.assertEqual(record.urlparts[1], "example.org")
+        url_data = record.to_url_data()
+        self.assertIsInstance(url_data, HttpUrl)
+        self.assertEqual(url_data.recursion_level, 1)
+        self.assertEqual(url_data.parent_url, PARENT)
+        self.assertEqual(url_data.url, "http://example.org/Other.html")
+
+    def test_record_host(self):
+        """Test, that records are queued for the same host as their URL
+        data."""
+        for url in (
+            "http://Example.ORG/a",
+            "http://example.org:80/a",
+            "http://example.org./a",
+            "https://example.org:443/a",
+            "http://example.org:8080/a",
+            "http://user@Example.org/a",
+        ):
+            record = self.get_record(url)
+            self.assertEqual(get_host(record), get_host(record.to_url_data()), url)
+        self.assertEqual(
+            get_host(self.get_record("http://Example.ORG:80/")), "example.org"
+        )
+
+    def test_queue_duplicate_key(self):
+        urlqueue = self.aggregate.urlqueue
+        urlqueue.put(self.get_record("other.html"))
+        urlqueue.put(self.get_record("/dir/other.html"))
+        self.assertEqual(urlqueue.qsize(), 1)
+
+    def test_queue_duplicate_url(self):
+        """Test, that records with different keys but the same normed URL
+        are only checked once."""
+        urlqueue = self.aggregate.urlqueue
+        urlqueue.put(self.get_record("http://Example.org/b.html"))
+        urlqueue.put(self.get_record("http://example.org/b.html"))
+        self.assertEqual(urlqueue.qsize(), 2)
+        checked = []
+        while not urlqueue.empty():
+            url_data = urlqueue.get(0)
+            if url_data is not None:
+                checked.append(url_data.url)
+                urlqueue.task_done(url_data)
+        self.assertEqual(checked, ["http://example.org/b.html"])
+        urlqueue.join(timeout=0)
+
+    def test_queue_encoded_url(self):
+        """Test, that differently encoded spellings of one URL are only
+        checked once, also when the normed URL is queued after another
+        spelling has been taken from the queue."""
+        urlqueue = self.aggregate.urlqueue
+        urlqueue.put(self.get_record("http://example.org/%7Euser/"))
+        urlqueue.put(self.get_record("http://example.org/%7euser/"))
+        self.assertEqual(urlqueue.qsize(), 2)
+        first = urlqueue.get(0)
+        self.assertIsNone(urlqueue.get(0))
+        urlqueue.put(self.get_record("http://example.org/~user/"))
+        self.assertEqual(urlqueue.qsize(), 0)
+        self.assertEqual(first.url, "http://example.org/~user/")
+        urlqueue.task_done(first)
+        urlqueue.join(timeout=0)
+
+    def test_queue_shutdown(self):
+        """Test, that a record taken from the queue while it is shut down
+        is not checked and its task is done."""
+        urlqueue = self.aggregate.urlqueue
+        urlqueue.put(self.get_record("other.html"))
+        materialize = urlqueue._materialize
+
+        def shutdown_materialize(record):
+            urlqueue.do_shutdown()
+            return materialize(record)
+
+        urlqueue._materialize = shutdown_materialize
+        self.assertIsNone(urlqueue.get(0))
+        self.assertFalse(urlqueue.active)
+        self.assertEqual(urlqueue.unfinished_tasks, 0)
+        urlqueue.join(timeout=0)
+
+    def test_queue_encoded_url_threads(self):
+        urlqueue = self.aggregate.urlqueue
+        spellings = ["%7Euser", "%7euser", "~user"]
+        checked = []
+
+        def worker(spelling):
+            for num in range(100):
+                url = "http://example.org/%s/%d" % (spelling, num)
+                urlqueue.put(self.get_record(url))
+                try:
+                    url_data = urlqueue.get(0)
+                except Empty:
+                    continue
+                if url_data is not None:
+                    checked.append(url_data.url)
+                    urlqueue.task_done(url_data)
+
+        threads = [
+            threading.Thread(target=worker, args=(spelling,))
+            for spelling in spellings
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        while not urlqueue.empty():
+            url_data = urlqueue.get(0)
+            if url_data is not None:
+                checked.append(url_data.url)
+                urlqueue.task_done(url_data)
+        self.assertEqual(len(checked), 100)
+        self.assertEqual(len(set(checked)), 100)
+
+    def test_from_url_data(self):
+        url_data = get_url_from(
+            "a.html",
+            1,
+            self.aggregate,
+            parent_url=PARENT,
+            parent_content_type="application/x-httpd-php",
+        )
+        record = UrlRecord.from_url_data(url_data)
+        self.assertEqual(record.parent_content_type, "application/x-httpd-php")
+        record = UrlRecord.from_state(record.get_state(), self.aggregate)
+        self.assertEqual(
+            record.to_url_data().parent_content_type, "application/x-httpd-php"
+        )
@@ -45,6 +45,7 @@ class TestConfig(TestBase):
         for scheme in ("http", "https", "ftp"):
             self.assertTrue(scheme in config["allowedschemes"])
         self.assertEqual(config["threads"], 5)
+        self.assertEqual(config["parseprocesses"], 2)
         self.assertEqual(config["timeout"], 42)
         self.assertEqual(config["aborttimeout"], 99)
         self.assertEqual(config["recursionlevel"], 1)
@@ -55,10 +56,29 @@ class TestConfig(TestBase):
         self.assertEqual(config["sslverify"], "/path/to/cacerts.crt")
         self.assertEqual(config["maxnumurls"], 1000)
         self.assertEqual(config["maxrequestspersecond"], 0.1)
+        self.assertEqual(config["maxconnectionsperhost"], 2)
+        self.assertEqual(
+            config.get_connectionlimits(), dict(http=3, https=4, ftp=5)
+        )
+        self.assertEqual(config["dnscachettl"], 600)
+        self.assertEqual(config["dnscachenegativettl"], 30)
+        self.assertEqual(config["maxhostfailures"], 3)
+        self.assertEqual(config["hostretryseconds"], 120)
+        self.assertEqual(config["maxhttpretries"], 1)
         self.assertEqual(config["maxrunseconds"], 1)
         self.assertEqual(config["maxfilesizeparse"], 100)
         self.assertEqual(config["maxfilesizedownload"], 100)
         self.assertEqual(config["resultcachesize"], 9999)
+        self.assertEqual(config["seenbloomsize"], 4096)
+        self.assertTrue(config["hostfrontier"])
+        self.assertEqual(config["queuememorysize"], 500)
+        self.assertEqual(config["stdinqueuesize"], 200)
+        self.assertEqual(config["statedir"], "/path/to/state")
+        self.assertEqual(config["checkpointinterval"], 60)
+        self.assertEqual(config["persistentcache"], "/path/to/results.sqlite")
+        self.assertEqual(config["persistentcachettl"], {"*": 3600, "https": 7200})
+        self.assertTrue(config["incremental"])
+        self.assertTrue(config["headrequests"])
         # filtering section
         patterns = [x["pattern"].pattern for x in config["externlinks"]]
         for prefix in ("ignore_", "nofollow_"):
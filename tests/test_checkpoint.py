@@ -0,0 +1,155 @@
+# Copyright (C) 2024 LinkChecker Authors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test checkpoints of the check state.
+"""
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import linkcheck.configuration
+import linkcheck.director
+from linkcheck import LinkCheckerError
+from linkcheck.director import checkpoint
+from linkcheck.checker import get_url_from
+from linkcheck.checker.urlrecord import UrlRecord
+
+PARENT = "http://example.org/"
+
+
+class TestCheckpoint(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.statedir = os.path.join(self.tmpdir.name, "state")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def get_aggregate(self, statedir=None, queuememorysize=0):
+        config = linkcheck.configuration.Configuration()
+        config["statedir"] = statedir
+        config["queuememorysize"] = queuememorysize
+        config["logger"] = config.logger_new("none")
+        return linkcheck.director.get_aggregate(config)
+
+    def test_resume(self):
+        aggregate = self.get_aggregate(self.statedir)
+        urlqueue = aggregate.urlqueue
+        urlqueue.put(get_url_from(PARENT, 0, aggregate, extern=(0, 0)))
+        for name in ("a.html", "b.html", "c.html"):
+            urlqueue.put(UrlRecord(name, 1, aggregate, parent_url=PARENT))
+        # the start URL is being checked, a.html has been checked
+        start = urlqueue.get(0)
+        url_data = urlqueue.get(0)
+        aggregate.result_cache.add_result(url_data.cache_url, url_data.to_wire())
+        urlqueue.task_done(url_data)
+        aggregate.logger.loggers[0].stats.number = 1
+        aggregate.downloaded_bytes = 42
+        aggregate.save_checkpoint()
+        filename = aggregate.get_checkpoint_filename()
+        self.assertTrue(os.path.isfile(filename))
+
+        resumed = self.get_aggregate(self.statedir)
+        resumed.load_checkpoint()
+        urlqueue = resumed.urlqueue
+        self.assertEqual(urlqueue.qsize(), 3)
+        self.assertEqual(urlqueue.finished_tasks, 1)
+        self.assertEqual(resumed.downloaded_bytes, 42)
+        cache = resumed.result_cache
+        self.assertIsNotNone(cache.get_result("http://example.org/a.html"))
+        self.assertTrue(cache.has_result("http://example.org/c.html"))
+        self.assertFalse(cache.has_result("http://example.org/d.html"))
+        # already seen URLs are not queued again
+        urlqueue.put(UrlRecord("b.html", 1, resumed, parent_url=PARENT))
+        self.assertEqual(urlqueue.qsize(), 3)
+        resumed.logger.start_log_output()
+        self.assertEqual(resumed.logger.loggers[0].stats.number, 1)
+        url_data = urlqueue.get(0)
+        self.assertEqual(url_data.url, start.url)
+        self.assertEqual(url_data.extern, (0, 0))
+        urls = [urlqueue.get(0).url for dummy in range(2)]
+        self.assertEqual(
+            urls, ["http://example.org/b.html", "http://example.org/c.html"]
+        )
+        resumed.remove_checkpoint()
+        self.assertFalse(os.path.exists(filename))
+
+    def test_resume_spilled(self):
+        aggregate = self.get_aggregate(self.statedir, queuememorysize=2)
+        urlqueue = aggregate.urlqueue
+        names = ["page%d.html" % num for num in range(5)]
+        for name in names:
+            urlqueue.put(UrlRecord(name, 1, aggregate, parent_url=PARENT))
+        urlqueue.spill.batch_size = 2
+        urlqueue.spill.flush()
+        self.assertEqual(len(urlqueue.spill), 3)
+        aggregate.save_checkpoint()
+        urlqueue.close()
+
+        resumed = self.get_aggregate(self.statedir, queuememorysize=2)
+        resumed.load_checkpoint()
+        urlqueue = resumed.urlqueue
+        self.assertEqual(urlqueue.qsize(), 5)
+        urls = [urlqueue.get(0).url for dummy in range(5)]
+        self.assertEqual(urls, [PARENT + name for name in names])
+        urlqueue.close()
+
+    def test_get_while_saving(self):
+        """Test, that URLs can be taken from the queue while the spilled
+        URLs are written, and that the checkpoint holds the URLs queued
+        when it was started."""
+        aggregate = self.get_aggregate(self.statedir, queuememorysize=2)
+        urlqueue = aggregate.urlqueue
+        names = ["page%d.html" % num for num in range(8)]
+        for name in names:
+            urlqueue.put(UrlRecord(name, 1, aggregate, parent_url=PARENT))
+        urlqueue.spill.batch_size = 2
+        write = checkpoint.write
+        taken = []
+
+        def get_url():
+            taken.append(urlqueue.get(0).url)
+
+        def write_and_get(filename, state, spilled):
+            def get_while_writing():
+                for items in spilled:
+                    yield items
+                    thread = threading.Thread(target=get_url)
+                    thread.start()
+                    thread.join(5)
+                    self.assertFalse(thread.is_alive())
+
+            write(filename, state, get_while_writing())
+
+        with mock.patch.object(checkpoint, "write", write_and_get):
+            aggregate.save_checkpoint()
+        self.assertEqual(taken, [PARENT + name for name in names[:3]])
+        urlqueue.close()
+
+        resumed = self.get_aggregate(self.statedir, queuememorysize=2)
+        resumed.load_checkpoint()
+        urlqueue = resumed.urlqueue
+        self.assertEqual(urlqueue.qsize(), 8)
+        urls = [urlqueue.get(0).url for dummy in range(8)]
+        self.assertEqual(urls, [PARENT + name for name in names])
+        urlqueue.close()
+
+    def test_no_checkpoint(self):
+        self.assertRaises(LinkCheckerError, self.get_aggregate().load_checkpoint)
+        aggregate = self.get_aggregate(self.statedir)
+        self.assertRaises(LinkCheckerError, aggregate.load_checkpoint)
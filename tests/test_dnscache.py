@@ -0,0 +1,164 @@
+# Copyright (C) 2024 LinkChecker Authors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test the DNS lookup cache.
+"""
+import socket
+import threading
+import time
+import unittest
+
+import linkcheck.configuration
+import linkcheck.director
+from linkcheck.network import dnscache
+
+
+def unknown_host():
+    raise socket.gaierror(socket.EAI_NONAME, "Name or service not known")
+
+
+def temporary_failure():
+    raise socket.gaierror(socket.EAI_AGAIN, "Temporary failure")
+
+
+class TestDnsCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = dnscache.DnsCache(300, 60)
+        self.calls = 0
+
+    def counted(self, func):
+        def resolve():
+            self.calls += 1
+            return func()
+
+        return resolve
+
+    def get(self, key, func, **kwargs):
+        return self.cache.get(
+            key, self.counted(func), dnscache.is_unknown_host, **kwargs
+        )
+
+    def test_positive(self):
+        for dummy in range(2):
+            self.assertEqual(self.get("a", lambda: [1]), [1])
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(self.cache.get_stats(), dict(hits=1, misses=1))
+
+    def test_expiration(self):
+        self.get("a", lambda: [1], get_expiration=lambda result: time.time() - 1)
+        self.get("a", lambda: [1])
+        self.assertEqual(self.calls, 2)
+
+    def test_negative(self):
+        for dummy in range(2):
+            self.assertRaises(socket.gaierror, self.get, "a", unknown_host)
+        self.assertEqual(self.calls, 1)
+        for dummy in range(2):
+            self.assertRaises(socket.gaierror, self.get, "b", temporary_failure)
+        self.assertEqual(self.calls, 3)
+
+    def test_negative_new_error(self):
+        errors = []
+        for dummy in range(2):
+            try:
+                self.get("a", unknown_host)
+            except socket.gaierror as exc:
+                errors.append(exc)
+        self.assertIsNot(errors[0], errors[1])
+        self.assertEqual(errors[1].errno, socket.EAI_NONAME)
+        self.assertEqual(errors[1].args, errors[0].args)
+
+    def test_coalescing(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow():
+            started.set()
+            release.wait()
+            return [1]
+
+        results = []
+
+        def lookup():
+            results.append(self.get("a", slow))
+
+        first = threading.Thread(target=lookup)
+        first.start()
+        started.wait()
+        second = threading.Thread(target=lookup)
+        second.start()
+        # the second thread waits for the running lookup
+        time.sleep(0.1)
+        release.set()
+        first.join()
+        second.join()
+        self.assertEqual(results, [[1], [1]])
+        self.assertEqual(self.calls, 1)
+
+    def test_coalescing_interrupt(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def interrupted():
+            started.set()
+            release.wait()
+            raise KeyboardInterrupt()
+
+        errors = []
+
+        def lookup():
+            try:
+                self.get("a", interrupted)
+            except KeyboardInterrupt as exc:
+                errors.append(exc)
+
+        first = threading.Thread(target=lookup)
+        first.start()
+        started.wait()
+        second = threading.Thread(target=lookup)
+        second.start()
+        time.sleep(0.1)
+        release.set()
+        first.join()
+        second.join()
+        self.assertEqual(len(errors), 2)
+        self.assertIsNot(errors[0], errors[1])
+        # interrupts are not cached
+        self.assertEqual(self.get("a", lambda: [1]), [1])
+
+    def test_install(self):
+        try:
+            dnscache.install(300, 60)
+            self.assertIs(socket.getaddrinfo, dnscache.getaddrinfo)
+            socket.getaddrinfo("localhost", 80)
+            socket.getaddrinfo("localhost", 80)
+            self.assertEqual(dnscache.cache.get_stats(), dict(hits=1, misses=1))
+        finally:
+            dnscache.uninstall()
+        self.assertIsNone(dnscache.cache)
+        self.assertIs(socket.getaddrinfo, dnscache._getaddrinfo)
+
+    def test_installed_while_checking(self):
+        config = linkcheck.configuration.Configuration()
+        config.sanitize()
+        self.assertIs(socket.getaddrinfo, dnscache._getaddrinfo)
+        aggregate = linkcheck.director.get_aggregate(config)
+        installed = []
+        aggregate.visit_loginurl = lambda: installed.append(socket.getaddrinfo)
+        linkcheck.director.check_urls(aggregate)
+        self.assertEqual(installed, [dnscache.getaddrinfo])
+        self.assertIs(socket.getaddrinfo, dnscache._getaddrinfo)
+        self.assertIsNone(dnscache.cache)
@@ -16,8 +16,7 @@
 """
 Test linkparser routines.
 """
-
-from linkcheck.htmlutil import htmlsoup, linkparse
+from linkcheck.htmlutil import linkparse
 
 from . import TestBase
 
@@ -29,9 +28,10 @@ class TestLinkparser(TestBase):
 
     def _test_one_link(self, content, url):
         self.count_url = 0
-        linkparse.find_links(
-            htmlsoup.make_soup(content), self._test_one_url(url), linkparse.LinkTags
-        )
+        linkparse.parse_links(content, self._test_one_url(url), linkparse.LinkTags)
+        self.assertEqual(self.count_url, 1)
+        self.count_url = 0
+        linkparse.parse_document(content).find_links(self._test_one_url(url))
         self.assertEqual(self.count_url, 1)
 
     def _test_one_url(self, origurl):
@@ -47,7 +47,8 @@ class TestLinkparser(TestBase):
         def callback(url, line, column, name, base):
             self.assertTrue(False, "URL %r found" % url)
 
-        linkparse.find_links(htmlsoup.make_soup(content), callback, linkparse.LinkTags)
+        linkparse.parse_links(content, callback, linkparse.LinkTags)
+        linkparse.parse_document(content).find_links(callback)
 
     def test_href_parsing(self):
         # Test <a href> parsing.
@@ -145,3 +146,89 @@ class TestLinkparser(TestBase):
         url = "http://example.com/bla/a=b"
         content = '<a href="%s&quot;">'
         self._test_one_link(content % url, url + '"')
+
+    def test_parse_document(self):
+        content = (
+            '<html><head><title> Title </title><base href="http://example.org/">'
+            '<meta name="Robots" content="noindex, nofollow"></head>'
+            '<body><a href="alink"> A <b>link</b> </a><a name="top"></a>'
+            '<div id="main"><img src="img.png" alt="Image"></div></body></html>'
+        )
+        document = linkparse.parse_document(content)
+        self.assertEqual(document.title, "Title")
+        self.assertEqual(document.base_ref, "http://example.org/")
+        self.assertEqual(document.robots, ["noindex, nofollow"])
+        self.assertFalse(document.allows_robots())
+        links = [(url, name, base) for url, l, c, name, base in document.links]
+        self.assertEqual(
+            links,
+            [
+                ("alink", "A link", "http://example.org/"),
+                ("img.png", "Image", "http://example.org/"),
+            ],
+        )
+        anchors = [anchor[0] for anchor in document.anchors]
+        self.assertEqual(anchors, ["top", "main"])
+
+    def _test_links(self, content, expected):
+        links = []
+
+        def callback(url, line, column, name, base):
+            links.append((url, line, column, name, base))
+
+        linkparse.parse_links(content, callback, linkparse.LinkTags)
+        self.assertEqual(links, expected)
+        self.assertEqual(linkparse.parse_document(content).links, expected)
+
+    def test_parse_links(self):
+        # Test link names and positions of badly nested and unclosed tags.
+        self._test_links(
+            '<a href="a">x<img src="b" alt="y">z</a>',
+            [("a", 1, 1, "xz", ""), ("b", 1, 14, "y", "")],
+        )
+        self._test_links(
+            '<p><a href="a">unclosed</p>after<a href="b">b</a>',
+            [("a", 1, 4, "unclosed", ""), ("b", 1, 33, "b", "")],
+        )
+        self._test_links(
+            '<a href="a">outer<a href="b">inner</a>rest</a>',
+            [("a", 1, 1, "outerinnerrest", ""), ("b", 1, 18, "inner", "")],
+        )
+        self._test_links(
+            '<a href="a">never closed <img src="b">',
+            [("a", 1, 1, "never closed", ""), ("b", 1, 26, "", "")],
+        )
+        self._test_links(
+            '<a href="a"/>text<a href="b">\n  &amp; </a>',
+            [("a", 1, 1, "", ""), ("b", 1, 18, "&", "")],
+        )
+        self._test_links(
+            '<a href="a">x</img></a><br></br><a href="c">c</a>',
+            [("a", 1, 1, "x", ""), ("c", 1, 33, "c", "")],
+        )
+        self._test_links(
+            '<html>\n<body>\n  <a href="a" href="b">dup</a>\n'
+            '  <script>var x = "<a href=\'no\'>";</script>\n</body></html>',
+            [("b", 3, 3, "dup", "")],
+        )
+
+    def test_document_feed(self):
+        feed = linkparse.DocumentFeed("utf-8")
+        feed.feed(b'<html><head><link href="a.css"></head><bo')
+        feed.feed(b'dy><a href="b">\xc3')
+        feed.feed(b'\xa4</a><a href="c">c</a>')
+        feed.feed(b'<a href="d">d')
+        document = feed.close()
+        self.assertEqual([link[0] for link in document.links], ["a.css", "b", "c", "d"])
+        self.assertEqual(document.links[1][3], "\xe4")
+        content = (
+            '<html><head><link href="a.css"></head><body><a href="b">\xe4</a>'
+            '<a href="c">c</a><a href="d">d'
+        )
+        self.assertEqual(document.links, linkparse.parse_document(content).links)
+
+    def test_document_feed_nofollow(self):
+        feed = linkparse.DocumentFeed("utf-8")
+        feed.feed(b'<meta name="robots" content="nofollow"><body><a href="a">')
+        self.assertFalse(feed.close().allows_robots())
+        self.assertRaises(LookupError, linkparse.DocumentFeed, "unknown")
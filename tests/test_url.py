@@ -543,3 +543,72 @@ class TestUrl(unittest.TestCase):
         host, port = splitport(netloc, 99)
         self.assertEqual(host, netloc)
         self.assertEqual(port, 99)
+
+    def test_url_join_parent(self):
+        url_join_norm = linkcheck.url.url_join_norm.__wrapped__
+        url_join_parent = linkcheck.url.url_join_parent
+        parents = (
+            "",
+            "http://example.org",
+            "http://example.org/",
+            "http://example.org/a/b.html?x=1",
+            "https://user@example.org:8080/a/b/;p/c;q",
+            "file:///tmp/a/b.html",
+            "ftp://example.org/pub/",
+            "mailto:user@example.org",
+            "a/b.html",
+        )
+        urls = (
+            "",
+            "c.html",
+            "./c.html",
+            "../c.html",
+            "../../../c.html",
+            "/c.html",
+            "/../c.html",
+            "//example.com/c.html",
+            "?y=2",
+            "#anchor",
+            ";x",
+            "c/",
+            "https://example.com/c.html",
+            "http:c.html",
+            "HTTP:c.html",
+            "ftp:c.html",
+            "svn+ssh://example.org/repo",
+            "h323:user@example.org",
+        )
+        for parent in parents:
+            for url in urls:
+                self.assertEqual(
+                    url_join_norm(url_join_parent(parent, url), url),
+                    url_join_norm(parent, url),
+                    (parent, url),
+                )
+        self.assertEqual(
+            url_join_norm(
+                url_join_parent("http://example.org/a/b.html", "http:c.html"),
+                "http:c.html",
+            ),
+            "http://example.org/a/c.html",
+        )
+        self.assertEqual(
+            url_join_parent("http://example.org/a/b.html", "svn+ssh://host/repo"),
+            "http://example.org/a/b.html",
+        )
+        self.assertEqual(
+            url_join_parent("http://example.org/a/b.html?x", "c.html"),
+            "http://example.org/a/",
+        )
+        self.assertEqual(
+            url_join_parent("http://example.org/a/b.html", "/c.html"),
+            "http://example.org/",
+        )
+
+    def test_cache_stats(self):
+        linkcheck.url.clear_caches()
+        for dummy in range(2):
+            url_norm("http://example.org/a/../b.html")
+        self.assertEqual(
+            linkcheck.url.get_cache_stats()["url_norm"], dict(hits=1, misses=1)
+        )